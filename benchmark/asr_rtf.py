@@ -0,0 +1,105 @@
+"""
+Reports the real-time factor of ASR configurations on the test audio files.
+
+Usage:
+    python -m benchmark.asr_rtf
+    python -m benchmark.asr_rtf --configs '[{"model_size": "small", "device": "cpu", "compute_type": "int8"}]'
+
+Each configuration is loaded once, warmed up, and then transcribes every WAV file in
+test/audio_files. One JSON object per configuration is printed; real_time_factor is
+processing time divided by audio duration (lower is better, below 1 is faster than real time).
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import time
+import wave
+
+from src.asr.asr_factory import ASRFactory
+from src.client import Client
+from src.inference_executor import InferenceExecutor
+
+AUDIO_DIR = os.path.join(os.path.dirname(__file__), "..", "test", "audio_files")
+
+DEFAULT_CONFIGS = [
+    {"model_size": "large-v3", "device": "cuda", "compute_type": "float16"},
+    {"model_size": "large-v3", "device": "cuda", "compute_type": "int8_float16"},
+    {"model_size": "large-v3", "device": "cpu", "compute_type": "int8"},
+    {"model_size": "small", "device": "cpu", "compute_type": "int8"},
+    {"model_size": "small", "device": "cpu", "compute_type": "int8", "num_workers": 2},
+]
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Measure the real-time factor of ASR configurations")
+    parser.add_argument("--asr-type", type=str, default="faster_whisper", help="Type of ASR pipeline to benchmark")
+    parser.add_argument("--configs", type=str, default=json.dumps(DEFAULT_CONFIGS), help="JSON list of --asr-args configurations to compare")
+    parser.add_argument("--audio-dir", type=str, default=AUDIO_DIR, help="Directory with 16 kHz mono 16-bit WAV files")
+    parser.add_argument("--repeat", type=int, default=1, help="Number of passes over the files per configuration")
+    return parser.parse_args()
+
+def load_wavs(audio_dir):
+    audios = []
+    for path in sorted(glob.glob(os.path.join(audio_dir, "*.wav"))):
+        with wave.open(path, 'rb') as wav_file:
+            audios.append((os.path.basename(path), wav_file.readframes(wav_file.getnframes()), wav_file.getnframes() / wav_file.getframerate()))
+    return audios
+
+async def transcribe_all(asr, audios, repeat):
+    """
+    Transcribes every file, in parallel up to the model's worker count, and returns the elapsed seconds.
+    """
+    workers = getattr(asr, 'num_workers', 1)
+    semaphore = asyncio.Semaphore(workers)
+
+    async def transcribe(name, data, duration):
+        async with semaphore:
+            client = Client(name, 16000, 2, max_buffer_seconds=duration + 1)
+            client.scratch_buffer = data
+            await asr.transcribe(client)
+
+    start = time.time()
+    for _ in range(repeat):
+        await asyncio.gather(*[transcribe(*audio) for audio in audios])
+    return time.time() - start
+
+async def benchmark(asr_type, config, audios, repeat):
+    start = time.time()
+    asr = ASRFactory.create_asr_pipeline(asr_type, **config)
+    load_seconds = time.time() - start
+    executor = InferenceExecutor(max_workers=getattr(asr, 'num_workers', 1))
+    asr.executor = executor
+
+    # Warm-up on the shortest file so lazy initialization is not measured
+    await transcribe_all(asr, [min(audios, key=lambda audio: audio[2])], 1)
+    elapsed = await transcribe_all(asr, audios, repeat)
+    executor.shutdown()
+
+    audio_seconds = repeat * sum(duration for _, _, duration in audios)
+    return {
+        "asr_type": asr_type,
+        "config": config,
+        "device": getattr(asr, 'device', None),
+        "compute_type": getattr(asr, 'compute_type', None),
+        "cpu_threads": getattr(asr, 'cpu_threads', None),
+        "num_workers": getattr(asr, 'num_workers', 1),
+        "load_seconds": load_seconds,
+        "audio_seconds": audio_seconds,
+        "processing_seconds": elapsed,
+        "real_time_factor": elapsed / audio_seconds,
+    }
+
+def main():
+    args = parse_args()
+    audios = load_wavs(args.audio_dir)
+    for config in json.loads(args.configs):
+        try:
+            result = asyncio.run(benchmark(args.asr_type, config, audios, args.repeat))
+        except Exception as e:
+            # e.g. a CUDA configuration on a CPU-only machine
+            result = {"asr_type": args.asr_type, "config": config, "error": str(e)}
+        print(json.dumps(result), flush=True)
+
+if __name__ == "__main__":
+    main()
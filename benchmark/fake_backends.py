@@ -0,0 +1,54 @@
+"""
+VAD and ASR backends with a configurable service time, to load-test the server without models or a GPU.
+
+The simulated inference blocks an executor thread like a real model does, so queueing,
+batching and overload behave as they would in production.
+"""
+import time
+
+from src.asr.asr_interface import ASRInterface
+from src.inference_executor import run_inference
+from src.vad.energy_vad import EnergyVAD
+
+class FakeVAD(EnergyVAD):
+    """
+    EnergyVAD, so that speech boundaries are real, plus a simulated service time of
+    `base_ms` + `ms_per_second` for every second of audio scored.
+    """
+
+    def __init__(self, base_ms=5.0, ms_per_second=2.0, **kwargs):
+        super().__init__(**kwargs)
+        self.base_ms = float(base_ms)
+        self.ms_per_second = float(ms_per_second)
+
+    async def _serve(self, audio_seconds):
+        await run_inference(self.executor, "vad", time.sleep, (self.base_ms + self.ms_per_second * audio_seconds) / 1000)
+
+    async def detect_audio_activity(self, audio, sampling_rate=16000):
+        await self._serve(len(audio) / sampling_rate)
+        return await super().detect_audio_activity(audio, sampling_rate)
+
+    async def detect_activity_incremental(self, client, min_silence_seconds):
+        new_samples = len(client.scratch_buffer) // client.samples_width - client.vad_state.processed_samples
+        await self._serve(max(0, new_samples) / client.sampling_rate)
+        return await super().detect_activity_incremental(client, min_silence_seconds)
+
+class FakeASR(ASRInterface):
+    """
+    ASR taking `base_ms` plus `real_time_factor` times the audio duration per call. A batch costs
+    one `base_ms` for all of its clients, like a batched decoder.
+    """
+    model_name = "fake"
+
+    def __init__(self, base_ms=50.0, real_time_factor=0.1):
+        self.base_ms = float(base_ms)
+        self.real_time_factor = float(real_time_factor)
+
+    async def transcribe(self, client):
+        return (await self.transcribe_batch([client]))[0]
+
+    async def transcribe_batch(self, clients):
+        seconds = [len(client.scratch_buffer) / (client.sampling_rate * client.samples_width) for client in clients]
+        await run_inference(self.executor, "asr", time.sleep, self.base_ms / 1000 + self.real_time_factor * sum(seconds))
+        return [{"language": "en", "language_probability": 1.0, "text": f"{duration:.2f} seconds of audio", "words": []}
+                for duration in seconds]
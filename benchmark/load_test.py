@@ -0,0 +1,258 @@
+"""
+Load test of the websocket server with many simulated real-time clients.
+
+Usage:
+    python -m benchmark.load_test --clients 50
+    python -m benchmark.load_test --clients 200 --pattern bursty --asr-rtf 0.3 --output results.json
+    python -m benchmark.load_test --backend real --vad-type pyannote --asr-type faster_whisper --clients 10
+
+A server is started in this process with fake VAD/ASR backends (EnergyVAD plus a simulated
+service time, see fake_backends.py) or with real models. Every client streams utterances of speech
+from the WAV files in test/audio_files at real-time pace, separated by silence, and measures
+the time from the end of each utterance to the transcription covering it. One JSON object is
+printed with the configuration and the results, so runs can be diffed between releases; with
+the same --seed the simulated traffic is identical.
+"""
+import argparse
+import asyncio
+import contextlib
+import glob
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+import websockets
+
+from src.audio_utils import load_wav_mmap, pcm16_to_float32
+from src.inference_executor import InferenceExecutor
+from src.tracing import LoopLagMonitor
+from src.metrics import CHUNKS_DISCARDED, OVERLOAD_EVENTS, BYTES_DROPPED
+from src.model_registry import model_registry
+from src.server import Server
+from src.vad.energy_vad import EnergyVAD
+from .fake_backends import FakeVAD, FakeASR
+
+AUDIO_DIR = os.path.join(os.path.dirname(__file__), "..", "test", "audio_files")
+SAMPLING_RATE = 16000
+SAMPLES_WIDTH = 2
+
+# Speaking patterns: utterance length range, pause length range and pace (1 is real time)
+PATTERNS = {
+    "conversational": {"utterance_seconds": (2, 8), "pause_seconds": (0.8, 3), "pace": 1.0},
+    "continuous": {"utterance_seconds": (15, 30), "pause_seconds": (0.8, 1.2), "pace": 1.0},
+    "bursty": {"utterance_seconds": (1, 3), "pause_seconds": (0.8, 1.0), "pace": 2.0},
+}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load test the VoiceStreamAI server with simulated real-time clients")
+    parser.add_argument("--clients", type=int, default=20, help="Number of concurrent clients")
+    parser.add_argument("--utterances", type=int, default=3, help="Utterances streamed by each client")
+    parser.add_argument("--pattern", type=str, default="conversational", choices=sorted(PATTERNS), help="Speaking pattern of the clients")
+    parser.add_argument("--frame-ms", type=float, default=100, help="Audio sent per websocket message")
+    parser.add_argument("--jitter-ms", type=float, default=20, help="Mean random delay added to each message, simulating network jitter")
+    parser.add_argument("--ramp-up-seconds", type=float, default=2, help="Clients connect spread over this period")
+    parser.add_argument("--timeout-seconds", type=float, default=30, help="Utterances without a transcription this long after they ended count as dropped")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the simulated traffic")
+    parser.add_argument("--audio-dir", type=str, default=AUDIO_DIR, help="Directory with 16 kHz mono 16-bit WAV files")
+    parser.add_argument("--processing-strategy", type=str, default="silence_at_end_of_chunk", help="Buffering strategy of the clients")
+    parser.add_argument("--processing-args", type=str, default='{"chunk_length_seconds": 1, "chunk_offset_seconds": 0.5}', help="JSON string of processing_args of the clients")
+    parser.add_argument("--backend", type=str, default="fake", choices=["fake", "real"], help="Fake backends with simulated service times, or the real VAD/ASR pipelines")
+    parser.add_argument("--vad-base-ms", type=float, default=5, help="Fake VAD service time per call")
+    parser.add_argument("--vad-ms-per-second", type=float, default=2, help="Fake VAD service time per second of scored audio")
+    parser.add_argument("--asr-base-ms", type=float, default=50, help="Fake ASR service time per call")
+    parser.add_argument("--asr-rtf", type=float, default=0.1, help="Fake ASR service time per second of transcribed audio")
+    parser.add_argument("--vad-type", type=str, default="pyannote", help="VAD pipeline type for --backend real")
+    parser.add_argument("--vad-args", type=str, default='{}', help="JSON string of VAD pipeline arguments for --backend real")
+    parser.add_argument("--asr-type", type=str, default="faster_whisper", help="ASR pipeline type for --backend real")
+    parser.add_argument("--asr-args", type=str, default='{}', help="JSON string of ASR pipeline arguments for --backend real")
+    parser.add_argument("--executor-args", type=str, default='{"kind": "thread", "max_workers": 1, "max_queue_size": 64}', help="JSON string of arguments for the inference executor")
+    parser.add_argument("--port", type=int, default=8790, help="Port of the server under test")
+    parser.add_argument("--output", type=str, default=None, help="Also write the results to this JSON file")
+    return parser.parse_args()
+
+def percentiles(values):
+    if not values:
+        return {"count": 0, "p50": None, "p95": None, "p99": None, "max": None, "mean": None}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"count": len(values), "p50": float(p50), "p95": float(p95), "p99": float(p99), "max": float(max(values)), "mean": float(np.mean(values))}
+
+async def load_phrases(audio_dir):
+    """
+    Returns, for every WAV file, its samples and the (start, end) sample offsets of its
+    speech segments, found with EnergyVAD.
+    """
+    vad = EnergyVAD()
+    phrases = []
+    for path in sorted(glob.glob(os.path.join(audio_dir, "*.wav"))):
+        samples, sampling_rate, channels, sample_format = load_wav_mmap(path)
+        if (sampling_rate, channels, sample_format) != (SAMPLING_RATE, 1, 'int16'):
+            raise ValueError(f"{path} is not 16 kHz mono 16-bit audio")
+        segments = await vad.detect_audio_activity(pcm16_to_float32(samples), SAMPLING_RATE)
+        segments = [(int(s['start'] * SAMPLING_RATE), int(s['end'] * SAMPLING_RATE)) for s in segments]
+        if segments:
+            phrases.append((np.asarray(samples), segments))
+    if not phrases:
+        raise ValueError(f"No WAV files with speech in {audio_dir}")
+    return phrases
+
+def plan_utterances(rng, phrases, pattern, count):
+    """
+    Returns the (speech PCM, pause seconds) pairs one client streams.
+
+    Utterances are runs of consecutive speech segments of a file, so they start and end on a
+    speech boundary and the end of each utterance is the end of speech the latency is measured from.
+    """
+    utterances = []
+    for _ in range(count):
+        samples, segments = phrases[rng.randrange(len(phrases))]
+        target = rng.uniform(*pattern["utterance_seconds"]) * SAMPLING_RATE
+        first = rng.randrange(len(segments))
+        last = first
+        while last + 1 < len(segments) and segments[last][1] - segments[first][0] < target:
+            last += 1
+        speech = samples[segments[first][0]:segments[last][1]].tobytes()
+        utterances.append((speech, rng.uniform(*pattern["pause_seconds"])))
+    return utterances
+
+async def simulate_client(uri, utterances, pattern, args, config, start_delay, rng):
+    """
+    Streams the utterances at the pattern's pace and returns (utterance end times, transcription receive times, errors).
+    """
+    await asyncio.sleep(start_delay)
+    frame_bytes = int(args.frame_ms / 1000 * SAMPLING_RATE) * SAMPLES_WIDTH
+    frame_seconds = args.frame_ms / 1000 / pattern["pace"]
+    ends, received, errors = [], [], []
+
+    async with websockets.connect(uri, max_size=None) as websocket:
+        async def receive():
+            async for message in websocket:
+                message = json.loads(message)
+                if message.get('type') in (None, 'final') and 'text' in message:
+                    received.append(time.monotonic())
+                elif message.get('type') == 'error':
+                    errors.append(message['data'])
+
+        receiver = asyncio.create_task(receive())
+        await websocket.send(json.dumps({"type": "config", "data": config}))
+        next_send = time.monotonic()
+        for speech, pause_seconds in utterances:
+            silence = bytes(int(pause_seconds * SAMPLING_RATE) * SAMPLES_WIDTH)
+            for audio, is_speech in ((speech, True), (silence, False)):
+                for offset in range(0, len(audio), frame_bytes):
+                    await websocket.send(audio[offset:offset + frame_bytes])
+                    next_send += frame_seconds
+                    jitter = rng.expovariate(1000 / args.jitter_ms) if args.jitter_ms > 0 else 0.0
+                    await asyncio.sleep(max(0.0, next_send - time.monotonic()) + jitter)
+                if is_speech:
+                    ends.append(time.monotonic())
+
+        # Wait for the last transcriptions before disconnecting
+        deadline = time.monotonic() + args.timeout_seconds
+        while len(received) < len(ends) and time.monotonic() < deadline and not receiver.done():
+            await asyncio.sleep(0.05)
+        receiver.cancel()
+    return ends, received, errors
+
+def match_latencies(ends, received, timeout):
+    """
+    Pairs every utterance end with the first transcription received after it and not used by an
+    earlier utterance. Returns the latencies and the number of utterances without a transcription.
+    """
+    latencies, dropped, position = [], 0, 0
+    received = sorted(received)
+    for end in ends:
+        while position < len(received) and received[position] < end:
+            position += 1
+        if position < len(received) and received[position] - end <= timeout:
+            latencies.append(received[position] - end)
+            position += 1
+        else:
+            dropped += 1
+    return latencies, dropped
+
+def create_pipelines(args):
+    if args.backend == "fake":
+        return FakeVAD(args.vad_base_ms, args.vad_ms_per_second), FakeASR(args.asr_base_ms, args.asr_rtf)
+    return (model_registry.get_vad_pipeline(args.vad_type, **json.loads(args.vad_args)),
+            model_registry.get_asr_pipeline(args.asr_type, **json.loads(args.asr_args)))
+
+def counter_total(counter):
+    return sum(counter.snapshot().values())
+
+async def run(args):
+    pattern = PATTERNS[args.pattern]
+    phrases = await load_phrases(args.audio_dir)
+    vad_pipeline, asr_pipeline = create_pipelines(args)
+    executor = InferenceExecutor(**json.loads(args.executor_args))
+    server = Server(vad_pipeline, asr_pipeline, host='127.0.0.1', port=args.port, executor=executor)
+    await server.start()
+
+    config = {"language": "english", "processing_strategy": args.processing_strategy, "processing_args": json.loads(args.processing_args)}
+    rng = random.Random(args.seed)
+    plans = [(plan_utterances(rng, phrases, pattern, args.utterances), random.Random(rng.random())) for _ in range(args.clients)]
+    overloads_before = counter_total(OVERLOAD_EVENTS)
+    discarded_before = counter_total(CHUNKS_DISCARDED)
+    dropped_bytes_before = counter_total(BYTES_DROPPED)
+
+    monitor = LoopLagMonitor(interval_seconds=0.02)
+    monitor.start()
+    start = time.monotonic()
+    uri = f"ws://127.0.0.1:{args.port}"
+    results = await asyncio.gather(*[
+        simulate_client(uri, utterances, pattern, args, config, args.ramp_up_seconds * i / max(1, args.clients), client_rng)
+        for i, (utterances, client_rng) in enumerate(plans)
+    ], return_exceptions=True)
+    wall_seconds = time.monotonic() - start
+    monitor.stop()
+    await server.shutdown()
+    executor.shutdown()
+
+    latencies, dropped, errors, failed_clients = [], 0, [], 0
+    for result in results:
+        if isinstance(result, Exception):
+            failed_clients += 1
+            errors.append(f"{type(result).__name__}: {result}")
+            continue
+        ends, received, client_errors = result
+        client_latencies, client_dropped = match_latencies(ends, received, args.timeout_seconds)
+        latencies.extend(client_latencies)
+        dropped += client_dropped
+        errors.extend(client_errors)
+
+    audio_seconds = sum(len(speech) / (SAMPLING_RATE * SAMPLES_WIDTH) + pause for utterances, _ in plans for speech, pause in utterances)
+    return {
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "port")},
+        "wall_seconds": wall_seconds,
+        "audio_seconds": audio_seconds,
+        "utterances": args.clients * args.utterances,
+        "transcribed_utterances": len(latencies),
+        "dropped_utterances": dropped,
+        "failed_clients": failed_clients,
+        "errors": errors[:10],
+        "end_of_speech_to_text_latency": percentiles(latencies),
+        "throughput": {
+            "transcriptions_per_second": len(latencies) / wall_seconds,
+            "audio_seconds_per_second": audio_seconds / wall_seconds,
+        },
+        "overload_events": counter_total(OVERLOAD_EVENTS) - overloads_before,
+        "discarded_chunks": counter_total(CHUNKS_DISCARDED) - discarded_before,
+        "dropped_audio_bytes": counter_total(BYTES_DROPPED) - dropped_bytes_before,
+        "event_loop_lag": percentiles(list(monitor.lags)),
+        "executor": executor.get_metrics(),
+    }
+
+def main():
+    args = parse_args()
+    # The server logs connections to stdout, keep it for the results
+    with contextlib.redirect_stdout(sys.stderr):
+        results = asyncio.run(run(args))
+    print(json.dumps(results, indent=2, sort_keys=True))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+if __name__ == "__main__":
+    main()
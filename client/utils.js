@@ -49,6 +49,20 @@ function updateTranscription(transcript_data) {
     const transcriptionDiv = document.getElementById('transcription');
     const languageDiv = document.getElementById('detected_language');
 
+    // A partial hypothesis replaces the previous one until a final result arrives
+    let partialSpan = document.getElementById('partial_transcription');
+    if (partialSpan) {
+        partialSpan.remove();
+    }
+    if (transcript_data['type'] === 'partial') {
+        partialSpan = document.createElement('span');
+        partialSpan.id = 'partial_transcription';
+        partialSpan.style.color = 'gray';
+        partialSpan.textContent = transcript_data['text'];
+        transcriptionDiv.appendChild(partialSpan);
+        return;
+    }
+
     if (transcript_data['words'] && transcript_data['words'].length > 0) {
         // Append words with color based on their probability
         transcript_data['words'].forEach(wordData => {
@@ -138,6 +152,10 @@ function sendAudioConfig() {
             chunk_length_seconds: parseFloat(document.getElementById('chunk_length_seconds').value),
             chunk_offset_seconds: parseFloat(document.getElementById('chunk_offset_seconds').value)
         };
+    } else if (selectedStrategy === 'partial_transcription' || selectedStrategy === 'local_agreement') {
+        processingArgs = {
+            chunk_offset_seconds: parseFloat(document.getElementById('chunk_offset_seconds').value)
+        };
     }
 
     const audioConfig = {
@@ -146,6 +164,8 @@ function sendAudioConfig() {
             sampleRate: context.sampleRate,
             bufferSize: bufferSize,
             channels: 1, // Assuming mono channel
+            sample_rate: context.sampleRate,
+            sample_format: 'float32',
             language: language,
             processing_strategy: selectedStrategy, 
             processing_args: processingArgs
@@ -155,49 +175,13 @@ function sendAudioConfig() {
     websocket.send(JSON.stringify(audioConfig));
 }
 
-function downsampleBuffer(buffer, inputSampleRate, outputSampleRate) {
-    if (inputSampleRate === outputSampleRate) {
-        return buffer;
-    }
-    var sampleRateRatio = inputSampleRate / outputSampleRate;
-    var newLength = Math.round(buffer.length / sampleRateRatio);
-    var result = new Float32Array(newLength);
-    var offsetResult = 0;
-    var offsetBuffer = 0;
-    while (offsetResult < result.length) {
-        var nextOffsetBuffer = Math.round((offsetResult + 1) * sampleRateRatio);
-        var accum = 0, count = 0;
-        for (var i = offsetBuffer; i < nextOffsetBuffer && i < buffer.length; i++) {
-            accum += buffer[i];
-            count++;
-        }
-        result[offsetResult] = accum / count;
-        offsetResult++;
-        offsetBuffer = nextOffsetBuffer;
-    }
-    return result;
-}
-
 function processAudio(e) {
-    const inputSampleRate = context.sampleRate;
-    const outputSampleRate = 16000; // Target sample rate
+    // Sent as captured: the server resamples to 16 kHz, see sample_rate in sendAudioConfig
+    const audioData = e.inputBuffer.getChannelData(0).slice();
 
-    const left = e.inputBuffer.getChannelData(0);
-    const downsampledBuffer = downsampleBuffer(left, inputSampleRate, outputSampleRate);
-    const audioData = convertFloat32ToInt16(downsampledBuffer);
-    
     if (websocket && websocket.readyState === WebSocket.OPEN) {
-        websocket.send(audioData);
-    }
-}
-
-function convertFloat32ToInt16(buffer) {
-    let l = buffer.length;
-    const buf = new Int16Array(l);
-    while (l--) {
-        buf[l] = Math.min(1, buffer[l]) * 0x7FFF;
+        websocket.send(audioData.buffer);
     }
-    return buf.buffer;
 }
 
 // Initialize WebSocket on page load
@@ -1,12 +1,27 @@
-from .whisper_asr import WhisperASR
-from .faster_whisper_asr import FasterWhisperASR
+from .batching_scheduler import BatchingScheduler
+from .transcription_cache import TranscriptionCache
 
 class ASRFactory:
     @staticmethod
     def create_asr_pipeline(type, **kwargs):
+        batching_args = kwargs.pop('batching', None)
+        cache_args = kwargs.pop('cache', None)
+        asr_pipeline = ASRFactory._create_backend(type, **kwargs)
+        if batching_args is not None:
+            asr_pipeline = BatchingScheduler(asr_pipeline, **batching_args)
+        if cache_args is not None:
+            # In front of the batching, so that cache hits do not wait for a batch
+            asr_pipeline = TranscriptionCache(asr_pipeline, **cache_args)
+        return asr_pipeline
+
+    @staticmethod
+    def _create_backend(type, **kwargs):
+        # Backends are imported lazily so that only the selected one's dependencies are needed
         if type == "whisper":
+            from .whisper_asr import WhisperASR
             return WhisperASR(**kwargs)
         if type == "faster_whisper":
+            from .faster_whisper_asr import FasterWhisperASR
             return FasterWhisperASR(**kwargs)
         else:
             raise ValueError(f"Unknown ASR pipeline type: {type}")
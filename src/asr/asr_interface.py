@@ -1,4 +1,7 @@
 class ASRInterface:
+    # InferenceExecutor the blocking model calls run on, None means the event loop's default pool
+    executor = None
+
     async def transcribe(self, client):
         """
         Transcribe the given audio data.
@@ -7,3 +10,24 @@ class ASRInterface:
         :return: The transcription structure, see for example the faster_whisper_asr.py file.
         """
         raise NotImplementedError("This method should be implemented by subclasses.")
+
+    def effective_language(self, client):
+        """
+        Returns the language the client's scratch buffer would be transcribed in.
+
+        :param client: The client object.
+        :return: The language passed to the model, None if the model detects it.
+        """
+        return client.config['language']
+
+    async def transcribe_batch(self, clients):
+        """
+        Transcribe the audio of several clients in one go.
+
+        Implementations that can run a batched inference should override this; the default
+        transcribes each client in turn.
+
+        :param clients: The client objects whose scratch buffers should be transcribed
+        :return: A list with one transcription structure per client, in the same order.
+        """
+        return [await self.transcribe(client) for client in clients]
@@ -0,0 +1,103 @@
+import asyncio
+
+from .asr_interface import ASRInterface
+
+class BatchingScheduler(ASRInterface):
+    """
+    Dynamic batching in front of an ASR backend.
+
+    Transcription requests coming from many clients are collected for at most
+    `max_wait_ms` (or until `max_batch_size` requests are waiting) and then run
+    as one `transcribe_batch` call on the backend. Every caller awaits its own
+    result, so each buffering strategy still answers on its own websocket.
+
+    Attributes:
+        backend (ASRInterface): The ASR pipeline doing the actual inference.
+        max_batch_size (int): Maximum number of clients transcribed in one batch.
+        max_wait_ms (float): Maximum time the first request of a batch waits for others to join.
+        batch_sizes (dict): Histogram of executed batch sizes, size -> count.
+    """
+
+    def __init__(self, backend, max_batch_size=8, max_wait_ms=20):
+        self.backend = backend
+        self.max_batch_size = int(max_batch_size)
+        self.max_wait_ms = float(max_wait_ms)
+        self.batch_sizes = {}
+        self._pending = []
+        self._timer = None
+        self._running = set()
+
+    @property
+    def executor(self):
+        return self.backend.executor
+
+    @executor.setter
+    def executor(self, executor):
+        self.backend.executor = executor
+
+    @property
+    def model_name(self):
+        return getattr(self.backend, 'model_name', type(self.backend).__name__)
+
+    def effective_language(self, client):
+        return self.backend.effective_language(client)
+
+    async def transcribe(self, client):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((client, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+
+        return await future
+
+    async def transcribe_batch(self, clients):
+        return await asyncio.gather(*[self.transcribe(client) for client in clients])
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            # Requests whose caller went away (e.g. disconnected client) are not worth decoding
+            batch = [(client, future) for client, future in batch if not future.done()]
+            if batch:
+                task = asyncio.ensure_future(self._run_batch(batch))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+    async def _run_batch(self, batch):
+        self.batch_sizes[len(batch)] = self.batch_sizes.get(len(batch), 0) + 1
+        try:
+            results = await self.backend.transcribe_batch([client for client, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def get_metrics(self):
+        """
+        Returns the batching knobs and the histogram of executed batch sizes.
+        """
+        batches = sum(self.batch_sizes.values())
+        requests = sum(size * count for size, count in self.batch_sizes.items())
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "batches": batches,
+            "requests": requests,
+            "average_batch_size": requests / batches if batches else 0.0,
+            "batch_sizes": dict(self.batch_sizes),
+            "waiting": len(self._pending),
+        }
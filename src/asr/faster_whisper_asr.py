@@ -1,8 +1,12 @@
+import asyncio
 import os
+
+import ctranslate2
 from faster_whisper import WhisperModel
 
 from .asr_interface import ASRInterface
-from src.audio_utils import save_audio_to_file
+from src.audio_utils import save_audio_to_file, pcm16_to_float32
+from src.inference_executor import run_inference
 
 language_codes = {
     "afrikaans": "af",
@@ -110,18 +114,108 @@ language_codes = {
 
 class FasterWhisperASR(ASRInterface):
     def __init__(self, **kwargs):
+        """
+        Loads the faster-whisper model.
+
+        Args:
+            model_size (str): Whisper model size or path (default 'large-v3').
+            device (str): 'cuda', 'cpu' or 'auto' (default, CUDA when a GPU is visible).
+            compute_type (str): CTranslate2 compute type, defaults to 'float16' on CUDA and the
+                quantized 'int8' on CPU.
+            cpu_threads (int): Threads per model worker on CPU, 0 (default) splits the cores evenly
+                between the workers.
+            num_workers (int): Number of transcriptions the model can run in parallel, each needs
+                its own inference executor thread.
+            device_index (int or list): GPU(s) to use.
+            sticky_language (bool): Once the language of a client has been detected confidently, transcribe
+                its later chunks in that language instead of running detection again (default True).
+            language_min_probability (float): Detection probability needed to stick to a language (default 0.8).
+            language_redetect_seconds (float): Age after which the language is detected again (default 300).
+            language_min_word_probability (float): Mean word probability below which a sticky language is
+                considered wrong and detected again on the next chunk (default 0.4).
+        """
         model_size = kwargs.get('model_size', "large-v3")
-        # Run on GPU with FP16
-        self.asr_pipeline = WhisperModel(model_size, device="cuda", compute_type="float16")
+        self.model_name = model_size
+        # Debug/recording mode: write every chunk to a WAV file and transcribe from disk
+        self.save_audio_files = kwargs.get('save_audio_files', False)
+
+        self.device = kwargs.get('device', "auto")
+        if self.device == "auto":
+            self.device = "cuda" if ctranslate2.get_cuda_device_count() > 0 else "cpu"
+        self.compute_type = kwargs.get('compute_type', "float16" if self.device == "cuda" else "int8")
+        self.num_workers = int(kwargs.get('num_workers', 1))
+        self.cpu_threads = int(kwargs.get('cpu_threads', 0))
+        if self.cpu_threads == 0 and self.device == "cpu":
+            self.cpu_threads = max(1, (os.cpu_count() or 1) // self.num_workers)
+
+        self.sticky_language = kwargs.get('sticky_language', True)
+        self.language_min_probability = float(kwargs.get('language_min_probability', 0.8))
+        self.language_redetect_seconds = float(kwargs.get('language_redetect_seconds', 300))
+        self.language_min_word_probability = float(kwargs.get('language_min_word_probability', 0.4))
+
+        self.asr_pipeline = WhisperModel(model_size, device=self.device, device_index=kwargs.get('device_index', 0),
+                                         compute_type=self.compute_type, cpu_threads=self.cpu_threads,
+                                         num_workers=self.num_workers)
 
     async def transcribe(self, client):
-        file_path = await save_audio_to_file(client.scratch_buffer, client.get_file_name())
+        audio, language, prompt = await self._prepare(client)
+        result = await run_inference(self.executor, "asr", self._transcribe, audio, language, prompt)
+        self._update_language_state(client, result)
+        return result
+
+    async def transcribe_batch(self, clients):
+        # faster-whisper cannot decode independent audios in one batch: the clients are run as
+        # concurrent executor jobs instead, which the model's num_workers decode in parallel
+        return list(await asyncio.gather(*[self.transcribe(client) for client in clients]))
 
-        language = None if client.config['language'] is None else language_codes.get(client.config['language'].lower())
-        segments, info = self.asr_pipeline.transcribe(file_path, word_timestamps=True, language=language)
+    async def _prepare(self, client):
+        if self.save_audio_files:
+            audio = await save_audio_to_file(client.scratch_buffer, client.get_file_name(), sampling_rate=client.sampling_rate, samples_width=client.samples_width)
+        else:
+            audio = pcm16_to_float32(client.scratch_buffer)
+
+        return audio, self.effective_language(client), client.prompt
+
+    def effective_language(self, client):
+        """
+        Returns the language the client configured, or else its sticky detected language.
+        """
+        language = self._configured_language(client)
+        if language is None and self.sticky_language:
+            language = client.language_state.current(self.language_redetect_seconds)
+        return language
+
+    @staticmethod
+    def _configured_language(client):
+        state = client.language_state
+        if client.config['language'] != state.configured_language:
+            state.configured_language = client.config['language']
+            state.configured_code = None if state.configured_language is None else language_codes.get(state.configured_language.lower())
+        return state.configured_code
+
+    def _update_language_state(self, client, result):
+        """
+        Remembers a confidently detected language, or forgets a sticky language the transcription
+        does not seem to be in.
+        """
+        if not self.sticky_language or self._configured_language(client) is not None:
+            return
+        state = client.language_state
+        if state.language is None:
+            state.update(result['language'], result['language_probability'], self.language_min_probability)
+        elif result['words']:
+            mean_probability = sum(w['probability'] for w in result['words']) / len(result['words'])
+            if mean_probability < self.language_min_word_probability:
+                state.reset()
+
+    def _transcribe(self, audio, language, prompt=None):
+        """
+        Runs the model on a file path or a 16 kHz float32 numpy array, conditioned on the
+        preceding text if a prompt is given.
+        """
+        segments, info = self.asr_pipeline.transcribe(audio, word_timestamps=True, language=language, initial_prompt=prompt)
 
         segments = list(segments)  # The transcription will actually run here.
-        os.remove(file_path)
 
         flattened_words = [word for segment in segments for word in segment.words]
 
@@ -135,4 +229,3 @@ class FasterWhisperASR(ASRInterface):
             ]
         }
         return to_return
-
@@ -0,0 +1,48 @@
+import time
+
+class LanguageState:
+    """
+    Per-client language state of the ASR.
+
+    A session is almost always in a single language, so once the ASR detected it confidently,
+    later chunks are transcribed in that language without running detection again.
+
+    Attributes:
+        language (str): Language code detected for the client, None if none was detected confidently.
+        probability (float): Probability the ASR gave to the detected language.
+        detected_at (float): time.monotonic() of the detection.
+        configured_language (str): Last language name the client configured.
+        configured_code (str): Language code of `configured_language`, resolved once.
+    """
+    def __init__(self):
+        self.configured_language = None
+        self.configured_code = None
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets the detected language, so that the next chunk runs detection again.
+        """
+        self.language = None
+        self.probability = None
+        self.detected_at = None
+
+    def current(self, max_age_seconds=None):
+        """
+        Returns the detected language, or None if there is none or it is older than max_age_seconds.
+        """
+        if self.language is None:
+            return None
+        if max_age_seconds is not None and time.monotonic() - self.detected_at > max_age_seconds:
+            self.reset()
+            return None
+        return self.language
+
+    def update(self, language, probability, min_probability):
+        """
+        Records a detection if its probability is at least min_probability.
+        """
+        if language is not None and probability is not None and probability >= min_probability:
+            self.language = language
+            self.probability = probability
+            self.detected_at = time.monotonic()
@@ -0,0 +1,150 @@
+import asyncio
+import copy
+import hashlib
+import json
+import time
+from collections import OrderedDict
+
+from .asr_interface import ASRInterface
+from src.metrics import ASR_CACHE_HITS, ASR_CACHE_MISSES
+
+class TranscriptionCache(ASRInterface):
+    """
+    LRU/TTL cache of transcriptions in front of an ASR backend.
+
+    Entries are keyed by a BLAKE2b digest of the PCM in the client's scratch buffer together with
+    the language, the prompt and the model, so repeated audio (IVR prompts, hold messages, replayed
+    recordings) is answered without decoding it again. Identical requests arriving while the first
+    one is still being transcribed wait for its result instead of decoding the audio in parallel.
+
+    Attributes:
+        backend (ASRInterface): The ASR pipeline transcribing cache misses.
+        max_entries (int): Maximum number of cached transcriptions.
+        max_bytes (int): Maximum total size of the cached transcriptions, measured as JSON.
+        ttl_seconds (float): Time after which an entry expires, None to keep entries until evicted.
+        size_bytes (int): Current total size of the cached transcriptions.
+        hits (int): Number of transcriptions answered from the cache.
+        misses (int): Number of transcriptions run on the backend.
+    """
+
+    def __init__(self, backend, max_entries=1024, max_bytes=16 * 1024 * 1024, ttl_seconds=3600):
+        self.backend = backend
+        self.max_entries = int(max_entries)
+        self.max_bytes = int(max_bytes)
+        self.ttl_seconds = None if ttl_seconds is None else float(ttl_seconds)
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        # key -> (expires_at, size in bytes, transcription), least recently used first
+        self._entries = OrderedDict()
+        self._in_flight = {}
+
+    @property
+    def executor(self):
+        return self.backend.executor
+
+    @executor.setter
+    def executor(self, executor):
+        self.backend.executor = executor
+
+    @property
+    def model_name(self):
+        return getattr(self.backend, 'model_name', type(self.backend).__name__)
+
+    def effective_language(self, client):
+        return self.backend.effective_language(client)
+
+    def key(self, client):
+        """
+        Returns the cache key of the client's current scratch buffer, with the language the
+        backend would transcribe it in (e.g. a sticky detected language), not just the configured one.
+        """
+        digest = hashlib.blake2b(client.scratch_buffer, digest_size=16)
+        for part in (self.effective_language(client), client.prompt, self.model_name, client.sampling_rate):
+            digest.update(b"\0" + str(part).encode())
+        return digest.hexdigest()
+
+    async def transcribe(self, client):
+        key = self.key(client)
+        transcription = self._get(key)
+        if transcription is not None:
+            self.hits += 1
+            ASR_CACHE_HITS.inc()
+            return transcription
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            # Unlike awaiting it, waiting does not cancel the shared future if this caller is cancelled
+            await asyncio.wait({in_flight})
+            if not in_flight.cancelled():
+                self.hits += 1
+                ASR_CACHE_HITS.inc()
+                return copy.deepcopy(in_flight.result())
+            # The caller decoding it was cancelled (e.g. its client disconnected), decode it here
+            return await self.transcribe(client)
+
+        self.misses += 1
+        ASR_CACHE_MISSES.inc()
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            transcription = await self.backend.transcribe(client)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody may be waiting for it
+            future.exception()
+            raise
+        else:
+            future.set_result(transcription)
+            self._put(key, transcription)
+        finally:
+            del self._in_flight[key]
+        return copy.deepcopy(transcription)
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, size, transcription = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        # Callers annotate the results they get, never hand out the cached object itself
+        return copy.deepcopy(transcription)
+
+    def _put(self, key, transcription):
+        size = len(json.dumps(transcription))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        expires_at = None if self.ttl_seconds is None else time.monotonic() + self.ttl_seconds
+        self._entries[key] = (expires_at, size, copy.deepcopy(transcription))
+        self.size_bytes += size
+        while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.size_bytes -= size
+
+    def clear(self):
+        self._entries.clear()
+        self.size_bytes = 0
+
+    def get_metrics(self):
+        """
+        Returns the cache's hit/miss counters and occupancy.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "size_bytes": self.size_bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+        }
@@ -1,27 +1,65 @@
 from transformers import pipeline
 from .asr_interface import ASRInterface
-from src.audio_utils import save_audio_to_file
-import os
+from src.audio_utils import save_audio_to_file, pcm16_to_float32
+from src.inference_executor import run_inference
 
 class WhisperASR(ASRInterface):
     def __init__(self, **kwargs):
         model_name = kwargs.get('model_name', "openai/whisper-large-v3")
+        self.model_name = model_name
+        # Debug/recording mode: write every chunk to a WAV file and transcribe from disk
+        self.save_audio_files = kwargs.get('save_audio_files', False)
         self.asr_pipeline = pipeline("automatic-speech-recognition", model=model_name)
 
     async def transcribe(self, client):
-        file_path = await save_audio_to_file(client.scratch_buffer, client.get_file_name())
-        
-        if client.config['language'] is not None:
-            to_return = self.asr_pipeline(file_path, generate_kwargs={"language": client.config['language']})['text']
-        else:
-            to_return = self.asr_pipeline(file_path)['text']
+        audio = await self._prepare(client)
+        return await run_inference(self.executor, "asr", self._transcribe, audio, client.config['language'], client.prompt)
 
-        os.remove(file_path)
+    async def transcribe_batch(self, clients):
+        audios = [await self._prepare(client) for client in clients]
+        languages = [client.config['language'] for client in clients]
+        prompts = [client.prompt for client in clients]
+        return await run_inference(self.executor, "asr", self._transcribe_batch, audios, languages, prompts)
 
-        to_return = {
+    async def _prepare(self, client):
+        if self.save_audio_files:
+            return await save_audio_to_file(client.scratch_buffer, client.get_file_name(), sampling_rate=client.sampling_rate, samples_width=client.samples_width)
+        return {"raw": pcm16_to_float32(client.scratch_buffer), "sampling_rate": client.sampling_rate}
+
+    def _transcribe_batch(self, audios, languages, prompts):
+        """
+        Runs one batched pipeline call per distinct language and prompt in the batch.
+        """
+        results = [None] * len(audios)
+        keys = list(zip(languages, prompts))
+        for key in set(keys):
+            indices = [i for i, k in enumerate(keys) if k == key]
+            inputs = [audios[i] for i in indices]
+            outputs = self.asr_pipeline(inputs, batch_size=len(inputs), generate_kwargs=self._generate_kwargs(*key))
+            for i, output in zip(indices, outputs):
+                results[i] = self._to_result(output['text'])
+        return results
+
+    def _transcribe(self, audio, language, prompt=None):
+        """
+        Runs the pipeline on a file path or a {"raw": float32 array, "sampling_rate": int} mapping.
+        """
+        to_return = self.asr_pipeline(audio, generate_kwargs=self._generate_kwargs(language, prompt))['text']
+
+        return self._to_result(to_return)
+
+    def _generate_kwargs(self, language, prompt):
+        generate_kwargs = {}
+        if language is not None:
+            generate_kwargs["language"] = language
+        if prompt:
+            generate_kwargs["prompt_ids"] = self.asr_pipeline.tokenizer.get_prompt_ids(prompt, return_tensors="pt")
+        return generate_kwargs
+
+    def _to_result(self, text):
+        return {
             "language": "UNSUPPORTED_BY_HUGGINGFACE_WHISPER",
             "language_probability": None,
-            "text": to_return.strip(),
+            "text": text.strip(),
             "words": "UNSUPPORTED_BY_HUGGINGFACE_WHISPER"
         }
-        return to_return
@@ -1,7 +1,13 @@
 import wave
 import os
+from bisect import bisect_left, bisect_right
+from math import gcd
 
-async def save_audio_to_file(audio_data, file_name, audio_dir="audio_files", audio_format="wav"):
+import numpy as np
+
+from src.tracing import tracer
+
+async def save_audio_to_file(audio_data, file_name, audio_dir="audio_files", audio_format="wav", sampling_rate=16000, samples_width=2):
     """
     Saves the audio data to a file.
 
@@ -10,6 +16,8 @@ async def save_audio_to_file(audio_data, file_name, audio_dir="audio_files", aud
     :param file_counters: Dictionary to keep track of file counts for each client.
     :param audio_dir: Directory where audio files will be saved.
     :param audio_format: Format of the audio file.
+    :param sampling_rate: The sampling rate of the audio data in Hz.
+    :param samples_width: The width of each audio sample in bytes.
     :return: Path to the saved audio file.
     """
 
@@ -17,10 +25,271 @@ async def save_audio_to_file(audio_data, file_name, audio_dir="audio_files", aud
     
     file_path = os.path.join(audio_dir, file_name)
 
-    with wave.open(file_path, 'wb') as wav_file:
-        wav_file.setnchannels(1)  # Assuming mono audio
-        wav_file.setsampwidth(2)
-        wav_file.setframerate(16000)
-        wav_file.writeframes(audio_data)
+    with tracer.span("save_audio_to_file", bytes=len(audio_data)):
+        with wave.open(file_path, 'wb') as wav_file:
+            wav_file.setnchannels(1)  # Assuming mono audio
+            wav_file.setsampwidth(samples_width)
+            wav_file.setframerate(sampling_rate)
+            wav_file.writeframes(audio_data)
 
     return file_path
+
+def load_wav_mmap(file_path):
+    """
+    Memory-maps the samples of a PCM WAV file instead of reading them into memory.
+
+    :param file_path: Path to a WAV file with 16-bit integer or 32-bit float samples.
+    :return: A tuple (samples, sampling_rate, channels, sample_format): a read-only numpy memmap of the
+        interleaved samples, and 'int16' or 'float32'.
+    """
+    with open(file_path, 'rb') as f:
+        header = f.read(12)
+        if len(header) < 12 or header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+            raise ValueError(f"Not a WAV file: {file_path}")
+        fmt = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                raise ValueError(f"No data chunk in {file_path}")
+            chunk_id, size = chunk[:4], int.from_bytes(chunk[4:], 'little')
+            if chunk_id == b'fmt ':
+                fmt = f.read(size)
+            elif chunk_id == b'data':
+                offset = f.tell()
+                break
+            else:
+                f.seek(size, os.SEEK_CUR)
+            # Chunks are padded to an even size
+            f.seek(size % 2, os.SEEK_CUR)
+
+    if fmt is None:
+        raise ValueError(f"No fmt chunk before the data in {file_path}")
+    format_tag = int.from_bytes(fmt[0:2], 'little')
+    channels = int.from_bytes(fmt[2:4], 'little')
+    sampling_rate = int.from_bytes(fmt[4:8], 'little')
+    bits = int.from_bytes(fmt[14:16], 'little')
+    if format_tag == 0xFFFE and len(fmt) >= 26:
+        # WAVE_FORMAT_EXTENSIBLE, the actual format is the start of the sub-format GUID
+        format_tag = int.from_bytes(fmt[24:26], 'little')
+    if (format_tag, bits) == (1, 16):
+        sample_format, dtype = 'int16', np.dtype('<i2')
+    elif (format_tag, bits) == (3, 32):
+        sample_format, dtype = 'float32', np.dtype('<f4')
+    else:
+        raise ValueError(f"Unsupported WAV format {format_tag} with {bits} bits in {file_path}")
+
+    data_size = min(size, os.path.getsize(file_path) - offset)
+    count = data_size // (dtype.itemsize * channels) * channels
+    if count == 0:
+        return np.zeros(0, dtype=dtype), sampling_rate, channels, sample_format
+    samples = np.memmap(file_path, dtype=dtype, mode='r', offset=offset, shape=(count,))
+    return samples, sampling_rate, channels, sample_format
+
+def pcm16_to_float32(audio_data):
+    """
+    Converts raw 16-bit PCM audio into a normalized float32 array.
+
+    The bytes are viewed in place as int16 (no intermediate copy); the only
+    allocation is the float32 output, which is what the models consume.
+
+    :param audio_data: A bytes-like object (bytes, bytearray, memoryview) with little-endian int16 samples.
+    :return: A 1-D numpy float32 array with values in [-1.0, 1.0).
+    """
+    samples = np.frombuffer(audio_data, dtype=np.int16, count=len(audio_data) // 2)
+    audio = samples.astype(np.float32)
+    audio *= 1.0 / 32768.0
+    return audio
+
+def pack_speech_regions(audio_data, regions, padding_seconds, sampling_rate=16000, samples_width=2):
+    """
+    Concatenates the speech regions of PCM audio, dropping the silence before, between and after them.
+
+    Each region is widened by padding_seconds on both sides, and regions that then overlap are merged,
+    so a word cut short by the VAD keeps its edges and pauses shorter than twice the padding are kept.
+
+    :param audio_data: A bytes-like object with the PCM audio.
+    :param regions: (start, end) tuples in seconds, in ascending order.
+    :param padding_seconds: Audio kept around each region, in seconds.
+    :param sampling_rate: The sampling rate of the audio data in Hz.
+    :param samples_width: The width of each audio sample in bytes.
+    :return: A tuple (packed, offsets): the packed PCM bytes and, for every packed region, a tuple
+        (packed_start, original_start, duration) in seconds, to pass to unpack_word_times.
+    """
+    data = memoryview(audio_data).cast('B')
+    total_samples = len(data) // samples_width
+    spans = []
+    for start, end in regions:
+        first = max(0, int((start - padding_seconds) * sampling_rate))
+        last = min(total_samples, int(np.ceil((end + padding_seconds) * sampling_rate)))
+        if last <= first:
+            continue
+        if spans and first <= spans[-1][1]:
+            spans[-1][1] = max(spans[-1][1], last)
+        else:
+            spans.append([first, last])
+
+    offsets = []
+    position = 0
+    for first, last in spans:
+        offsets.append((position / sampling_rate, first / sampling_rate, (last - first) / sampling_rate))
+        position += last - first
+    packed = b"".join(data[first * samples_width:last * samples_width] for first, last in spans)
+    return packed, offsets
+
+def unpack_word_times(words, offsets):
+    """
+    Maps the word times of a transcription of packed audio back to the timeline of the original audio.
+
+    A time on the boundary of two packed regions is the end of the first one for a word end and the
+    start of the second one for a word start.
+
+    :param words: Word dicts with 'start' and 'end' times in seconds of the packed audio.
+    :param offsets: The offsets returned by pack_speech_regions.
+    :return: Copies of the word dicts with their times in seconds of the original audio.
+    """
+    if not offsets:
+        return [dict(word) for word in words]
+    packed_starts = [packed_start for packed_start, _, _ in offsets]
+
+    def to_original(time, is_end):
+        index = (bisect_left if is_end else bisect_right)(packed_starts, time) - 1
+        packed_start, original_start, duration = offsets[max(0, index)]
+        return original_start + min(max(time - packed_start, 0.0), duration)
+
+    return [dict(word, start=to_original(word['start'], False), end=to_original(word['end'], True)) for word in words]
+
+def downmix(samples, channels):
+    """
+    Averages interleaved multi-channel samples into mono.
+
+    :param samples: A 1-D numpy array of interleaved samples, a whole number of frames long.
+    :param channels: The number of interleaved channels.
+    :return: A 1-D float32 numpy array with one sample per frame.
+    """
+    if channels == 1:
+        return samples.astype(np.float32, copy=False)
+    return samples.reshape(-1, channels).mean(axis=1, dtype=np.float32)
+
+class PolyphaseResampler:
+    """
+    Streaming rational-ratio resampler.
+
+    The signal is conceptually upsampled by L, low-pass filtered with a Kaiser-windowed sinc
+    and downsampled by M, where L/M is the reduced ratio of the output and input rates. Only the
+    filter phases that produce output samples are ever evaluated, all output samples of a call at
+    once as one vectorized product. The last input samples are kept between calls, so a stream
+    cut into arbitrary pieces is resampled exactly like the whole signal, and the filter delay is
+    compensated so that output sample n corresponds to time n / output_rate.
+
+    Attributes:
+        input_rate (int): The sampling rate of the input in Hz.
+        output_rate (int): The sampling rate of the output in Hz.
+        up (int): The upsampling factor L.
+        down (int): The downsampling factor M.
+    """
+
+    def __init__(self, input_rate, output_rate, zero_crossings=8, kaiser_beta=8.0):
+        """
+        Args:
+            input_rate (int): The sampling rate of the input in Hz.
+            output_rate (int): The sampling rate of the output in Hz.
+            zero_crossings (int): Zero crossings of the sinc on each side, more gives a sharper filter.
+            kaiser_beta (float): Shape of the Kaiser window, more gives a stronger stopband attenuation.
+        """
+        if input_rate <= 0 or output_rate <= 0:
+            raise ValueError(f"Invalid sampling rates: {input_rate} -> {output_rate}")
+        self.input_rate = int(input_rate)
+        self.output_rate = int(output_rate)
+        divisor = gcd(self.input_rate, self.output_rate)
+        self.up = self.output_rate // divisor
+        self.down = self.input_rate // divisor
+
+        # Low-pass at the lower of the two Nyquist frequencies, in cycles per upsampled sample
+        step = max(self.up, self.down)
+        half_length = zero_crossings * step
+        n = np.arange(-half_length, half_length + 1)
+        h = np.sinc(n / step) / step * np.kaiser(len(n), kaiser_beta) * self.up
+        self.delay = half_length
+
+        # phases[p, j] multiplies the input sample j steps before the newest one for phase p
+        taps = -(-len(h) // self.up)
+        h = np.concatenate([h, np.zeros(taps * self.up - len(h))])
+        self.phases = h.reshape(taps, self.up).T[:, ::-1].astype(np.float32)
+        self.taps = taps
+
+        self._history = np.zeros(taps - 1, dtype=np.float32)
+        self._received = 0
+        self._produced = 0
+
+    def process(self, samples):
+        """
+        Resamples the next piece of the stream.
+
+        :param samples: A 1-D numpy float32 array with the next input samples.
+        :return: A 1-D numpy float32 array with every output sample the input received so far allows.
+        """
+        if self.up == self.down:
+            return samples.astype(np.float32, copy=False)
+
+        extended = np.concatenate([self._history, samples.astype(np.float32, copy=False)])
+        first_index = self._received - (self.taps - 1)
+        self._received += len(samples)
+
+        # Output n needs the input at (n * M + delay) // L, which must have been received
+        last = (self._received * self.up - self.delay - 1) // self.down
+        outputs = np.arange(self._produced, max(self._produced, last + 1), dtype=np.int64)
+        positions = outputs * self.down + self.delay
+        indices = positions // self.up - first_index
+        phases = positions % self.up
+
+        windows = np.lib.stride_tricks.sliding_window_view(extended, self.taps)
+        result = np.einsum('ij,ij->i', windows[indices - (self.taps - 1)], self.phases[phases])
+
+        self._produced += len(outputs)
+        self._history = extended[len(extended) - (self.taps - 1):].copy() if self.taps > 1 else extended[:0].copy()
+        return result.astype(np.float32, copy=False)
+
+class InputConverter:
+    """
+    Converts a client's declared audio format into the server's 16-bit mono PCM in one pass:
+    parses int16 or float32 samples, downmixes interleaved channels and resamples.
+
+    Messages do not need to hold whole frames; incomplete trailing frames are kept for the next one.
+
+    Attributes:
+        sample_rate (int): The sampling rate of the client's audio in Hz.
+        sample_format (str): 'int16' or 'float32', little-endian.
+        channels (int): The number of interleaved channels of the client's audio.
+        output_rate (int): The server's sampling rate in Hz.
+    """
+
+    SAMPLE_FORMATS = {'int16': np.dtype('<i2'), 'float32': np.dtype('<f4')}
+
+    def __init__(self, sample_rate, sample_format, channels, output_rate):
+        if sample_format not in self.SAMPLE_FORMATS:
+            raise ValueError(f"Unknown sample format: {sample_format}, supported: {', '.join(self.SAMPLE_FORMATS)}")
+        if int(channels) < 1:
+            raise ValueError(f"Invalid channel count: {channels}")
+        self.sample_rate = int(sample_rate)
+        self.sample_format = sample_format
+        self.channels = int(channels)
+        self.output_rate = int(output_rate)
+        self.dtype = self.SAMPLE_FORMATS[sample_format]
+        self.frame_bytes = self.dtype.itemsize * self.channels
+        self.resampler = PolyphaseResampler(self.sample_rate, self.output_rate)
+        self._remainder = b""
+
+    def convert(self, data):
+        """
+        Converts the next message and returns 16-bit mono PCM bytes at the output rate.
+        """
+        if self._remainder:
+            data = self._remainder + bytes(data)
+        usable = len(data) - len(data) % self.frame_bytes
+        self._remainder = bytes(data[usable:])
+
+        samples = np.frombuffer(data, dtype=self.dtype, count=usable // self.dtype.itemsize)
+        if self.sample_format == 'int16':
+            samples = samples.astype(np.float32) * (1.0 / 32768.0)
+        audio = self.resampler.process(downmix(samples, self.channels))
+        return (np.clip(audio, -1.0, 32767 / 32768) * 32768.0).astype(np.int16).tobytes()
@@ -0,0 +1,303 @@
+"""
+Offline transcription of recorded audio files with the server's VAD and ASR pipelines.
+
+Usage:
+    python -m src.batch <directory> --output transcriptions.jsonl
+
+Every WAV file under the directory is memory-mapped, run through VAD as a whole, and its speech
+segments are transcribed in batches packed across files. One JSON line per file is written as
+soon as all of its segments are transcribed, and a summary with the aggregate real-time factor is
+printed at the end.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import time
+
+from src.audio_utils import load_wav_mmap, pcm16_to_float32, InputConverter
+from src.client import Client
+from src.inference_executor import InferenceExecutor
+from src.model_registry import model_registry
+from src.worker_pool import WorkerPool, WorkerVADProxy, WorkerASRProxy
+
+SAMPLING_RATE = 16000
+SAMPLES_WIDTH = 2
+# CPU cores given to each worker process when --workers is not set
+CORES_PER_WORKER = 4
+
+def default_workers():
+    """
+    Returns the number of worker processes that uses every core, CORES_PER_WORKER cores each.
+    """
+    return max(1, (os.cpu_count() or 1) // CORES_PER_WORKER)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="VoiceStreamAI batch mode: transcribe every WAV file of a directory")
+    parser.add_argument("directory", type=str, help="Directory searched recursively for WAV files")
+    parser.add_argument("--output", type=str, default="transcriptions.jsonl", help="JSONL file the transcriptions are written to")
+    parser.add_argument("--vad-type", type=str, default="pyannote", help="Type of VAD pipeline to use (e.g., 'pyannote')")
+    parser.add_argument("--vad-args", type=str, default='{"auth_token": "huggingface_token"}', help="JSON string of additional arguments for VAD pipeline")
+    parser.add_argument("--asr-type", type=str, default="faster_whisper", help="Type of ASR pipeline to use (e.g., 'whisper')")
+    parser.add_argument("--asr-args", type=str, default='{"model_size": "large-v3"}', help="JSON string of additional arguments for ASR pipeline")
+    parser.add_argument("--executor-args", type=str, default='{"kind": "thread", "max_workers": 1, "max_queue_size": 64}', help="JSON string of arguments for the inference executor the VAD and ASR models run on")
+    parser.add_argument("--workers", type=int, default=None, help=f"Number of worker processes, each loading its own models; 0 runs the models in this process (default: one per {CORES_PER_WORKER} CPU cores)")
+    parser.add_argument("--language", type=str, default=None, help="Language of the recordings, detected per segment if not set")
+    parser.add_argument("--batch-size", type=int, default=8, help="Maximum number of speech segments transcribed in one ASR call")
+    parser.add_argument("--max-segment-seconds", type=float, default=30, help="Speech segments are merged up to, and split at, this length")
+    parser.add_argument("--merge-gap-seconds", type=float, default=0.5, help="Speech segments separated by shorter pauses are transcribed together")
+    parser.add_argument("--vad-window-seconds", type=float, default=60, help="Length of the windows a file is run through VAD in, bounding the memory used per file")
+    return parser.parse_args()
+
+def load_pcm(file_path):
+    """
+    Returns the file's audio as 16 kHz 16-bit mono PCM and its duration in seconds.
+
+    Files already in that format are not read into memory: the PCM is a view of the memory map.
+    """
+    samples, sampling_rate, channels, sample_format = load_wav_mmap(file_path)
+    if (sampling_rate, channels, sample_format) == (SAMPLING_RATE, 1, 'int16'):
+        pcm = memoryview(samples).cast('B')
+    else:
+        pcm = InputConverter(sampling_rate, sample_format, channels, SAMPLING_RATE).convert(memoryview(samples).cast('B'))
+    return pcm, len(samples) / channels / sampling_rate
+
+def pack_segments(vad_results, max_segment_seconds, merge_gap_seconds):
+    """
+    Merges speech segments separated by short pauses and splits long ones, so that each ASR
+    input is at most max_segment_seconds long.
+
+    Returns:
+        list: (start, end) tuples in seconds.
+    """
+    packed = []
+    for segment in vad_results:
+        start, end = segment['start'], segment['end']
+        if packed and start - packed[-1][1] < merge_gap_seconds and end - packed[-1][0] <= max_segment_seconds:
+            packed[-1] = (packed[-1][0], end)
+            continue
+        while end - start > max_segment_seconds:
+            packed.append((start, start + max_segment_seconds))
+            start += max_segment_seconds
+        packed.append((start, end))
+    return packed
+
+class BatchTranscriber:
+    """
+    Runs VAD over whole files and transcribes their speech segments in batches packed across files.
+
+    Files go through VAD concurrently, one window of `vad_window_seconds` at a time so that
+    only a window is converted to float32; their segments are queued, and ASR tasks take up to
+    `batch_size` queued segments at a time, whichever files they come from, for one
+    `transcribe_batch` call. The bounded queue keeps VAD from running far ahead of ASR.
+    A failed batch only fails the files it has segments of.
+
+    Attributes:
+        vad_pipeline: The voice activity detection pipeline.
+        asr_pipeline: The automatic speech recognition pipeline.
+        batch_size (int): Maximum number of segments per ASR call.
+        concurrency (int): Number of files in VAD and of ASR batches in flight at once.
+        vad_window_seconds (float): Length of the windows a file is run through VAD in.
+        stats (dict): Aggregate counters of the run.
+    """
+
+    def __init__(self, vad_pipeline, asr_pipeline, output, batch_size=8, concurrency=1, language=None,
+                 max_segment_seconds=30, merge_gap_seconds=0.5, worker_pool=None, vad_window_seconds=60):
+        self.vad_pipeline = vad_pipeline
+        self.asr_pipeline = asr_pipeline
+        self.output = output
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.language = language
+        self.max_segment_seconds = max_segment_seconds
+        self.merge_gap_seconds = merge_gap_seconds
+        self.worker_pool = worker_pool
+        self.vad_window_seconds = vad_window_seconds
+        self.stats = {"files": 0, "failed_files": 0, "segments": 0, "audio_seconds": 0.0, "speech_seconds": 0.0}
+        self._queue = asyncio.Queue(maxsize=batch_size * concurrency * 2)
+        self._files = {}
+
+    async def run(self, file_paths, root):
+        start = time.time()
+        asr_tasks = [asyncio.create_task(self._transcribe_segments()) for _ in range(self.concurrency)]
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def detect(file_path):
+            async with semaphore:
+                await self._detect_file(file_path, os.path.relpath(file_path, root))
+
+        await asyncio.gather(*[detect(file_path) for file_path in file_paths])
+        for _ in asr_tasks:
+            await self._queue.put(None)
+        await asyncio.gather(*asr_tasks)
+
+        wall_seconds = time.time() - start
+        return dict(self.stats, wall_seconds=wall_seconds,
+                    real_time_factor=wall_seconds / self.stats["audio_seconds"] if self.stats["audio_seconds"] else None)
+
+    async def _detect_file(self, file_path, name):
+        try:
+            pcm, duration = load_pcm(file_path)
+            vad_results = await self._detect_windows(pcm)
+        except Exception as e:
+            self._write({"file": name, "error": f"{type(e).__name__}: {e}"})
+            self.stats["failed_files"] += 1
+            return
+
+        segments = pack_segments(vad_results, self.max_segment_seconds, self.merge_gap_seconds)
+        self.stats["audio_seconds"] += duration
+        self.stats["segments"] += len(segments)
+        self.stats["speech_seconds"] += sum(end - start for start, end in segments)
+        result = {"file": name, "duration": duration, "segments": [None] * len(segments)}
+        if not segments:
+            self._finish(result)
+            return
+
+        self._files[name] = {"result": result, "pending": len(segments), "errors": []}
+        for index, (start, end) in enumerate(segments):
+            first_byte = int(start * SAMPLING_RATE) * SAMPLES_WIDTH
+            last_byte = int(end * SAMPLING_RATE) * SAMPLES_WIDTH
+            await self._queue.put((name, index, start, end, pcm[first_byte:last_byte]))
+
+    async def _detect_windows(self, pcm):
+        """
+        Runs VAD over the PCM one window at a time, returning the segments on the file's timeline.
+        Speech cut at a window boundary gives two adjacent segments, which pack_segments merges.
+        """
+        window_bytes = int(self.vad_window_seconds * SAMPLING_RATE) * SAMPLES_WIDTH
+        vad_results = []
+        for first_byte in range(0, len(pcm), window_bytes):
+            offset = first_byte / (SAMPLING_RATE * SAMPLES_WIDTH)
+            window = pcm16_to_float32(pcm[first_byte:first_byte + window_bytes])
+            for segment in await self.vad_pipeline.detect_audio_activity(window, SAMPLING_RATE):
+                vad_results.append(dict(segment, start=segment['start'] + offset, end=segment['end'] + offset))
+        return vad_results
+
+    async def _transcribe_segments(self):
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                item = self._queue.get_nowait()
+                if item is None:
+                    # Leave the end marker for this task's next loop
+                    self._queue.put_nowait(None)
+                    break
+                batch.append(item)
+            try:
+                await self._transcribe_batch(batch)
+            except Exception as e:
+                # This task must keep consuming the queue, or the VAD side blocks on it forever
+                self._fail_files({name for name, *_ in batch}, e)
+
+    def _fail_files(self, names, error):
+        for name in names:
+            state = self._files.pop(name, None)
+            if state is not None:
+                state["result"]["error"] = f"{type(error).__name__}: {error}"
+                self.stats["failed_files"] += 1
+                self._finish(state["result"])
+
+    async def _transcribe_batch(self, batch):
+        clients = []
+        for name, index, start, end, pcm in batch:
+            client = Client(f"{name}#{index}", SAMPLING_RATE, SAMPLES_WIDTH, max_buffer_seconds=end - start + 1)
+            client.config['language'] = self.language
+            client.scratch_buffer = pcm
+            clients.append(client)
+
+        try:
+            transcriptions = await self.asr_pipeline.transcribe_batch(clients)
+        except Exception as e:
+            transcriptions = [e] * len(batch)
+        finally:
+            if self.worker_pool is not None:
+                for client in clients:
+                    self.worker_pool.release(client.client_id)
+
+        for (name, index, start, end, _), transcription in zip(batch, transcriptions):
+            state = self._files.get(name)
+            if state is None:
+                # The file already failed in another batch
+                continue
+            if isinstance(transcription, Exception):
+                state["errors"].append(f"{type(transcription).__name__}: {transcription}")
+            else:
+                state["result"]["segments"][index] = self._segment_result(start, end, transcription)
+            state["pending"] -= 1
+            if state["pending"] == 0:
+                del self._files[name]
+                if state["errors"]:
+                    state["result"]["error"] = state["errors"][0]
+                    self.stats["failed_files"] += 1
+                self._finish(state["result"])
+
+    @staticmethod
+    def _segment_result(start, end, transcription):
+        words = transcription.get('words')
+        if isinstance(words, list):
+            # Word times are relative to the segment, make them relative to the file
+            words = [dict(w, start=w['start'] + start, end=w['end'] + start) for w in words]
+        return {"start": start, "end": end, "text": transcription['text'], "language": transcription.get('language'), "words": words}
+
+    def _finish(self, result):
+        self.stats["files"] += 1
+        self._write(result)
+
+    def _write(self, result):
+        self.output.write(json.dumps(result) + "\n")
+        self.output.flush()
+
+def main():
+    args = parse_args()
+
+    try:
+        vad_args = json.loads(args.vad_args)
+        asr_args = json.loads(args.asr_args)
+        executor_args = json.loads(args.executor_args)
+    except json.JSONDecodeError as e:
+        print(f"Error parsing JSON arguments: {e}")
+        return
+
+    file_paths = sorted(glob.glob(os.path.join(args.directory, "**", "*.wav"), recursive=True))
+    if not file_paths:
+        print(f"No WAV files found in {args.directory}")
+        return
+
+    workers = default_workers() if args.workers is None else args.workers
+    worker_pool = None
+    if workers > 0:
+        # A worker holds each segment in one client buffer, which must fit the longest segment
+        worker_pool = WorkerPool(workers, args.vad_type, vad_args, args.asr_type, asr_args,
+                                 max_buffer_seconds=args.max_segment_seconds + 1, warmup_seconds=0)
+        worker_pool.start()
+        vad_pipeline = WorkerVADProxy(worker_pool)
+        asr_pipeline = WorkerASRProxy(worker_pool)
+        concurrency = 2 * workers
+    else:
+        vad_pipeline = model_registry.get_vad_pipeline(args.vad_type, **vad_args)
+        asr_pipeline = model_registry.get_asr_pipeline(args.asr_type, **asr_args)
+        executor = InferenceExecutor(**executor_args)
+        vad_pipeline.executor = executor
+        asr_pipeline.executor = executor
+        concurrency = executor.max_workers
+        model_registry.report()
+
+    try:
+        with open(args.output, "w") as output:
+            transcriber = BatchTranscriber(vad_pipeline, asr_pipeline, output, batch_size=args.batch_size, concurrency=concurrency,
+                                           language=args.language, max_segment_seconds=args.max_segment_seconds,
+                                           merge_gap_seconds=args.merge_gap_seconds, worker_pool=worker_pool,
+                                           vad_window_seconds=args.vad_window_seconds)
+            summary = asyncio.run(transcriber.run(file_paths, args.directory))
+    finally:
+        if worker_pool is not None:
+            worker_pool.shutdown()
+
+    print(json.dumps(summary))
+
+if __name__ == "__main__":
+    main()
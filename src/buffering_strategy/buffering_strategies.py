@@ -1,10 +1,28 @@
 import os
-import asyncio
-import json
 import time
 
+import numpy as np
+
 from .buffering_strategy_interface import BufferingStrategyInterface
+from .buffering_strategy_registry import register_buffering_strategy
+from src.tracing import tracer
+from src.metrics import VAD_LATENCY, ASR_LATENCY, REAL_TIME_FACTOR, AUDIO_TO_TEXT_LAG, CHUNKS_PROCESSED, CHUNKS_DISCARDED, OVERLOAD_EVENTS, BYTES_DROPPED, SPECULATIVE_TRANSCRIPTIONS, model_label
+from src.audio_utils import pcm16_to_float32, pack_speech_regions, unpack_word_times
+
+OVERLOAD_POLICIES = ('coalesce', 'drop_oldest', 'backpressure')
+
+class _PackedSpeech:
+    """
+    Stands in for a client towards the ASR, with the client's packed speech as scratch buffer.
+    """
+    def __init__(self, client, scratch_buffer):
+        self._client = client
+        self.scratch_buffer = scratch_buffer
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
 
+@register_buffering_strategy("silence_at_end_of_chunk")
 class SilenceAtEndOfChunk(BufferingStrategyInterface):
     """
     A buffering strategy that processes audio at the end of each chunk with silence detection.
@@ -16,6 +34,21 @@ class SilenceAtEndOfChunk(BufferingStrategyInterface):
         client (Client): The client instance associated with this buffering strategy.
         chunk_length_seconds (float): Length of each audio chunk in seconds.
         chunk_offset_seconds (float): Offset time in seconds to be considered for processing audio chunks.
+        vad_mode (str): 'full' re-runs VAD over the whole scratch buffer on every chunk, 'incremental'
+            only scores newly arrived audio and follows the speech start/end events of the client's VAD state.
+        overload_policy (str): What to do when a chunk is ready while the previous one is still being processed:
+            'coalesce' keeps the audio so it joins the next chunk, 'drop_oldest' keeps only the newest chunk
+            of audio, 'backpressure' coalesces and tells the client to slow down.
+        error_if_not_realtime (bool): Close the connection of a client that cannot be served in real time.
+        pipelined_asr (bool): Start transcribing a chunk that ends quietly while the VAD is still deciding
+            whether the speech has ended. The result is used if it has and discarded otherwise, so the VAD
+            latency is hidden behind decoding when the inference executor has a spare worker.
+        speculation_threshold_db (float): Level in dBFS separating speech from silence when deciding whether a
+            chunk ends quietly after some speech, None to start a speculative transcription on every chunk.
+        pack_speech (bool): Only send the speech regions found by the VAD to the ASR, packed together, instead of
+            the whole scratch buffer with its leading silence and pauses. Word times are mapped back to the scratch
+            buffer timeline. Speculative transcriptions still decode the whole chunk since they start before the VAD.
+        speech_padding_seconds (float): Audio kept around each speech region when packing.
     """
 
     def __init__(self, client, **kwargs):
@@ -24,7 +57,9 @@ class SilenceAtEndOfChunk(BufferingStrategyInterface):
 
         Args:
             client (Client): The client instance associated with this buffering strategy.
-            **kwargs: Additional keyword arguments, including 'chunk_length_seconds' and 'chunk_offset_seconds'.
+            **kwargs: Additional keyword arguments, including 'chunk_length_seconds', 'chunk_offset_seconds', 'vad_mode',
+                'overload_policy', 'error_if_not_realtime', 'pipelined_asr', 'speculation_threshold_db', 'pack_speech'
+                and 'speech_padding_seconds'.
         """
         self.client = client
 
@@ -41,8 +76,41 @@ class SilenceAtEndOfChunk(BufferingStrategyInterface):
         self.error_if_not_realtime = os.environ.get('ERROR_IF_NOT_REALTIME')
         if not self.error_if_not_realtime:
             self.error_if_not_realtime = kwargs.get('error_if_not_realtime', False)
+        if isinstance(self.error_if_not_realtime, str):
+            self.error_if_not_realtime = self.error_if_not_realtime.lower() in ('1', 'true', 'yes')
+
+        self.overload_policy = os.environ.get('BUFFERING_OVERLOAD_POLICY')
+        if not self.overload_policy:
+            self.overload_policy = kwargs.get('overload_policy', 'coalesce')
+        if self.overload_policy not in OVERLOAD_POLICIES:
+            raise ValueError(f"Unknown overload policy: {self.overload_policy}")
+
+        self.vad_mode = os.environ.get('BUFFERING_VAD_MODE')
+        if not self.vad_mode:
+            self.vad_mode = kwargs.get('vad_mode', 'full')
+        if self.vad_mode not in ('full', 'incremental'):
+            raise ValueError(f"Unknown VAD mode: {self.vad_mode}")
+
+        self.pipelined_asr = os.environ.get('BUFFERING_PIPELINED_ASR')
+        if not self.pipelined_asr:
+            self.pipelined_asr = kwargs.get('pipelined_asr', False)
+        if isinstance(self.pipelined_asr, str):
+            self.pipelined_asr = self.pipelined_asr.lower() in ('1', 'true', 'yes')
+        self.speculation_threshold_db = kwargs.get('speculation_threshold_db', -40)
+        if self.speculation_threshold_db is not None:
+            self.speculation_threshold_db = float(self.speculation_threshold_db)
+
+        self.pack_speech = os.environ.get('BUFFERING_PACK_SPEECH')
+        if not self.pack_speech:
+            self.pack_speech = kwargs.get('pack_speech', False)
+        if isinstance(self.pack_speech, str):
+            self.pack_speech = self.pack_speech.lower() in ('1', 'true', 'yes')
+        self.speech_padding_seconds = float(kwargs.get('speech_padding_seconds', 0.2))
         
         self.processing_flag = False
+        self.backpressure_sent = False
+        self.closing = False
+        self.tasks = set()
 
     def process_audio(self, websocket, vad_pipeline, asr_pipeline):
         """
@@ -59,15 +127,62 @@ class SilenceAtEndOfChunk(BufferingStrategyInterface):
         chunk_length_in_bytes = self.chunk_length_seconds * self.client.sampling_rate * self.client.samples_width
         if len(self.client.buffer) > chunk_length_in_bytes:
             if self.processing_flag:
-                exit("Error in realtime processing: tried processing a new chunk while the previous one was still being processed")
+                self.handle_overload(websocket, chunk_length_in_bytes)
+                return
 
-            self.client.scratch_buffer += self.client.buffer
-            self.client.buffer.clear()
+            with tracer.span("move_buffer_to_scratch", bytes=len(self.client.buffer)):
+                self.client.move_buffer_to_scratch()
             self.processing_flag = True
+            self.backpressure_sent = False
             # Schedule the processing in a separate task
-            asyncio.create_task(self.process_audio_async(websocket, vad_pipeline, asr_pipeline))
+            self._create_task(self.process_audio_async(websocket, vad_pipeline, asr_pipeline))
+
+    def handle_overload(self, websocket, chunk_length_in_bytes):
+        """
+        Apply the overload policy to a chunk that is ready while the previous one is still being processed.
+
+        Args:
+            websocket (Websocket): The WebSocket connection of the client.
+            chunk_length_in_bytes (float): Length of a chunk in bytes.
+        """
+        OVERLOAD_EVENTS.inc(policy=self.overload_policy)
+        if self.error_if_not_realtime:
+            if self.closing:
+                return
+            self.closing = True
+            message = "Error in realtime processing: tried processing a new chunk while the previous one was still being processed"
+            self._create_task(self._close_with_error(websocket, message))
+            return
+
+        if self.overload_policy == 'drop_oldest':
+            BYTES_DROPPED.inc(self.client.drop_buffer_head(int(chunk_length_in_bytes)))
+        elif self.overload_policy == 'backpressure' and not self.backpressure_sent:
+            self.backpressure_sent = True
+            buffered_seconds = len(self.client.buffer) / (self.client.sampling_rate * self.client.samples_width)
+            self._create_task(websocket.send(self.client.encode_message({"type": "backpressure", "data": {"buffered_seconds": buffered_seconds}})))
+
+    async def _close_with_error(self, websocket, message):
+        await websocket.send(self.client.encode_message({"type": "error", "data": message}))
+        await websocket.close(code=1013, reason="not realtime")
+
+    def flush(self, websocket, vad_pipeline, asr_pipeline):
+        """
+        Transcribe everything held for the client as soon as possible, even if the speech
+        has not ended. Silence is still discarded by the VAD.
+
+        Args:
+            websocket (Websocket): The WebSocket connection for sending transcriptions.
+            vad_pipeline: The voice activity detection pipeline.
+            asr_pipeline: The automatic speech recognition pipeline.
+        """
+        if self.processing_flag:
+            return
+
+        self.client.move_buffer_to_scratch()
+        self.processing_flag = True
+        self._create_task(self.process_audio_async(websocket, vad_pipeline, asr_pipeline, force=True))
     
-    async def process_audio_async(self, websocket, vad_pipeline, asr_pipeline):
+    async def process_audio_async(self, websocket, vad_pipeline, asr_pipeline, force=False):
         """
         Asynchronously process audio for activity detection and transcription.
 
@@ -78,25 +193,489 @@ class SilenceAtEndOfChunk(BufferingStrategyInterface):
             websocket (Websocket): The WebSocket connection for sending transcriptions.
             vad_pipeline: The voice activity detection pipeline.
             asr_pipeline: The automatic speech recognition pipeline.
+            force (bool): Transcribe any detected speech even if it has not ended yet.
         """   
-        start = time.time()
-        vad_results = await vad_pipeline.detect_activity(self.client)
+        with tracer.span("process_audio_async", track="processing", force=force, bytes=len(self.client.scratch_buffer)):
+            speculation = None
+            try:
+                start = time.time()
+                CHUNKS_PROCESSED.inc()
+                if self.pipelined_asr and (force or self._ends_quietly()):
+                    # The scratch buffer does not change until this coroutine clears it, so it can be decoded meanwhile
+                    speculation = self._create_task(self._transcribe_speculatively(asr_pipeline))
+                with tracer.span("vad", mode=self.vad_mode):
+                    if self.vad_mode == 'incremental':
+                        await vad_pipeline.detect_activity_incremental(self.client, self.chunk_offset_seconds)
+                        vad_state = self.client.vad_state
+                        has_speech = vad_state.speech_start is not None
+                        speech_ended = has_speech and not vad_state.in_speech
+                        # The incremental VAD only keeps the bounds of the speech, not the pauses within it
+                        speech_regions = []
+                        if has_speech:
+                            speech_end = vad_state.last_speech_end if speech_ended else len(self.client.scratch_buffer) / (self.client.sampling_rate * self.client.samples_width)
+                            speech_regions.append((vad_state.speech_start, speech_end))
+                    else:
+                        vad_results = await vad_pipeline.detect_activity(self.client)
+                        has_speech = len(vad_results) > 0
+                        last_segment_should_end_before = ((len(self.client.scratch_buffer) / (self.client.sampling_rate * self.client.samples_width)) - self.chunk_offset_seconds)
+                        speech_ended = has_speech and vad_results[-1]['end'] < last_segment_should_end_before
+                        speech_regions = [(segment['start'], segment['end']) for segment in vad_results]
+                VAD_LATENCY.observe(time.time() - start)
+
+                if not has_speech:
+                    CHUNKS_DISCARDED.inc()
+                    self._discard_speculation(speculation)
+                    # Only the analysed audio is discarded, audio coalesced meanwhile has not been looked at yet
+                    self.client.clear_scratch_buffer()
+                    self.client.vad_state.reset()
+                    return
+
+                if speech_ended or force:
+                    asr_start = time.time()
+                    audio_seconds = len(self.client.scratch_buffer) / (self.client.sampling_rate * self.client.samples_width)
+                    if speculation is not None:
+                        # Started together with the VAD
+                        asr_start = start
+                        transcription = await speculation
+                        SPECULATIVE_TRANSCRIPTIONS.inc(outcome="committed")
+                    elif self.pack_speech:
+                        with tracer.span("pack_speech", regions=len(speech_regions)):
+                            packed, offsets = pack_speech_regions(self.client.scratch_buffer, speech_regions, self.speech_padding_seconds,
+                                                                  self.client.sampling_rate, self.client.samples_width)
+                        audio_seconds = len(packed) / (self.client.sampling_rate * self.client.samples_width)
+                        with tracer.span("asr", audio_seconds=audio_seconds):
+                            transcription = await asr_pipeline.transcribe(_PackedSpeech(self.client, packed))
+                        if isinstance(transcription.get('words'), list):
+                            transcription['words'] = unpack_word_times(transcription['words'], offsets)
+                    else:
+                        with tracer.span("asr", audio_seconds=audio_seconds):
+                            transcription = await asr_pipeline.transcribe(self.client)
+                    end = time.time()
+                    model = model_label(asr_pipeline)
+                    ASR_LATENCY.observe(end - asr_start, model=model)
+                    if audio_seconds > 0:
+                        REAL_TIME_FACTOR.observe((end - asr_start) / audio_seconds, model=model)
+                    if transcription['text'] != '':
+                        transcription['processing_time'] = end - start
+                        with tracer.span("send"):
+                            await websocket.send(self.client.encode_message(transcription))
+                        if self.client.scratch_updated_at is not None:
+                            AUDIO_TO_TEXT_LAG.observe(time.monotonic() - self.client.scratch_updated_at)
+                    self.client.clear_scratch_buffer()
+                    self.client.vad_state.reset()
+                    self.client.increment_file_counter()
+                else:
+                    self._discard_speculation(speculation)
+            finally:
+                # Also after a failed VAD, ASR or send, or the next chunks would never be processed
+                self.processing_flag = False
+                if speculation is not None and not speculation.done():
+                    speculation.cancel()
+
+    def _ends_quietly(self):
+        """
+        Returns True when the scratch buffer has a 30 ms frame above `speculation_threshold_db` and
+        none in its last `chunk_offset_seconds`, i.e. when the VAD is likely to find speech that has ended.
+        """
+        if self.speculation_threshold_db is None:
+            return True
+        frame_length = int(0.03 * self.client.sampling_rate)
+        audio = pcm16_to_float32(self.client.scratch_buffer)
+        frames = audio[:len(audio) // frame_length * frame_length].reshape(-1, frame_length)
+        loud = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-10) >= self.speculation_threshold_db
+        tail_frames = int(np.ceil(self.chunk_offset_seconds * self.client.sampling_rate / frame_length))
+        return len(loud) > tail_frames and loud[:-tail_frames].any() and not loud[-tail_frames:].any()
+
+    async def _transcribe_speculatively(self, asr_pipeline):
+        with tracer.span("asr", track="speculative"):
+            return await asr_pipeline.transcribe(self.client)
+
+    def _discard_speculation(self, speculation):
+        if speculation is not None:
+            # A job still waiting for the executor never reaches the model
+            speculation.cancel()
+            SPECULATIVE_TRANSCRIPTIONS.inc(outcome="discarded")
+
+@register_buffering_strategy("partial_transcription")
+class PartialTranscription(BufferingStrategyInterface):
+    """
+    A buffering strategy that streams partial hypotheses while the client is speaking.
+
+    Every `partial_interval_seconds` of new audio, the incremental VAD scores the new frames and
+    the uncommitted audio of the current utterance is transcribed and sent as a "partial" result.
+    At the end of the speech the uncommitted audio is transcribed one last time and sent as a
+    "final" result. When the uncommitted audio grows beyond `max_window_seconds`, the words of the
+    latest hypothesis that end before its last `uncommitted_tail_seconds` are committed as a
+    "final" result and their audio is dropped, so each decode only covers a bounded sliding window.
+    Committed text is passed to the ASR as prompt, which keeps the decoding of the following
+    audio consistent with what has already been sent.
+
+    Attributes:
+        client (Client): The client instance associated with this buffering strategy.
+        partial_interval_seconds (float): Seconds of new audio between two partial hypotheses.
+        chunk_offset_seconds (float): Silence in seconds after which the speech is considered ended.
+        max_window_seconds (float): Longest uncommitted audio transcribed before its stable part is committed.
+        prompt_max_chars (int): Number of trailing characters of the committed text used as prompt.
+        committed_text (str): Text sent in "final" results so far.
+        hypothesis (list): Uncommitted words of the latest partial hypothesis, on the scratch buffer timeline.
+    """
 
-        if len(vad_results) == 0:
-            self.client.scratch_buffer.clear()
-            self.client.buffer.clear()
-            self.processing_flag = False
+    # Seconds at the end of a hypothesis that are never committed, words there may still change
+    uncommitted_tail_seconds = 2.0
+
+    def __init__(self, client, **kwargs):
+        """
+        Initialize the PartialTranscription buffering strategy.
+
+        Args:
+            client (Client): The client instance associated with this buffering strategy.
+            **kwargs: Additional keyword arguments, including 'partial_interval_seconds', 'chunk_offset_seconds',
+                'max_window_seconds' and 'prompt_max_chars'.
+        """
+        self.client = client
+
+        self.partial_interval_seconds = os.environ.get('BUFFERING_PARTIAL_INTERVAL_SECONDS')
+        if not self.partial_interval_seconds:
+            self.partial_interval_seconds = kwargs.get('partial_interval_seconds', 0.5)
+        self.partial_interval_seconds = float(self.partial_interval_seconds)
+
+        self.chunk_offset_seconds = os.environ.get('BUFFERING_CHUNK_OFFSET_SECONDS')
+        if not self.chunk_offset_seconds:
+            self.chunk_offset_seconds = kwargs.get('chunk_offset_seconds', 0.5)
+        self.chunk_offset_seconds = float(self.chunk_offset_seconds)
+
+        self.max_window_seconds = float(kwargs.get('max_window_seconds', 10))
+        if self.max_window_seconds <= self.uncommitted_tail_seconds:
+            raise ValueError(f"max_window_seconds must be longer than {self.uncommitted_tail_seconds} seconds")
+        self.prompt_max_chars = int(kwargs.get('prompt_max_chars', 200))
+
+        self.committed_text = ""
+        self.hypothesis = []
+        self.processing_flag = False
+        self.tasks = set()
+
+    def process_audio(self, websocket, vad_pipeline, asr_pipeline):
+        """
+        Schedules a partial transcription once enough new audio has arrived.
+
+        Audio arriving while the previous hypothesis is being decoded stays in the buffer and
+        joins the next one.
+
+        Args:
+            websocket (Websocket): The WebSocket connection for sending transcriptions.
+            vad_pipeline: The voice activity detection pipeline.
+            asr_pipeline: The automatic speech recognition pipeline.
+        """
+        interval_in_bytes = self.partial_interval_seconds * self.client.sampling_rate * self.client.samples_width
+        if len(self.client.buffer) >= interval_in_bytes and not self.processing_flag:
+            self.client.move_buffer_to_scratch()
+            self.processing_flag = True
+            self._create_task(self.process_audio_async(websocket, vad_pipeline, asr_pipeline))
+
+    def flush(self, websocket, vad_pipeline, asr_pipeline):
+        """
+        Transcribes everything held for the client as a final result, even if the speech has not ended.
+
+        Args:
+            websocket (Websocket): The WebSocket connection for sending transcriptions.
+            vad_pipeline: The voice activity detection pipeline.
+            asr_pipeline: The automatic speech recognition pipeline.
+        """
+        if self.processing_flag:
             return
 
-        last_segment_should_end_before = ((len(self.client.scratch_buffer) / (self.client.sampling_rate * self.client.samples_width)) - self.chunk_offset_seconds)
-        if vad_results[-1]['end'] < last_segment_should_end_before:
+        self.client.move_buffer_to_scratch()
+        self.processing_flag = True
+        self._create_task(self.process_audio_async(websocket, vad_pipeline, asr_pipeline, force=True))
+
+    async def process_audio_async(self, websocket, vad_pipeline, asr_pipeline, force=False):
+        """
+        Detects voice activity in the new audio and sends a partial or final transcription.
+
+        Args:
+            websocket (Websocket): The WebSocket connection for sending transcriptions.
+            vad_pipeline: The voice activity detection pipeline.
+            asr_pipeline: The automatic speech recognition pipeline.
+            force (bool): Send a final result even if the speech has not ended yet.
+        """
+        with tracer.span("process_audio_async", track="processing", force=force, bytes=len(self.client.scratch_buffer)):
+            try:
+                start = time.time()
+                CHUNKS_PROCESSED.inc()
+                with tracer.span("vad", mode="incremental"):
+                    await vad_pipeline.detect_activity_incremental(self.client, self.chunk_offset_seconds)
+                VAD_LATENCY.observe(time.time() - start)
+
+                state = self.client.vad_state
+                if state.speech_start is None:
+                    CHUNKS_DISCARDED.inc()
+                    self.client.clear_scratch_buffer()
+                    state.reset()
+                    self.hypothesis = []
+                    return
+
+                final = force or not state.in_speech
+                transcription = await self._transcribe(asr_pipeline, record_metrics=final)
+                transcription['processing_time'] = time.time() - start
+
+                if final:
+                    await self._send(websocket, "final", transcription)
+                    if self.client.scratch_updated_at is not None:
+                        AUDIO_TO_TEXT_LAG.observe(time.monotonic() - self.client.scratch_updated_at)
+                    self.client.clear_scratch_buffer()
+                    state.reset()
+                    self.client.increment_file_counter()
+                    self.hypothesis = []
+                    return
+
+                transcription = await self._commit(websocket, transcription)
+                words = transcription.get('words')
+                self.hypothesis = words if isinstance(words, list) else []
+                await self._send(websocket, "partial", transcription)
+            finally:
+                self.processing_flag = False
+
+    async def _transcribe(self, asr_pipeline, record_metrics):
+        self.client.prompt = self.committed_text[-self.prompt_max_chars:] or None
+        asr_start = time.time()
+        with tracer.span("asr", bytes=len(self.client.scratch_buffer)):
             transcription = await asr_pipeline.transcribe(self.client)
-            if transcription['text'] != '':
+        if record_metrics:
+            end = time.time()
+            audio_seconds = len(self.client.scratch_buffer) / (self.client.sampling_rate * self.client.samples_width)
+            model = model_label(asr_pipeline)
+            ASR_LATENCY.observe(end - asr_start, model=model)
+            if audio_seconds > 0:
+                REAL_TIME_FACTOR.observe((end - asr_start) / audio_seconds, model=model)
+        return transcription
+
+    async def _commit(self, websocket, transcription):
+        """
+        Decides which part of a partial hypothesis is committed. Once the uncommitted audio is longer
+        than `max_window_seconds`, the words ending before its last `uncommitted_tail_seconds` are.
+
+        Returns:
+            dict: The remaining, still uncommitted part of the hypothesis.
+        """
+        window_seconds = len(self.client.scratch_buffer) / (self.client.sampling_rate * self.client.samples_width)
+        if window_seconds <= self.max_window_seconds:
+            return transcription
+
+        words = transcription.get('words')
+        if not isinstance(words, list):
+            # Without word timestamps the whole window is committed
+            await self._send(websocket, "final", transcription)
+            self.client.drop_scratch_head(len(self.client.scratch_buffer))
+            return dict(transcription, text="", words=words)
+
+        count = 0
+        while count < len(words) and words[count]['end'] <= window_seconds - self.uncommitted_tail_seconds:
+            count += 1
+        return await self._commit_words(websocket, transcription, count)
+
+    async def _commit_words(self, websocket, transcription, count):
+        """
+        Sends the first `count` words of the hypothesis as a final result and drops their audio.
+
+        Returns:
+            dict: The remaining, still uncommitted part of the hypothesis.
+        """
+        words = transcription['words']
+        if count == 0:
+            return transcription
+        stable, tail = words[:count], words[count:]
+        committed = dict(transcription, text="".join(w['word'] for w in stable).strip(), words=stable)
+        await self._send(websocket, "final", committed)
+
+        cut_seconds = stable[-1]['end']
+        self.client.drop_scratch_head(int(cut_seconds * self.client.sampling_rate) * self.client.samples_width)
+        # Word times of the remaining hypothesis are relative to the new start of the scratch buffer
+        tail = [dict(w, start=max(0.0, w['start'] - cut_seconds), end=w['end'] - cut_seconds) for w in tail]
+        return dict(transcription, text="".join(w['word'] for w in tail).strip(), words=tail)
+
+    async def _send(self, websocket, type, transcription):
+        if transcription['text'] == '':
+            return
+        if type == "final":
+            self.committed_text = (self.committed_text + " " + transcription['text']).strip()
+        with tracer.span("send", type=type):
+            await websocket.send(self.client.encode_message(dict(transcription, type=type)))
+
+
+@register_buffering_strategy("local_agreement")
+class LocalAgreement(PartialTranscription):
+    """
+    A partial transcription strategy committing words as soon as two consecutive hypotheses agree on them.
+
+    After every partial hypothesis, the longest common prefix of its words and of the previous
+    hypothesis' uncommitted words is sent as a "final" result, and the audio up to the end of the
+    last agreed word is dropped from the scratch buffer. Each decode therefore only covers the short
+    unconfirmed tail instead of the whole utterance, which bounds per-chunk latency and memory.
+    When the hypotheses keep disagreeing, or the ASR returns no word timestamps, the bounded window
+    of PartialTranscription still applies.
+
+    Attributes:
+        Same as PartialTranscription.
+    """
+
+    async def _commit(self, websocket, transcription):
+        words = transcription.get('words')
+        if not isinstance(words, list):
+            return await super()._commit(websocket, transcription)
+
+        agreed = 0
+        for previous, current in zip(self.hypothesis, words):
+            if self._normalize(previous['word']) != self._normalize(current['word']):
+                break
+            agreed += 1
+        if agreed == 0:
+            return await super()._commit(websocket, transcription)
+        return await self._commit_words(websocket, transcription, agreed)
+
+    @staticmethod
+    def _normalize(word):
+        return word.strip().strip(".,!?;:\"'").lower()
+
+
+@register_buffering_strategy("fixed_interval")
+class FixedInterval(BufferingStrategyInterface):
+    """
+    A low-latency buffering strategy transcribing overlapping windows at a fixed interval.
+
+    Every `interval_seconds` of new audio, the last `window_seconds` of audio are transcribed,
+    without waiting for a pause in the speech. Consecutive windows overlap by
+    `window_seconds - interval_seconds`, so that words cut at a window's edge are decoded whole in
+    the next one. Each word is only sent by the window where its midpoint is furthest from the
+    edges: a window emits the words between the previous window's cut and the middle of its own
+    overlap with the next one. Without word timestamps the overlap is deduplicated on the text.
+
+    Attributes:
+        client (Client): The client instance associated with this buffering strategy.
+        interval_seconds (float): Seconds of new audio between two transcriptions.
+        window_seconds (float): Seconds of audio in each transcribed window.
+        emitted_until (float): Stream time in seconds up to which words have been sent.
+    """
+
+    def __init__(self, client, **kwargs):
+        """
+        Initialize the FixedInterval buffering strategy.
+
+        Args:
+            client (Client): The client instance associated with this buffering strategy.
+            **kwargs: Additional keyword arguments, including 'interval_seconds' and 'window_seconds'.
+        """
+        self.client = client
+        self.interval_seconds = float(kwargs.get('interval_seconds', 1.0))
+        self.window_seconds = float(kwargs.get('window_seconds', 3.0))
+        if self.window_seconds < self.interval_seconds:
+            raise ValueError("window_seconds must not be shorter than interval_seconds")
+
+        self.emitted_until = None
+        self.previous_text = ""
+        self.processing_flag = False
+        self.tasks = set()
+
+    def process_audio(self, websocket, vad_pipeline, asr_pipeline):
+        """
+        Schedules the transcription of the latest window once `interval_seconds` of new audio arrived.
+
+        Args:
+            websocket (Websocket): The WebSocket connection for sending transcriptions.
+            vad_pipeline: The voice activity detection pipeline.
+            asr_pipeline: The automatic speech recognition pipeline.
+        """
+        interval_in_bytes = self.interval_seconds * self.client.sampling_rate * self.client.samples_width
+        if len(self.client.buffer) >= interval_in_bytes and not self.processing_flag:
+            self._schedule(websocket, vad_pipeline, asr_pipeline, force=False)
+
+    def flush(self, websocket, vad_pipeline, asr_pipeline):
+        """
+        Transcribes the latest window right away and sends every word not sent yet.
+
+        Args:
+            websocket (Websocket): The WebSocket connection for sending transcriptions.
+            vad_pipeline: The voice activity detection pipeline.
+            asr_pipeline: The automatic speech recognition pipeline.
+        """
+        if not self.processing_flag:
+            self._schedule(websocket, vad_pipeline, asr_pipeline, force=True)
+
+    def _schedule(self, websocket, vad_pipeline, asr_pipeline, force):
+        self.client.move_buffer_to_scratch()
+        window_in_bytes = int(self.window_seconds * self.client.sampling_rate) * self.client.samples_width
+        self.client.drop_scratch_head(len(self.client.scratch_buffer) - window_in_bytes)
+        self.processing_flag = True
+        self._create_task(self.process_audio_async(websocket, vad_pipeline, asr_pipeline, force))
+
+    async def process_audio_async(self, websocket, vad_pipeline, asr_pipeline, force=False):
+        """
+        Transcribes the current window and sends the words it is responsible for.
+
+        The window is kept in the scratch buffer, its end overlaps with the next window.
+
+        Args:
+            websocket (Websocket): The WebSocket connection for sending transcriptions.
+            vad_pipeline: The voice activity detection pipeline.
+            asr_pipeline: The automatic speech recognition pipeline.
+            force (bool): Send every remaining word, up to the end of the window.
+        """
+        with tracer.span("process_audio_async", track="processing", force=force, bytes=len(self.client.scratch_buffer)):
+            try:
+                start = time.time()
+                CHUNKS_PROCESSED.inc()
+                bytes_per_second = self.client.sampling_rate * self.client.samples_width
+                window_start = self.client.audio.start / bytes_per_second
+                window_end = window_start + len(self.client.scratch_buffer) / bytes_per_second
+                emit_from = window_start if self.emitted_until is None else self.emitted_until
+                # Words in the second half of the overlap are left to the next window
+                overlap = self.window_seconds - self.interval_seconds
+                emit_until = window_end if force else max(emit_from, window_end - overlap / 2)
+
+                with tracer.span("vad", mode="full"):
+                    vad_results = await vad_pipeline.detect_activity(self.client)
+                VAD_LATENCY.observe(time.time() - start)
+                if len(vad_results) == 0:
+                    CHUNKS_DISCARDED.inc()
+                    self.emitted_until = emit_until
+                    self.previous_text = ""
+                    return
+
+                asr_start = time.time()
+                with tracer.span("asr", audio_seconds=window_end - window_start):
+                    transcription = await asr_pipeline.transcribe(self.client)
                 end = time.time()
-                transcription['processing_time'] = end - start
-                json_transcription = json.dumps(transcription) 
-                await websocket.send(json_transcription)
-            self.client.scratch_buffer.clear()
-            self.client.increment_file_counter()
-        
-        self.processing_flag = False
\ No newline at end of file
+                model = model_label(asr_pipeline)
+                ASR_LATENCY.observe(end - asr_start, model=model)
+                if window_end > window_start:
+                    REAL_TIME_FACTOR.observe((end - asr_start) / (window_end - window_start), model=model)
+
+                words = transcription.get('words')
+                if isinstance(words, list):
+                    words = [w for w in words if emit_from <= window_start + (w['start'] + w['end']) / 2 < emit_until]
+                    transcription = dict(transcription, text="".join(w['word'] for w in words).strip(), words=words)
+                else:
+                    text = transcription['text']
+                    transcription = dict(transcription, text=self._deduplicate(self.previous_text, text))
+                    self.previous_text = text
+                self.emitted_until = emit_until
+
+                if transcription['text'] != '':
+                    transcription['type'] = "final"
+                    transcription['processing_time'] = end - start
+                    with tracer.span("send"):
+                        await websocket.send(self.client.encode_message(transcription))
+                    if self.client.scratch_updated_at is not None:
+                        AUDIO_TO_TEXT_LAG.observe(time.monotonic() - self.client.scratch_updated_at)
+            finally:
+                self.processing_flag = False
+
+    @staticmethod
+    def _deduplicate(previous, current):
+        """
+        Removes from `current` the longest word sequence it starts with that `previous` ends with.
+        """
+        previous_words, current_words = previous.split(), current.split()
+        for length in range(min(len(previous_words), len(current_words)), 0, -1):
+            if previous_words[-length:] == current_words[:length]:
+                return " ".join(current_words[length:])
+        return current
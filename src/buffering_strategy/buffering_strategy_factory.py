@@ -1,4 +1,6 @@
-from .buffering_strategies import SilenceAtEndOfChunk
+# Imported for the strategies to register themselves
+from . import buffering_strategies
+from .buffering_strategy_registry import get_buffering_strategy_class, registered_strategies
 
 class BufferingStrategyFactory:
     """
@@ -18,11 +20,12 @@ class BufferingStrategyFactory:
         Creates an instance of a buffering strategy based on the specified type.
 
         This method acts as a factory for creating buffering strategy objects. It returns
-        an instance of the strategy corresponding to the given type. If the type is not
-        recognized, it raises a ValueError.
+        an instance of the strategy registered under the given type, see
+        `register_buffering_strategy`. If the type is not recognized, it raises a ValueError.
 
         Args:
-            type (str): The type of buffering strategy to create. Currently supports 'silence_at_end_of_chunk'.
+            type (str): The type of buffering strategy to create, e.g. 'silence_at_end_of_chunk',
+                'partial_transcription', 'local_agreement' or 'fixed_interval'.
             client (Client): The client instance to be associated with the buffering strategy.
             **kwargs: Additional keyword arguments specific to the buffering strategy being created.
 
@@ -35,7 +38,7 @@ class BufferingStrategyFactory:
         Example:
             strategy = BufferingStrategyFactory.create_buffering_strategy("silence_at_end_of_chunk", client)
         """
-        if type == "silence_at_end_of_chunk":
-            return SilenceAtEndOfChunk(client, **kwargs)
-        else:
-            raise ValueError(f"Unknown buffering strategy type: {type}")
+        strategy_class = get_buffering_strategy_class(type)
+        if strategy_class is None:
+            raise ValueError(f"Unknown buffering strategy type: {type}, available: {', '.join(sorted(registered_strategies))}")
+        return strategy_class(client, **kwargs)
@@ -1,3 +1,5 @@
+import asyncio
+
 class BufferingStrategyInterface:
     """
     An interface class for buffering strategies in audio processing systems.
@@ -8,9 +10,14 @@ class BufferingStrategyInterface:
 
     Subclasses should implement the methods defined in this interface to ensure
     consistency and compatibility with the system's audio processing framework.
+    They are made available to clients by decorating them with
+    `register_buffering_strategy`, and start their asyncio tasks with `_create_task`,
+    which keeps them in a `tasks` set: a strategy replaced mid-stream can finish its
+    work first, and the server cancels the work of a client that disconnected.
 
     Methods:
         process_audio: Process audio data. This method should be implemented by subclasses.
+        flush: Process all held audio right away. This method should be implemented by subclasses.
     """
 
     def process_audio(self, websocket, vad_pipeline, asr_pipeline):
@@ -29,3 +36,37 @@ class BufferingStrategyInterface:
             NotImplementedError: If the method is not implemented in the subclass.
         """
         raise NotImplementedError("This method should be implemented by subclasses.")
+
+    def flush(self, websocket, vad_pipeline, asr_pipeline):
+        """
+        Process all the audio held for the client right away, without waiting for the strategy's
+        usual trigger (e.g. a pause in the speech).
+
+        This is used when a client crosses its memory limits.
+
+        Args:
+            websocket (Websocket): The WebSocket connection for communication with clients.
+            vad_pipeline: The Voice Activity Detection (VAD) pipeline used for detecting speech in the audio.
+            asr_pipeline: The Automatic Speech Recognition (ASR) pipeline used for transcribing speech in the audio.
+
+        Raises:
+            NotImplementedError: If the method is not implemented in the subclass.
+        """
+        raise NotImplementedError("This method should be implemented by subclasses.")
+
+    def _create_task(self, coroutine):
+        """
+        Runs a coroutine in a task kept in `self.tasks` until it is done, so that it is not
+        garbage collected while running and can be waited for or cancelled. Its exception,
+        if any, is reported instead of being lost.
+        """
+        task = asyncio.create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return task
+
+    def _task_done(self, task):
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            error = task.exception()
+            print(f"Processing failed for client {self.client.client_id}: {type(error).__name__}: {error}")
@@ -0,0 +1,35 @@
+from importlib.metadata import entry_points
+
+# Entry point group third-party packages can declare their buffering strategies under
+ENTRY_POINT_GROUP = "voicestreamai.buffering_strategies"
+
+registered_strategies = {}
+
+def register_buffering_strategy(name):
+    """
+    Class decorator registering a buffering strategy under a type name, which clients can then
+    select with the "processing_strategy" key of their config.
+
+    Example:
+        @register_buffering_strategy("my_strategy")
+        class MyStrategy(BufferingStrategyInterface):
+            ...
+    """
+    def decorator(cls):
+        if name in registered_strategies and registered_strategies[name] is not cls:
+            raise ValueError(f"Buffering strategy already registered: {name}")
+        registered_strategies[name] = cls
+        return cls
+    return decorator
+
+def get_buffering_strategy_class(name):
+    """
+    Returns the class registered under the given type name, loading it from the
+    installed packages' entry points if it is not registered yet, or None if unknown.
+    """
+    if name not in registered_strategies:
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            if entry_point.name == name:
+                registered_strategies[name] = entry_point.load()
+                break
+    return registered_strategies.get(name)
@@ -1,4 +1,17 @@
+import time
+from collections import deque
+
 from src.buffering_strategy.buffering_strategy_factory import BufferingStrategyFactory
+from src.vad.vad_stream_state import VADStreamState
+from src.asr.language_state import LanguageState
+from src.ring_buffer import RingBuffer
+from src.protocol import create_audio_decoder, check_result_format, encode_message
+from src.audio_utils import InputConverter
+from src.metrics import BYTES_DROPPED
+
+# Fraction of the audio ring that may be filled before the held audio is transcribed, so that
+# an utterance longer than the ring does not silently lose its start
+FLUSH_AT_CAPACITY = 0.8
 
 class Client:
     """
@@ -9,17 +22,33 @@ class Client:
 
     Attributes:
         client_id (str): A unique identifier for the client.
-        buffer (bytearray): A buffer to store incoming audio data.
+        audio (RingBuffer): Preallocated ring holding all of the client's unprocessed audio.
+        buffer (memoryview): Zero-copy view of the incoming audio not yet handed to the buffering strategy.
+        scratch_buffer (memoryview): Zero-copy view of the audio being analysed by VAD and ASR.
         config (dict): Configuration settings for the client, like chunk length and offset.
         file_counter (int): Counter for the number of audio files processed.
         total_samples (int): Total number of audio samples received from this client.
         sampling_rate (int): The sampling rate of the audio data in Hz.
         samples_width (int): The width of each audio sample in bits.
+        vad_state (VADStreamState): Per-stream state of the incremental VAD.
+        language_state (LanguageState): Language the ASR detected for this client.
+        max_buffer_seconds (float): Capacity of the audio ring, older audio is dropped beyond it.
+        received_bytes (int): Total number of audio bytes received from this client.
+        peak_bytes (int): Largest amount of audio held at once.
+        scratch_updated_at (float): time.monotonic() arrival time of the newest sample in the scratch buffer.
+        memory_limits (dict): Optional limits, see check_memory_limits.
+        prompt (str): Text preceding the scratch buffer's audio, passed to the ASR as context, None if there is none.
+        audio_decoder (StreamingAudioDecoder): Decoder of the negotiated compressed audio format, None for raw PCM.
+        result_format (str): Encoding of the messages sent to the client, 'json' or 'msgpack'.
+        input_converter (InputConverter): Converter of the declared raw PCM input format, None if it is
+            already the server's format.
     """
-    def __init__(self, client_id, sampling_rate, samples_width):
+    def __init__(self, client_id, sampling_rate, samples_width, max_buffer_seconds=30, memory_limits=None):
         self.client_id = client_id
-        self.buffer = bytearray()
-        self.scratch_buffer = bytearray()
+        # The scratch buffer spans [audio.start, _buffer_start), the incoming buffer [_buffer_start, audio.end)
+        self.max_buffer_seconds = max_buffer_seconds
+        self.audio = RingBuffer(int(max_buffer_seconds * sampling_rate) * samples_width)
+        self._buffer_start = 0
         self.config = {"language": None,
                        "processing_strategy": "silence_at_end_of_chunk", 
                        "processing_args": {
@@ -29,20 +58,166 @@ class Client:
                        }
         self.file_counter = 0
         self.total_samples = 0
+        self.received_bytes = 0
+        self.peak_bytes = 0
+        self.memory_limits = memory_limits or {}
+        if self.memory_limits.get('action', 'flush') not in ('flush', 'drop'):
+            raise ValueError(f"Unknown memory limit action: {self.memory_limits['action']}")
+        # (absolute end offset, arrival time) of every received frame still held in the ring
+        self._arrivals = deque()
+        self.scratch_updated_at = None
         self.sampling_rate = sampling_rate
         self.samples_width = samples_width
+        self.vad_state = VADStreamState()
+        self.language_state = LanguageState()
+        self.prompt = None
+        self._retired_strategy = None
+        self.audio_decoder = None
+        self.result_format = 'json'
+        self.input_converter = None
         self.buffering_strategy = BufferingStrategyFactory.create_buffering_strategy(self.config['processing_strategy'], self, **self.config['processing_args'])
 
     def update_config(self, config_data):
+        """
+        Updates the client's configuration. The buffering strategy is only replaced when its type or
+        arguments change; the audio held by the client is kept, so strategies can be swapped mid-stream.
+        """
+        # Validate the protocol before changing anything, an unsupported one leaves the client as it was
+        if 'audio_format' in config_data:
+            audio_decoder = create_audio_decoder(config_data['audio_format'], self.sampling_rate)
+        if any(key in config_data for key in ('sample_rate', 'sample_format', 'channels')):
+            self._create_input_converter({**self.config, **config_data})
+        if 'result_format' in config_data:
+            check_result_format(config_data['result_format'])
+            self.result_format = config_data['result_format']
+        if 'audio_format' in config_data:
+            self.audio_decoder = audio_decoder
+        if any(key in config_data for key in ('sample_rate', 'sample_format', 'channels')):
+            self.input_converter = self._create_input_converter({**self.config, **config_data})
+
+        previous_strategy = (self.config['processing_strategy'], self.config['processing_args'])
         self.config.update(config_data)
-        self.buffering_strategy = BufferingStrategyFactory.create_buffering_strategy(self.config['processing_strategy'], self, **self.config['processing_args'])
+        if (self.config['processing_strategy'], self.config['processing_args']) != previous_strategy:
+            strategy = BufferingStrategyFactory.create_buffering_strategy(self.config['processing_strategy'], self, **self.config['processing_args'])
+            if self.buffering_strategy.tasks:
+                # Let the chunk in flight finish before the new strategy touches the scratch buffer
+                self._retired_strategy = self.buffering_strategy
+            self.buffering_strategy = strategy
+            # Text committed by the previous strategy must not condition the new one's transcriptions
+            self.prompt = None
+
+    @property
+    def buffer(self):
+        return self.audio.view(self._buffer_start, self.audio.end)
+
+    @property
+    def scratch_buffer(self):
+        return self.audio.view(self.audio.start, self._buffer_start)
+
+    @scratch_buffer.setter
+    def scratch_buffer(self, audio_data):
+        """
+        Replaces all buffered audio with the given bytes as scratch buffer.
+        """
+        self.audio.clear()
+        self.audio.write(audio_data)
+        self._buffer_start = self.audio.end
+
+    def _create_input_converter(self, config):
+        sample_rate = int(config.get('sample_rate', self.sampling_rate))
+        sample_format = config.get('sample_format', 'int16')
+        channels = int(config.get('channels', 1))
+        converter = InputConverter(sample_rate, sample_format, channels, self.sampling_rate)
+        if sample_rate == self.sampling_rate and sample_format == 'int16' and channels == 1:
+            return None
+        return converter
+
+    def receive_audio(self, message):
+        """
+        Appends an audio message in the negotiated format, decoding compressed audio and converting
+        the declared sample rate, sample format and channel count to the server's PCM.
+        """
+        if self.audio_decoder is not None:
+            message = self.audio_decoder.decode(message)
+        elif self.input_converter is not None:
+            message = self.input_converter.convert(message)
+        if message:
+            self.append_audio_data(message)
+
+    def encode_message(self, message):
+        """
+        Encodes a message to send to this client in its negotiated result format.
+        """
+        return encode_message(message, self.result_format)
 
     def append_audio_data(self, audio_data):
-        self.buffer.extend(audio_data)
-        self.total_samples += len(audio_data) / self.samples_width
+        dropped = self.audio.write(audio_data)
+        if dropped > 0:
+            # The oldest audio was dropped, the VAD timeline no longer matches the scratch buffer
+            BYTES_DROPPED.inc(dropped)
+            self.vad_state.reset()
+        self._buffer_start = max(self._buffer_start, self.audio.start)
+        self.received_bytes += len(audio_data)
+        self.total_samples = self.received_bytes // self.samples_width
+        self.peak_bytes = max(self.peak_bytes, len(self.audio))
+        self._arrivals.append((self.audio.end, time.monotonic()))
+        self._prune_arrivals()
+
+    def _prune_arrivals(self):
+        """
+        Forgets the arrival times of frames no longer held in the ring, so that only
+        the frames currently held are tracked.
+        """
+        while self._arrivals and self._arrivals[0][0] <= self.audio.start:
+            self._arrivals.popleft()
+        while self._arrivals and self._arrivals[-1][0] > self.audio.end:
+            self._arrivals.pop()
+
+    def move_buffer_to_scratch(self):
+        """
+        Appends the incoming buffer to the scratch buffer. No bytes are copied.
+        """
+        self._buffer_start = self.audio.end
+        if self._arrivals:
+            self.scratch_updated_at = self._arrivals[-1][1]
 
     def clear_buffer(self):
-        self.buffer.clear()
+        self.audio.truncate(self._buffer_start)
+        self._prune_arrivals()
+
+    def drop_buffer_head(self, keep_bytes):
+        """
+        Drops the oldest incoming audio so that at most keep_bytes remain in the buffer.
+
+        :return: The number of bytes dropped.
+        """
+        keep_bytes -= keep_bytes % self.samples_width
+        dropped = max(0, len(self.buffer) - keep_bytes)
+        if dropped:
+            self.audio.remove(self._buffer_start, self._buffer_start + dropped)
+            # Frames ending in the dropped range are gone, the newer ones moved back by the dropped bytes
+            removed_end = self._buffer_start + dropped
+            self._arrivals = deque((offset if offset <= self._buffer_start else offset - dropped, arrived)
+                                   for offset, arrived in self._arrivals
+                                   if not self._buffer_start < offset <= removed_end)
+            self._prune_arrivals()
+        return dropped
+
+    def drop_scratch_head(self, nbytes):
+        """
+        Drops the oldest nbytes of the scratch buffer, e.g. audio whose transcription has been
+        committed, and moves the VAD timeline so that it still matches the scratch buffer.
+        """
+        nbytes = min(nbytes - nbytes % self.samples_width, len(self.scratch_buffer))
+        if nbytes <= 0:
+            return
+        self.audio.discard_until(self.audio.start + nbytes)
+        self._prune_arrivals()
+        self.vad_state.shift(nbytes // self.samples_width, self.sampling_rate)
+
+    def clear_scratch_buffer(self):
+        self.audio.discard_until(self._buffer_start)
+        self._prune_arrivals()
 
     def increment_file_counter(self):
         self.file_counter += 1
@@ -51,4 +226,91 @@ class Client:
         return f"{self.client_id}_{self.file_counter}.wav"
     
     def process_audio(self, websocket, vad_pipeline, asr_pipeline):
+        if self._strategy_swap_pending():
+            return
         self.buffering_strategy.process_audio(websocket, vad_pipeline, asr_pipeline)
+
+    def flush_audio(self, websocket, vad_pipeline, asr_pipeline):
+        if self._strategy_swap_pending():
+            return
+        self.buffering_strategy.flush(websocket, vad_pipeline, asr_pipeline)
+
+    def _strategy_swap_pending(self):
+        if self._retired_strategy is not None:
+            if self._retired_strategy.tasks:
+                return True
+            # The chunk that was in flight may have set a prompt again
+            self.prompt = None
+            self._retired_strategy = None
+        return False
+
+    def pending_tasks(self):
+        """
+        Returns the tasks the client's buffering strategies, current and retired, have running.
+        """
+        tasks = set(self.buffering_strategy.tasks)
+        if self._retired_strategy is not None:
+            tasks |= self._retired_strategy.tasks
+        return tasks
+
+    def cancel_tasks(self):
+        """
+        Cancels the running tasks of the client's buffering strategies, e.g. once it disconnected.
+        Inference jobs they queued and that did not start yet are withdrawn, a model call already
+        running completes in the background and keeps its executor slot until then.
+
+        Returns:
+            set: The cancelled tasks, to await their completion.
+        """
+        tasks = self.pending_tasks()
+        for task in tasks:
+            task.cancel()
+        return tasks
+
+    def oldest_unprocessed_age(self):
+        """
+        Returns how many seconds ago the oldest audio still held by this client arrived.
+        """
+        self._prune_arrivals()
+        if not self._arrivals or len(self.audio) == 0:
+            return 0.0
+        return time.monotonic() - self._arrivals[0][1]
+
+    def get_memory_usage(self):
+        """
+        Returns the audio memory accounting of this client, in bytes unless stated otherwise.
+        """
+        return {
+            "buffered_bytes": len(self.buffer),
+            "scratch_bytes": len(self.scratch_buffer),
+            "peak_bytes": self.peak_bytes,
+            "allocated_bytes": self.audio.allocated_bytes,
+            "dropped_bytes": self.audio.dropped_bytes,
+            "received_bytes": self.received_bytes,
+            "oldest_unprocessed_age_seconds": self.oldest_unprocessed_age(),
+        }
+
+    def check_memory_limits(self):
+        """
+        Checks the configured memory limits.
+
+        The limits are 'max_unprocessed_seconds' (audio held, scratch and incoming buffer together)
+        and 'max_unprocessed_age_seconds' (age of the oldest audio held). When one is crossed the
+        configured 'action' is returned: 'flush' (force the held audio to be transcribed, default)
+        or 'drop' (disconnect the client).
+
+        Whatever the limits, 'flush' is returned once the audio held fills FLUSH_AT_CAPACITY of
+        the ring buffer, since the oldest audio would otherwise be overwritten before being transcribed.
+
+        Returns:
+            str: The action to take, or None if every limit is respected.
+        """
+        max_seconds = self.memory_limits.get('max_unprocessed_seconds')
+        max_age = self.memory_limits.get('max_unprocessed_age_seconds')
+        over_size = max_seconds is not None and len(self.audio) > max_seconds * self.sampling_rate * self.samples_width
+        over_age = max_age is not None and self.oldest_unprocessed_age() > max_age
+        if over_size or over_age:
+            return self.memory_limits.get('action', 'flush')
+        if len(self.audio) > FLUSH_AT_CAPACITY * self.audio.capacity:
+            return 'flush'
+        return None
@@ -0,0 +1,134 @@
+import asyncio
+import concurrent.futures
+import functools
+import time
+
+from src.metrics import QUEUE_WAIT
+
+class InferenceExecutor:
+    """
+    Runs blocking model inference off the asyncio event loop.
+
+    VAD and ASR implementations hand their synchronous model calls to this
+    executor so that the event loop serving the websockets only does I/O.
+    Submissions are bounded: once `max_queue_size` jobs are pending (queued or
+    running), further submissions wait for a free slot, which propagates
+    backpressure to the buffering strategies instead of piling up work. A job
+    keeps its slot until its model call returns, even if its caller was
+    cancelled meanwhile, so the bound holds for the work actually running.
+
+    Models cannot be pickled to a process pool; run them in separate processes
+    with a WorkerPool, which loads them once per worker process.
+
+    Attributes:
+        kind (str): 'thread', the only kind of executor.
+        max_workers (int): Number of worker threads.
+        max_queue_size (int): Maximum number of pending jobs across all stages.
+    """
+
+    def __init__(self, kind="thread", max_workers=1, max_queue_size=64):
+        if kind == "thread":
+            self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        else:
+            raise ValueError(f"Unknown inference executor kind: {kind}")
+
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self._slots = asyncio.Semaphore(max_queue_size)
+        self.stages = {}
+
+    def _stage(self, stage):
+        if stage not in self.stages:
+            self.stages[stage] = {"queued": 0, "running": 0, "completed": 0, "failed": 0, "max_queue_depth": 0}
+        return self.stages[stage]
+
+    async def run(self, stage, func, *args, **kwargs):
+        """
+        Runs func(*args, **kwargs) on the pool and returns its result.
+
+        Cancelling the caller withdraws a job still waiting for a slot or a worker thread. A job
+        already running cannot be interrupted: it completes in the background and only then
+        frees its slot.
+
+        Args:
+            stage (str): Name of the pipeline stage (e.g. 'vad', 'asr'), used for metrics.
+            func (callable): The blocking function to run.
+        """
+        metrics = self._stage(stage)
+        metrics["queued"] += 1
+        metrics["max_queue_depth"] = max(metrics["max_queue_depth"], metrics["queued"])
+        submitted = time.monotonic()
+        try:
+            await self._slots.acquire()
+        finally:
+            metrics["queued"] -= 1
+        QUEUE_WAIT.observe(time.monotonic() - submitted, stage=stage)
+        metrics["running"] += 1
+        loop = asyncio.get_running_loop()
+        try:
+            future = self.pool.submit(functools.partial(func, *args, **kwargs))
+        except Exception:
+            metrics["running"] -= 1
+            metrics["failed"] += 1
+            self._slots.release()
+            raise
+        # Registered before wrapping, so the slot is freed before the caller resumes
+        future.add_done_callback(functools.partial(self._job_done, loop, metrics))
+        return await asyncio.wrap_future(future)
+
+    def _job_done(self, loop, metrics, future):
+        # Runs on the worker thread, or on the loop if the job was withdrawn before starting
+        try:
+            loop.call_soon_threadsafe(self._release, metrics, future)
+        except RuntimeError:
+            # The event loop is closed, nobody is waiting for the slot anymore
+            pass
+
+    def _release(self, metrics, future):
+        metrics["running"] -= 1
+        if not future.cancelled():
+            if future.exception() is not None:
+                metrics["failed"] += 1
+            else:
+                metrics["completed"] += 1
+        self._slots.release()
+
+    def pending(self):
+        """
+        Returns the number of jobs queued or running across all stages.
+        """
+        return sum(m["queued"] + m["running"] for m in self.stages.values())
+
+    def is_saturated(self):
+        """
+        Returns True when every slot of the bounded queue is taken.
+        """
+        return self.pending() >= self.max_queue_size
+
+    def get_metrics(self):
+        """
+        Returns a snapshot of the per-stage queue depth counters.
+        """
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue_size": self.max_queue_size,
+            "pending": self.pending(),
+            "stages": {stage: dict(metrics) for stage, metrics in self.stages.items()},
+        }
+
+    def shutdown(self, wait=True):
+        self.pool.shutdown(wait=wait)
+
+async def run_inference(executor, stage, func, *args, **kwargs):
+    """
+    Runs a blocking inference call without blocking the event loop.
+
+    Uses the given InferenceExecutor, or the loop's default thread pool when
+    no executor has been configured.
+    """
+    if executor is not None:
+        return await executor.run(stage, func, *args, **kwargs)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
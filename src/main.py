@@ -1,10 +1,13 @@
 import argparse
 import asyncio
 import json
+import signal
 
 from .server import Server
-from src.asr.asr_factory import ASRFactory
-from src.vad.vad_factory import VADFactory
+from src.model_registry import model_registry
+from src.inference_executor import InferenceExecutor
+from src.worker_pool import WorkerPool, WorkerVADProxy, WorkerASRProxy
+from src.tracing import tracer, LoopLagMonitor
 
 def parse_args():
     parser = argparse.ArgumentParser(description="VoiceStreamAI Server: Real-time audio transcription using self-hosted Whisper and WebSocket")
@@ -12,11 +15,26 @@ def parse_args():
     parser.add_argument("--vad-args", type=str, default='{"auth_token": "huggingface_token"}', help="JSON string of additional arguments for VAD pipeline")
     parser.add_argument("--asr-type", type=str, default="faster_whisper", help="Type of ASR pipeline to use (e.g., 'whisper')")
     parser.add_argument("--asr-args", type=str, default='{"model_size": "large-v3"}', help="JSON string of additional arguments for ASR pipeline")
+    parser.add_argument("--executor-args", type=str, default='{"kind": "thread", "max_workers": 1, "max_queue_size": 64}', help="JSON string of arguments for the inference executor the VAD and ASR models run on")
+    parser.add_argument("--max-buffer-seconds", type=float, default=30, help="Seconds of audio each client's preallocated buffer holds; older audio is dropped beyond it")
+    parser.add_argument("--memory-limits", type=str, default='{}', help="JSON string of per-client memory limits, e.g. '{\"max_unprocessed_seconds\": 60, \"max_unprocessed_age_seconds\": 30, \"action\": \"flush\"}'")
+    parser.add_argument("--refuse-when-saturated", action="store_true", help="Refuse new connections while the inference queue is full")
+    parser.add_argument("--warmup-seconds", type=float, default=1.0, help="Length of the synthetic audio used to warm up the models before accepting connections, 0 disables the warm-up")
+    parser.add_argument("--workers", type=int, default=0, help="Number of worker processes to shard clients across, each loading its own models; 0 runs the models in the server process")
     parser.add_argument("--host", type=str, default="127.0.0.1", help="Host for the WebSocket server")
     parser.add_argument("--port", type=int, default=8765, help="Port for the WebSocket server")
+    parser.add_argument("--metrics-port", type=int, default=None, help="Port for the Prometheus metrics HTTP endpoint, disabled if not set")
+    parser.add_argument("--receive-queue-size", type=int, default=32, help="Messages received from a client but not handled yet, beyond which reading from its socket pauses")
+    parser.add_argument("--drain-timeout", type=float, default=10, help="Seconds given to connected clients on SIGINT/SIGTERM to have their held audio transcribed before the server exits")
+    parser.add_argument("--trace-file", type=str, default=None, help="File the Chrome trace of the recorded spans is written to; sending SIGUSR2 to the server toggles tracing and writes the file when it stops")
+    parser.add_argument("--trace", action="store_true", help="Record spans from startup, requires --trace-file")
+    parser.add_argument("--loop-lag-interval", type=float, default=0, help="Interval in seconds at which the event loop lag is measured, 0 disables the monitor")
     parser.add_argument("--certfile", type=str, default=None, help="The path to the SSL certificate (cert file) if using secure websockets")
     parser.add_argument("--keyfile", type=str, default=None, help="The path to the SSL key file if using secure websockets")
-    return parser.parse_args()
+    args = parser.parse_args()
+    if args.trace and args.trace_file is None:
+        parser.error("--trace requires --trace-file")
+    return args
 
 def main():
     args = parse_args()
@@ -24,17 +42,84 @@ def main():
     try:
         vad_args = json.loads(args.vad_args)
         asr_args = json.loads(args.asr_args)
+        executor_args = json.loads(args.executor_args)
+        memory_limits = json.loads(args.memory_limits)
     except json.JSONDecodeError as e:
         print(f"Error parsing JSON arguments: {e}")
         return
 
-    vad_pipeline = VADFactory.create_vad_pipeline(args.vad_type, **vad_args)
-    asr_pipeline = ASRFactory.create_asr_pipeline(args.asr_type, **asr_args)
+    worker_pool = None
+    if args.workers > 0:
+        worker_pool = WorkerPool(args.workers, args.vad_type, vad_args, args.asr_type, asr_args, max_buffer_seconds=args.max_buffer_seconds, warmup_seconds=args.warmup_seconds,
+                                 max_queue_size=executor_args.get('max_queue_size', 64))
+        worker_pool.start()
+        vad_pipeline = WorkerVADProxy(worker_pool)
+        asr_pipeline = WorkerASRProxy(worker_pool)
+    else:
+        vad_pipeline = model_registry.get_vad_pipeline(args.vad_type, **vad_args)
+        asr_pipeline = model_registry.get_asr_pipeline(args.asr_type, **asr_args)
 
-    server = Server(vad_pipeline, asr_pipeline, host=args.host, port=args.port, sampling_rate=16000, samples_width=2, certfile=args.certfile, keyfile=args.keyfile)
+    executor = InferenceExecutor(**executor_args)
+
+    server = Server(vad_pipeline, asr_pipeline, host=args.host, port=args.port, sampling_rate=16000, samples_width=2, certfile=args.certfile, keyfile=args.keyfile, executor=executor, max_buffer_seconds=args.max_buffer_seconds, memory_limits=memory_limits, refuse_when_saturated=args.refuse_when_saturated, worker_pool=worker_pool, receive_queue_size=args.receive_queue_size)
+
+    # Workers warm up and report their own models
+    if worker_pool is None:
+        if args.warmup_seconds > 0:
+            asyncio.get_event_loop().run_until_complete(model_registry.warm_up(args.warmup_seconds))
+        model_registry.report()
 
     asyncio.get_event_loop().run_until_complete(server.start())
-    asyncio.get_event_loop().run_forever()
+    if args.metrics_port is not None:
+        asyncio.get_event_loop().run_until_complete(server.start_metrics_server(port=args.metrics_port))
+    loop_lag_monitor = None
+    if args.loop_lag_interval > 0:
+        loop_lag_monitor = asyncio.get_event_loop().run_until_complete(start_loop_lag_monitor(args.loop_lag_interval))
+    if args.trace_file is not None:
+        if args.trace:
+            tracer.enable()
+        if hasattr(signal, "SIGUSR2"):
+            asyncio.get_event_loop().add_signal_handler(signal.SIGUSR2, toggle_tracing, args.trace_file)
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        asyncio.get_event_loop().add_signal_handler(signum, request_shutdown, server, args.drain_timeout)
+    try:
+        asyncio.get_event_loop().run_forever()
+    finally:
+        if loop_lag_monitor is not None:
+            loop_lag_monitor.stop()
+        if tracer.enabled:
+            toggle_tracing(args.trace_file)
+        executor.shutdown(wait=False)
+        if worker_pool is not None:
+            worker_pool.shutdown()
+
+def request_shutdown(server, drain_timeout):
+    """
+    Drains the connected clients and stops the event loop; asked a second time, stops it right away.
+    """
+    loop = asyncio.get_event_loop()
+    if server.draining:
+        loop.stop()
+        return
+    print(f"Shutting down, draining {len(server.connected_clients)} clients")
+    loop.create_task(server.shutdown(drain_timeout)).add_done_callback(lambda _: loop.stop())
+
+async def start_loop_lag_monitor(interval_seconds):
+    monitor = LoopLagMonitor(interval_seconds, tracer)
+    monitor.start()
+    return monitor
+
+def toggle_tracing(trace_file):
+    """
+    Starts recording spans, or stops recording and writes them to the trace file.
+    """
+    if tracer.enabled:
+        tracer.disable()
+        count = tracer.export(trace_file)
+        print(f"Tracing stopped, {count} events written to {trace_file}")
+    else:
+        tracer.enable()
+        print("Tracing started")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,196 @@
+import asyncio
+import bisect
+import threading
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _label_string(labelnames, labelvalues, extra=()):
+    pairs = list(zip(labelnames, labelvalues)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = [(name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for name, value in pairs]
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        # Metrics are updated from the event loop and from inference threads
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Metric {self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            lines.extend(self._render_samples())
+        return lines
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _render_samples(self):
+        return [f"{self.name}{_label_string(self.labelnames, key)} {_format_value(value)}" for key, value in self._values.items()]
+
+    def snapshot(self):
+        with self._lock:
+            return {",".join(key) or "": value for key, value in self._values.items()}
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            if key not in self._values:
+                self._values[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            state = self._values[key]
+            state["counts"][bisect.bisect_left(self.buckets, value)] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    def _render_samples(self):
+        lines = []
+        for key, state in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state["counts"]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_label_string(self.labelnames, key, [('le', _format_value(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_string(self.labelnames, key)} {_format_value(state['sum'])}")
+            lines.append(f"{self.name}_count{_label_string(self.labelnames, key)} {state['count']}")
+        return lines
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                ",".join(key) or "": {"count": state["count"], "sum": state["sum"], "mean": state["sum"] / state["count"]}
+                for key, state in self._values.items()
+            }
+
+class MetricsRegistry:
+    """
+    A minimal Prometheus-compatible metrics registry.
+
+    Metrics are rendered in the Prometheus text exposition format by `render`,
+    or as a JSON-friendly dict by `snapshot`.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+
+    def _register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+registry = MetricsRegistry()
+
+VAD_LATENCY = registry.histogram("voicestreamai_vad_latency_seconds", "Time spent in voice activity detection per chunk")
+ASR_LATENCY = registry.histogram("voicestreamai_asr_latency_seconds", "Time spent transcribing per chunk", ["model"])
+QUEUE_WAIT = registry.histogram("voicestreamai_inference_queue_wait_seconds", "Time inference jobs waited for an executor slot", ["stage"])
+AUDIO_TO_TEXT_LAG = registry.histogram("voicestreamai_audio_to_text_lag_seconds", "Time between the arrival of the last transcribed sample and the transcription being sent")
+REAL_TIME_FACTOR = registry.histogram("voicestreamai_asr_real_time_factor", "ASR processing time divided by the transcribed audio duration", ["model"],
+                                      buckets=(0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 5.0))
+CHUNKS_PROCESSED = registry.counter("voicestreamai_chunks_processed_total", "Chunks handed to the VAD")
+CHUNKS_DISCARDED = registry.counter("voicestreamai_chunks_discarded_total", "Chunks discarded because the VAD found no speech")
+OVERLOAD_EVENTS = registry.counter("voicestreamai_overload_events_total", "Chunks that became ready while the previous one was still being processed", ["policy"])
+BYTES_DROPPED = registry.counter("voicestreamai_audio_bytes_dropped_total", "Audio bytes dropped by the overload policy or because a client's audio ring buffer was full")
+SPECULATIVE_TRANSCRIPTIONS = registry.counter("voicestreamai_speculative_transcriptions_total", "Transcriptions started before the VAD confirmed the end of speech, by whether they were used", ["outcome"])
+CONNECTIONS_REFUSED = registry.counter("voicestreamai_connections_refused_total", "Connections refused because the inference queue was saturated")
+ASR_CACHE_HITS = registry.counter("voicestreamai_asr_cache_hits_total", "Transcriptions answered from the transcription cache")
+ASR_CACHE_MISSES = registry.counter("voicestreamai_asr_cache_misses_total", "Transcriptions the transcription cache had to run on the ASR backend")
+BYTES_RECEIVED = registry.counter("voicestreamai_audio_bytes_received_total", "Audio bytes received from clients")
+ACTIVE_CONNECTIONS = registry.gauge("voicestreamai_active_connections", "Currently connected websocket clients")
+INFERENCE_QUEUE_DEPTH = registry.gauge("voicestreamai_inference_queue_depth", "Inference jobs waiting for an executor slot", ["stage"])
+INFERENCE_RUNNING = registry.gauge("voicestreamai_inference_running", "Inference jobs currently running", ["stage"])
+BUFFERED_AUDIO_BYTES = registry.gauge("voicestreamai_buffered_audio_bytes", "Audio bytes held for all connected clients")
+EVENT_LOOP_LAG = registry.histogram("voicestreamai_event_loop_lag_seconds", "How late the event loop woke up a task sleeping for a fixed interval",
+                                    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+
+def model_label(asr_pipeline):
+    """
+    Returns the label identifying an ASR pipeline's model in metrics.
+    """
+    model_name = getattr(asr_pipeline, 'model_name', None)
+    class_name = type(asr_pipeline).__name__
+    return f"{class_name}/{model_name}" if model_name else class_name
+
+async def start_metrics_server(host, port, render):
+    """
+    Starts a minimal HTTP server answering every GET request with `render()` in the
+    Prometheus text format.
+
+    Args:
+        host (str): Host to listen on.
+        port (int): Port to listen on.
+        render (callable): Returns the text to serve.
+    """
+    async def handle(reader, writer):
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+            if request_line.split(b' ')[0] == b'GET':
+                body = render().encode()
+                status = b"200 OK"
+            else:
+                body = b"Method Not Allowed\n"
+                status = b"405 Method Not Allowed"
+            writer.write(b"HTTP/1.1 " + status + b"\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                         b"Content-Length: " + str(len(body)).encode() + b"\r\nConnection: close\r\n\r\n" + body)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
@@ -0,0 +1,79 @@
+import json
+import time
+
+import numpy as np
+
+from src.asr.asr_factory import ASRFactory
+from src.vad.vad_factory import VADFactory
+from src.client import Client
+
+class ModelRegistry:
+    """
+    Loads each VAD/ASR pipeline configuration once and shares it.
+
+    Pipelines are keyed by (kind, type, arguments), so servers, tests and workers
+    asking for the same configuration in one process get the same instance
+    instead of loading the model again.
+
+    Attributes:
+        timings (dict): Load and warm-up durations in seconds, keyed by pipeline description.
+    """
+
+    def __init__(self):
+        self._pipelines = {}
+        self._names = {}
+        self.timings = {}
+
+    def get_vad_pipeline(self, type, **kwargs):
+        return self._get("vad", type, kwargs, VADFactory.create_vad_pipeline)
+
+    def get_asr_pipeline(self, type, **kwargs):
+        return self._get("asr", type, kwargs, ASRFactory.create_asr_pipeline)
+
+    def _get(self, kind, type, kwargs, create):
+        key = (kind, type, json.dumps(kwargs, sort_keys=True))
+        if key not in self._pipelines:
+            start = time.time()
+            # The factories may pop wrapper arguments, keep the caller's dict intact
+            self._pipelines[key] = create(type, **json.loads(key[2]))
+            # Arguments may hold secrets (e.g. auth tokens), so they are not part of the name
+            name = f"{kind}:{type}"
+            if name in self.timings:
+                name = f"{name}#{len(self._names)}"
+            self._names[key] = name
+            self.timings[name] = {"load_seconds": time.time() - start}
+        return self._pipelines[key]
+
+    async def warm_up(self, seconds=1.0, sampling_rate=16000):
+        """
+        Runs one inference per loaded pipeline on synthetic audio, so that lazy kernel and
+        graph initialization happens before the first real request.
+
+        Args:
+            seconds (float): Length of the synthetic audio.
+            sampling_rate (int): The sampling rate of the synthetic audio in Hz.
+        """
+        client = Client("warmup", sampling_rate, 2, max_buffer_seconds=max(seconds, 1))
+        t = np.arange(int(seconds * sampling_rate)) / sampling_rate
+        # A quiet harmonic tone with a little noise, enough for the models to run their full path
+        audio = 0.1 * np.sin(2 * np.pi * 220 * t) + 0.01 * np.random.default_rng(0).standard_normal(len(t))
+        client.scratch_buffer = (audio * 32767).astype(np.int16).tobytes()
+
+        for key, pipeline in self._pipelines.items():
+            start = time.time()
+            if key[0] == "vad":
+                await pipeline.detect_activity(client)
+            else:
+                await pipeline.transcribe(client)
+            self.timings[self._names[key]]["warm_up_seconds"] = time.time() - start
+
+    def report(self):
+        """
+        Prints the load and warm-up timings of every pipeline.
+        """
+        for name, timings in self.timings.items():
+            details = ", ".join(f"{key.replace('_seconds', '')} {value:.2f}s" for key, value in timings.items())
+            print(f"Model {name}: {details}")
+
+# Registry shared by everything running in this process
+model_registry = ModelRegistry()
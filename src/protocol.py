@@ -0,0 +1,113 @@
+import json
+
+# Wire formats a client can negotiate in its config message
+AUDIO_FORMATS = ('pcm', 'opus', 'flac')
+RESULT_FORMATS = ('json', 'msgpack')
+
+class StreamingAudioDecoder:
+    """
+    Decodes compressed audio frames into the server's raw PCM as they arrive.
+
+    Requires PyAV (`pip install av`). Each 'opus' message must hold one raw Opus packet, as produced
+    by the WebCodecs AudioEncoder. A 'flac' stream may be split across messages arbitrarily, and
+    its metadata header is skipped. The output is mono, 16 bit, at the server's sampling rate.
+
+    Attributes:
+        audio_format (str): 'opus' or 'flac'.
+        sampling_rate (int): The sampling rate of the produced PCM in Hz.
+    """
+
+    def __init__(self, audio_format, sampling_rate):
+        try:
+            import av
+        except ImportError:
+            raise ValueError(f"Decoding {audio_format} audio requires PyAV, install it with `pip install av`")
+        self._av = av
+        self.audio_format = audio_format
+        self.sampling_rate = sampling_rate
+        self.codec = av.CodecContext.create(audio_format, "r")
+        if audio_format == 'opus':
+            self.codec.sample_rate = 48000
+        self.resampler = av.AudioResampler(format="s16", layout="mono", rate=sampling_rate)
+        # FLAC: bytes of the "fLaC" marker and metadata blocks still to read, None once skipped
+        self._header = bytearray() if audio_format == 'flac' else None
+
+    def decode(self, data):
+        """
+        Decodes one message and returns the PCM bytes of every complete frame it finished.
+        """
+        if self.audio_format == 'opus':
+            packets = [self._av.Packet(data)]
+        else:
+            data = self._skip_flac_header(data)
+            packets = self.codec.parse(data) if data else []
+
+        pcm = []
+        for packet in packets:
+            for frame in self.codec.decode(packet):
+                for resampled in self.resampler.resample(frame):
+                    pcm.append(resampled.to_ndarray().tobytes())
+        return b"".join(pcm)
+
+    def _skip_flac_header(self, data):
+        if self._header is None:
+            return data
+        self._header.extend(data)
+        if len(self._header) < 4:
+            return b""
+        if self._header[:4] != b"fLaC":
+            # Bare frames without a stream header
+            data, self._header = bytes(self._header), None
+            return data
+
+        position = 4
+        while position + 4 <= len(self._header):
+            is_last = self._header[position] & 0x80
+            position += 4 + int.from_bytes(self._header[position + 1:position + 4], "big")
+            if is_last:
+                if position > len(self._header):
+                    return b""
+                data, self._header = bytes(self._header[position:]), None
+                return data
+        return b""
+
+def create_audio_decoder(audio_format, sampling_rate):
+    """
+    Returns the decoder for a negotiated audio format, None for raw PCM.
+
+    Raises:
+        ValueError: If the format is unknown or its dependency is missing.
+    """
+    if audio_format not in AUDIO_FORMATS:
+        raise ValueError(f"Unknown audio format: {audio_format}, supported: {', '.join(AUDIO_FORMATS)}")
+    if audio_format == 'pcm':
+        return None
+    return StreamingAudioDecoder(audio_format, sampling_rate)
+
+def check_result_format(result_format):
+    """
+    Raises ValueError if results cannot be sent in the given format.
+    """
+    if result_format not in RESULT_FORMATS:
+        raise ValueError(f"Unknown result format: {result_format}, supported: {', '.join(RESULT_FORMATS)}")
+    if result_format == 'msgpack':
+        try:
+            import msgpack  # noqa: F401
+        except ImportError:
+            raise ValueError("msgpack results require msgpack, install it with `pip install msgpack`")
+
+def encode_message(message, result_format='json'):
+    """
+    Encodes a message for the client: a JSON string (text frame) or msgpack bytes (binary frame).
+
+    In msgpack, the words of a transcription are sent as [word, start, end, probability] arrays
+    instead of objects, which roughly halves their size.
+    """
+    if result_format == 'json':
+        return json.dumps(message)
+
+    import msgpack
+    words = message.get('words')
+    if isinstance(words, list):
+        message = dict(message, words=[[w['word'], w['start'], w['end'], w['probability']] for w in words])
+    return msgpack.packb(message, use_bin_type=True)
@@ -0,0 +1,131 @@
+import numpy as np
+
+class RingBuffer:
+    """
+    Fixed-capacity, preallocated byte ring buffer with contiguous zero-copy views.
+
+    The storage is mirrored: every byte is written both at `i % capacity` and at
+    `i % capacity + capacity`. Any range of at most `capacity` bytes is therefore
+    contiguous in memory and can be handed out as a memoryview or NumPy array
+    without copying, even when it wraps around the end of the ring. Positions are
+    absolute byte offsets in the stream that only ever grow.
+
+    The storage starts at `initial_size` bytes and doubles whenever the held bytes
+    outgrow it, up to `capacity`, so idle or quiet clients do not pay for the full
+    ring. When a write does not fit in the capacity, the oldest bytes are dropped,
+    so memory per client never exceeds 2 * capacity.
+
+    Attributes:
+        capacity (int): Maximum number of bytes held.
+        size (int): Number of bytes the current storage can hold, at most capacity.
+        start (int): Absolute offset of the oldest byte held.
+        end (int): Absolute offset one past the newest byte held.
+        dropped_bytes (int): Total number of bytes dropped because the ring was full.
+    """
+
+    def __init__(self, capacity, initial_size=65536):
+        self.capacity = int(capacity)
+        self.size = max(1, min(self.capacity, int(initial_size)))
+        self._data = bytearray(2 * self.size)
+        self._view = memoryview(self._data)
+        self.start = 0
+        self.end = 0
+        self.dropped_bytes = 0
+
+    def __len__(self):
+        return self.end - self.start
+
+    @property
+    def allocated_bytes(self):
+        return len(self._data)
+
+    def _grow(self, needed):
+        """
+        Moves the held bytes to a storage that can hold `needed` bytes. Views handed out
+        before keep the old storage alive and stay valid.
+        """
+        held = self.view().tobytes()
+        self.size = min(self.capacity, max(needed, 2 * self.size))
+        self._data = bytearray(2 * self.size)
+        self._view = memoryview(self._data)
+        self._store(self.start, held)
+
+    def _store(self, offset, data):
+        n = len(data)
+        position = offset % self.size
+        self._view[position:position + n] = data
+        # Mirror the part below size to the upper half and vice versa
+        split = min(n, self.size - position)
+        self._view[position + self.size:position + self.size + split] = data[:split]
+        self._view[0:n - split] = data[split:]
+
+    def write(self, data):
+        """
+        Appends bytes, dropping the oldest ones if the capacity would be exceeded.
+
+        :return: The number of bytes dropped to make room.
+        """
+        data = memoryview(data).cast('B')
+        if len(data) > self.capacity:
+            self.end += len(data) - self.capacity
+            data = data[-self.capacity:]
+
+        n = len(data)
+        dropped = max(0, self.end + n - self.start - self.capacity)
+        self.start += dropped
+        self.dropped_bytes += dropped
+
+        if self.end + n - self.start > self.size:
+            self._grow(self.end + n - self.start)
+        self._store(self.end, data)
+        self.end += n
+        return dropped
+
+    def view(self, start=None, end=None):
+        """
+        Returns a zero-copy memoryview of the bytes between two absolute offsets.
+
+        The view is only valid until the range is overwritten by later writes.
+        """
+        start = self.start if start is None else max(start, self.start)
+        end = self.end if end is None else min(end, self.end)
+        end = max(start, end)
+        position = start % self.size
+        return self._view[position:position + end - start]
+
+    def array(self, start=None, end=None, dtype=np.int16):
+        """
+        Returns a zero-copy NumPy view of the bytes between two absolute offsets.
+        """
+        view = self.view(start, end)
+        itemsize = np.dtype(dtype).itemsize
+        return np.frombuffer(view, dtype=dtype, count=len(view) // itemsize)
+
+    def discard_until(self, offset):
+        """
+        Drops every byte before the given absolute offset.
+        """
+        self.start = min(max(self.start, offset), self.end)
+
+    def truncate(self, offset):
+        """
+        Drops every byte from the given absolute offset on.
+        """
+        self.end = max(min(self.end, offset), self.start)
+
+    def remove(self, start, end):
+        """
+        Removes the bytes between two absolute offsets, moving the newer bytes back.
+
+        Only the bytes after `end` are copied, so this is cheap when removing close to the end.
+        """
+        start = max(start, self.start)
+        end = min(end, self.end)
+        if end <= start:
+            return
+        tail = self.view(end, self.end).tobytes()
+        self.truncate(start)
+        self.write(tail)
+
+    def clear(self):
+        self.start = self.end
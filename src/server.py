@@ -6,6 +6,8 @@ import ssl
 
 from src.audio_utils import save_audio_to_file
 from src.client import Client
+from src.tracing import tracer
+from src.metrics import registry, start_metrics_server, BYTES_RECEIVED, ACTIVE_CONNECTIONS, CONNECTIONS_REFUSED, INFERENCE_QUEUE_DEPTH, INFERENCE_RUNNING, BUFFERED_AUDIO_BYTES
 
 class Server:
     """
@@ -23,49 +25,247 @@ class Server:
         sampling_rate (int): The sampling rate of audio data in Hz.
         samples_width (int): The width of each audio sample in bits.
         connected_clients (dict): A dictionary mapping client IDs to Client objects.
+        executor (InferenceExecutor): Optional executor the VAD and ASR pipelines run their model calls on.
+        max_buffer_seconds (float): Capacity of each client's preallocated audio ring buffer.
+        memory_limits (dict): Per-client memory limits, see Client.check_memory_limits.
+        refuse_when_saturated (bool): Refuse new connections while the inference queue is full.
+        worker_pool (WorkerPool): Optional pool of worker processes the pipelines run in; clients are unpinned from it on disconnect,
+            and its pending jobs replace the executor's in saturation checks and queue metrics.
+        receive_queue_size (int): Messages received from a client but not handled yet, beyond which reading from its socket pauses.
+        draining (bool): Whether the server is shutting down and transcribing the audio its clients left.
     """
-    def __init__(self, vad_pipeline, asr_pipeline, host='localhost', port=8765, sampling_rate=16000, samples_width=2, certfile = None, keyfile = None):
+    def __init__(self, vad_pipeline, asr_pipeline, host='localhost', port=8765, sampling_rate=16000, samples_width=2, certfile = None, keyfile = None, executor = None, max_buffer_seconds = 30, memory_limits = None, refuse_when_saturated = False, worker_pool = None, receive_queue_size = 32):
         self.vad_pipeline = vad_pipeline
         self.asr_pipeline = asr_pipeline
+        self.executor = executor
+        self.max_buffer_seconds = max_buffer_seconds
+        self.memory_limits = memory_limits
+        self.refuse_when_saturated = refuse_when_saturated
+        self.worker_pool = worker_pool
+        if executor is not None:
+            self.vad_pipeline.executor = executor
+            self.asr_pipeline.executor = executor
         self.host = host
         self.port = port
         self.sampling_rate = sampling_rate
         self.samples_width = samples_width
         self.certfile = certfile
         self.keyfile = keyfile
+        self.receive_queue_size = receive_queue_size
         self.connected_clients = {}
+        self.connections = {}
+        self.draining = False
+        self.websocket_server = None
 
-    async def handle_audio(self, client, websocket):
+    async def receive_messages(self, websocket, queue):
+        """
+        Reads a connection's messages into its queue. While the queue is full nothing is read,
+        so a client sending faster than its messages are handled is slowed down by TCP flow control.
+        """
         while True:
-            message = await websocket.recv()
+            await queue.put(await websocket.recv())
+
+    async def handle_audio(self, client, websocket, queue):
+        """
+        Handles the messages of a connection in the order they were received, until the connection
+        is closed by the server or, when shutting down, every received message has been handled.
+        """
+        while True:
+            if self.draining and queue.empty():
+                await self.drain_client(client, websocket)
+                return
+
+            message = await queue.get()
+            if message is None:
+                # Wake-up call from shutdown()
+                continue
 
             if isinstance(message, bytes):
-                client.append_audio_data(message)
+                try:
+                    with tracer.span("receive_audio", bytes=len(message)):
+                        client.receive_audio(message)
+                except Exception as e:
+                    print(f"Could not decode audio from {client.client_id}: {e}")
+                    await websocket.close(code=1003, reason="undecodable audio")
+                    return
+                BYTES_RECEIVED.inc(len(message))
+                with tracer.span("check_memory_limits"):
+                    action = client.check_memory_limits()
+                if action == 'drop':
+                    print(f"Client {client.client_id} exceeded its memory limits, disconnecting")
+                    await websocket.close(code=1008, reason="memory limit exceeded")
+                    return
+                if action == 'flush':
+                    with tracer.span("flush_audio"):
+                        client.flush_audio(websocket, self.vad_pipeline, self.asr_pipeline)
+                    continue
             elif isinstance(message, str):
                 config = json.loads(message)
                 if config.get('type') == 'config':
-                    client.update_config(config['data'])
+                    try:
+                        with tracer.span("update_config"):
+                            client.update_config(config['data'])
+                    except ValueError as e:
+                        await websocket.send(json.dumps({"type": "error", "data": str(e)}))
+                        continue
+                    if 'audio_format' in config['data'] or 'result_format' in config['data']:
+                        # Acknowledged in JSON, the client may not decode the new result format yet
+                        protocol = {"audio_format": client.audio_decoder.audio_format if client.audio_decoder else 'pcm', "result_format": client.result_format}
+                        await websocket.send(json.dumps({"type": "protocol", "data": protocol}))
+                    continue
+                if config.get('type') == 'stats':
+                    await websocket.send(client.encode_message({"type": "stats", "data": self.get_stats()}))
                     continue
             else:
                 print(f"Unexpected message type from {client.client_id}")
 
             # this is synchronous, any async operation is in BufferingStrategy
-            client.process_audio(websocket, self.vad_pipeline, self.asr_pipeline)
+            with tracer.span("process_audio"):
+                client.process_audio(websocket, self.vad_pipeline, self.asr_pipeline)
 
 
-    async def handle_websocket(self, websocket, path):
+    async def handle_websocket(self, websocket, path=None):
+        inference = self.inference_queue()
+        if self.refuse_when_saturated and inference is not None and inference.is_saturated():
+            CONNECTIONS_REFUSED.inc()
+            print("Refusing connection: inference queue is saturated")
+            await websocket.close(code=1013, reason="server overloaded, try again later")
+            return
+
         client_id = str(uuid.uuid4())
-        client = Client(client_id, self.sampling_rate, self.samples_width)
+        client = Client(client_id, self.sampling_rate, self.samples_width, self.max_buffer_seconds, self.memory_limits)
         self.connected_clients[client_id] = client
+        ACTIVE_CONNECTIONS.inc()
+        tracer.set_client(client_id)
 
         print(f"Client {client_id} connected")
 
+        queue = asyncio.Queue(maxsize=self.receive_queue_size)
+        receiver = asyncio.create_task(self.receive_messages(websocket, queue))
+        processor = asyncio.create_task(self.handle_audio(client, websocket, queue))
+        self.connections[client_id] = (queue, receiver, processor)
         try:
-            await self.handle_audio(client, websocket)
+            await asyncio.wait({receiver, processor}, return_when=asyncio.FIRST_COMPLETED)
+            if self.draining:
+                # The receiver was stopped by shutdown(), the processor transcribes what the client left
+                await asyncio.wait({processor})
+            for task in (receiver, processor):
+                if task.done() and not task.cancelled() and task.exception() is not None:
+                    raise task.exception()
         except websockets.ConnectionClosed as e:
             print(f"Connection with {client_id} closed: {e}")
         finally:
+            receiver.cancel()
+            processor.cancel()
+            # Chunks still in flight for a client that is gone would only waste VAD/ASR time
+            await asyncio.gather(receiver, processor, *client.cancel_tasks(), return_exceptions=True)
+            del self.connections[client_id]
             del self.connected_clients[client_id]
+            ACTIVE_CONNECTIONS.dec()
+            if self.worker_pool is not None:
+                self.worker_pool.release(client_id)
+
+    async def drain_client(self, client, websocket):
+        """
+        Transcribes the audio held for a client, waits for its results to be sent, and closes the connection.
+        """
+        tasks = client.pending_tasks()
+        if tasks:
+            await asyncio.wait(tasks)
+        client.flush_audio(websocket, self.vad_pipeline, self.asr_pipeline)
+        tasks = client.pending_tasks()
+        if tasks:
+            await asyncio.wait(tasks)
+        await websocket.close(code=1001, reason="server shutting down")
+
+    async def shutdown(self, drain_timeout=10):
+        """
+        Shuts the server down gracefully.
+
+        New connections are refused and connected clients' sockets are no longer read. Messages
+        already received are still handled, then the audio held for each client is transcribed
+        and its connection closed with code 1001. Connections still busy after `drain_timeout`
+        seconds are cancelled.
+
+        Args:
+            drain_timeout (float): Seconds the clients are given to be drained.
+        """
+        self.draining = True
+        if self.websocket_server is not None:
+            self.websocket_server.close(close_connections=False)
+
+        processors = []
+        for queue, receiver, processor in self.connections.values():
+            receiver.cancel()
+            if not queue.full():
+                # Wakes up a processor waiting for a message, it drains once its queue is empty
+                queue.put_nowait(None)
+            processors.append(processor)
+        if processors:
+            _, pending = await asyncio.wait(processors, timeout=drain_timeout)
+            if pending:
+                print(f"Drain timed out, cancelling the processing of {len(pending)} clients")
+            for processor in pending:
+                processor.cancel()
+
+        if self.websocket_server is not None:
+            self.websocket_server.close()
+            await self.websocket_server.wait_closed()
+
+    def inference_queue(self):
+        """
+        Returns what the model calls wait in: the worker pool if the pipelines run in worker processes, else the executor.
+        """
+        return self.worker_pool if self.worker_pool is not None else self.executor
+
+    def get_memory_usage(self):
+        """
+        Returns the audio memory accounting of every connected client and the server-wide totals.
+        """
+        clients = {client_id: client.get_memory_usage() for client_id, client in self.connected_clients.items()}
+        total = {
+            "clients": len(clients),
+            "buffered_bytes": sum(c["buffered_bytes"] for c in clients.values()),
+            "scratch_bytes": sum(c["scratch_bytes"] for c in clients.values()),
+            "allocated_bytes": sum(c["allocated_bytes"] for c in clients.values()),
+            "peak_bytes": sum(c["peak_bytes"] for c in clients.values()),
+            "oldest_unprocessed_age_seconds": max((c["oldest_unprocessed_age_seconds"] for c in clients.values()), default=0.0),
+        }
+        return {"total": total, "clients": clients}
+
+    def get_stats(self):
+        """
+        Returns the metrics snapshot, inference queue depths and memory usage as a dict.
+        """
+        self._update_gauges()
+        inference = self.inference_queue()
+        return {
+            "metrics": registry.snapshot(),
+            "executor": inference.get_metrics() if inference is not None else None,
+            "memory": self.get_memory_usage()["total"],
+        }
+
+    def render_metrics(self):
+        """
+        Returns all metrics in the Prometheus text exposition format.
+        """
+        self._update_gauges()
+        return registry.render()
+
+    def _update_gauges(self):
+        inference = self.inference_queue()
+        if inference is not None:
+            for stage, metrics in inference.get_metrics()["stages"].items():
+                INFERENCE_QUEUE_DEPTH.set(metrics["queued"], stage=stage)
+                INFERENCE_RUNNING.set(metrics["running"], stage=stage)
+        BUFFERED_AUDIO_BYTES.set(sum(len(client.audio) for client in self.connected_clients.values()))
+
+    def start_metrics_server(self, host=None, port=9100):
+        """
+        Returns the coroutine starting the HTTP endpoint serving render_metrics(), to run next to start().
+        """
+        print(f"Metrics endpoint ready on http://{host or self.host}:{port}/metrics")
+        return start_metrics_server(host or self.host, port, self.render_metrics)
 
     def start(self):
         if self.certfile:
@@ -80,7 +280,12 @@ class Server:
             
             # Pass the SSL context to the serve function along with the host and port
             # Ensure the secure flag is set to True if using a secure WebSocket protocol (wss://)
-            return websockets.serve(self.handle_websocket, self.host, self.port, ssl=ssl_context)
+            return self._serve(ssl=ssl_context)
         else:
             print(f"WebSocket server ready to accept secure connections on {self.host}:{self.port}")
-            return websockets.serve(self.handle_websocket, self.host, self.port)
+            return self._serve()
+
+    async def _serve(self, **kwargs):
+        # Kept to stop accepting connections on shutdown
+        self.websocket_server = await websockets.serve(self.handle_websocket, self.host, self.port, **kwargs)
+        return self.websocket_server
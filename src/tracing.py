@@ -0,0 +1,187 @@
+import asyncio
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from src.metrics import EVENT_LOOP_LAG
+
+# Client the current task works for, and the track of that client its spans are drawn on
+_client = contextvars.ContextVar("trace_client", default=None)
+_track = contextvars.ContextVar("trace_track", default="receive")
+
+# Returned by Tracer.span while tracing is disabled, entering it does nothing
+_DISABLED_SPAN = contextlib.nullcontext()
+
+class _Span:
+    __slots__ = ("tracer", "name", "args", "track", "start", "token")
+
+    def __init__(self, tracer, name, args, track):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.track = track
+
+    def __enter__(self):
+        self.token = _track.set(self.track) if self.track is not None else None
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer._complete(self.name, self.start, end, self.args)
+        if self.token is not None:
+            _track.reset(self.token)
+        return False
+
+class Tracer:
+    """
+    Opt-in span timers exported in the Chrome trace event format.
+
+    While disabled, `span` returns a shared no-op context manager, so instrumented code only
+    pays for one attribute check. While enabled, every span is recorded as a complete ("X")
+    event. Spans are grouped by client: the receive loop of a connection and the chunk
+    processing tasks of its buffering strategy are drawn as separate tracks, so a slow chunk
+    can be read next to the websocket handling and the inference stages it waited for.
+    The trace opens in chrome://tracing or https://ui.perfetto.dev.
+
+    Attributes:
+        enabled (bool): Whether spans are being recorded.
+        max_events (int): Number of most recent events kept, older ones are dropped.
+    """
+
+    def __init__(self, max_events=200000):
+        self.enabled = False
+        self.max_events = max_events
+        self.events = deque(maxlen=max_events)
+        self._tracks = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def enable(self):
+        """
+        Starts recording spans, dropping the events of any previous recording.
+        """
+        self.clear()
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        with self._lock:
+            self.events.clear()
+            self._tracks = {}
+            self._origin = time.perf_counter()
+
+    def set_client(self, client_id):
+        """
+        Attributes the spans of the current task, and of the tasks it creates, to a client.
+        """
+        _client.set(client_id)
+
+    def span(self, name, track=None, **args):
+        """
+        Returns a context manager timing the enclosed code.
+
+        Args:
+            name (str): Name of the stage.
+            track (str): Track of the current client the span, and the spans nested in it, are drawn on.
+                Defaults to the enclosing span's track.
+            **args: Details shown with the span.
+        """
+        if not self.enabled:
+            return _DISABLED_SPAN
+        return _Span(self, name, args, track)
+
+    def counter(self, name, **values):
+        """
+        Records the current value of one or more series, drawn as a graph over time.
+        """
+        if not self.enabled:
+            return
+        event = {"name": name, "ph": "C", "ts": self._microseconds(time.perf_counter()), "pid": os.getpid(), "tid": 0, "args": values}
+        with self._lock:
+            self.events.append(event)
+
+    def _complete(self, name, start, end, args):
+        if not self.enabled:
+            return
+        client = _client.get()
+        key = (client, _track.get() if client is not None else "server")
+        with self._lock:
+            tid = self._tracks.setdefault(key, len(self._tracks) + 1)
+            event = {"name": name, "ph": "X", "ts": self._microseconds(start), "dur": (end - start) * 1e6, "pid": os.getpid(), "tid": tid}
+            if args:
+                event["args"] = args
+            self.events.append(event)
+
+    def _microseconds(self, timestamp):
+        return (timestamp - self._origin) * 1e6
+
+    def export(self, file_path):
+        """
+        Writes the recorded events to a file in the Chrome trace event JSON format.
+
+        Returns:
+            int: Number of events written.
+        """
+        pid = os.getpid()
+        with self._lock:
+            events = list(self.events)
+            tracks = dict(self._tracks)
+        metadata = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": "VoiceStreamAI"}}]
+        for (client, track), tid in tracks.items():
+            label = track if client is None else f"client {client[:8]} {track}"
+            metadata.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": label}})
+        with open(file_path, "w") as f:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f)
+        return len(events)
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop wakes up a task sleeping for `interval_seconds`.
+
+    A large lag means something is blocking the loop, e.g. inference or file I/O running on it
+    instead of on the executor, which delays every connection at once. Lags are observed in the
+    event loop lag histogram and, while tracing is enabled, recorded as a trace counter.
+
+    Attributes:
+        lags (deque): The most recent `max_samples` lags in seconds, e.g. for a benchmark's percentiles.
+    """
+
+    def __init__(self, interval_seconds=0.1, tracer=None, max_samples=100000):
+        self.interval_seconds = interval_seconds
+        self.tracer = tracer
+        self.lags = deque(maxlen=max_samples)
+        self._task = None
+
+    def start(self):
+        """
+        Starts the monitor on the running event loop.
+        """
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval_seconds
+            await asyncio.sleep(self.interval_seconds)
+            lag = max(0.0, loop.time() - expected)
+            self.lags.append(lag)
+            EVENT_LOOP_LAG.observe(lag)
+            if self.tracer is not None:
+                self.tracer.counter("event_loop_lag", milliseconds=lag * 1000)
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+# Tracer shared by everything running in this process
+tracer = Tracer()
@@ -0,0 +1,155 @@
+import numpy as np
+
+from .vad_interface import VADInterface
+from src.audio_utils import pcm16_to_float32
+
+
+class EnergyVAD(VADInterface):
+    """
+    CPU-only VAD based on frame energy and zero-crossing rate.
+
+    Each frame is classified as speech when its energy is above a threshold and its
+    zero-crossing rate is below a maximum (broadband noise crosses zero much more often
+    than voiced speech). Speech decisions are then held for a hangover period so that
+    short dips between syllables do not split a segment. Everything is vectorized with
+    NumPy, so a few seconds of audio are scored in well under a millisecond and the
+    detection runs inline on the event loop.
+    """
+
+    def __init__(self, **kwargs):
+        """
+        Initializes the energy VAD.
+
+        Args:
+            frame_ms (float): Frame length in milliseconds.
+            energy_threshold_db (float): Minimum frame energy in dBFS to be considered speech.
+            max_zero_crossing_rate (float): Maximum fraction of zero crossings per sample for a speech frame.
+            hangover_ms (float): How long speech is held after the last speech frame.
+            min_speech_ms (float): Speech regions shorter than this are discarded.
+        """
+        self.frame_ms = float(kwargs.get('frame_ms', 30))
+        self.energy_threshold_db = float(kwargs.get('energy_threshold_db', -40))
+        self.max_zero_crossing_rate = float(kwargs.get('max_zero_crossing_rate', 0.35))
+        self.hangover_ms = float(kwargs.get('hangover_ms', 300))
+        self.min_speech_ms = float(kwargs.get('min_speech_ms', 100))
+
+    async def detect_activity(self, client):
+        return await self.detect_audio_activity(pcm16_to_float32(client.scratch_buffer), client.sampling_rate)
+
+    async def detect_audio_activity(self, audio, sampling_rate=16000):
+        frame_length = self._frame_length(sampling_rate)
+        is_speech = self._speech_frames(audio, frame_length)
+        last_speech = self._last_speech_frame(is_speech, -np.inf)
+        smoothed = np.arange(len(is_speech)) - last_speech <= self._hangover_frames()
+
+        frame_seconds = frame_length / sampling_rate
+        min_frames = self.min_speech_ms / 1000 / frame_seconds
+        return [
+            {"start": start * frame_seconds, "end": end * frame_seconds, "confidence": 1.0}
+            for start, end in self._runs(smoothed) if end - start >= min_frames
+        ]
+
+    async def detect_activity_incremental(self, client, min_silence_seconds):
+        """
+        Scores only the whole frames that arrived since the last call, carrying the
+        hangover across calls in `client.vad_state.backend_state`. The minimum speech
+        duration is not applied in this mode since a region may still be growing.
+        """
+        state = client.vad_state
+        frame_length = self._frame_length(client.sampling_rate)
+        total_samples = len(client.scratch_buffer) // client.samples_width
+        new_frames = (total_samples - state.processed_samples) // frame_length
+        if new_frames <= 0:
+            return []
+
+        first_frame = state.processed_samples // frame_length
+        start_byte = state.processed_samples * client.samples_width
+        audio = pcm16_to_float32(client.scratch_buffer[start_byte:start_byte + new_frames * frame_length * client.samples_width])
+        is_speech = self._speech_frames(audio, frame_length)
+
+        previous_last_speech = -np.inf if state.backend_state is None else state.backend_state - first_frame
+        last_speech = self._last_speech_frame(is_speech, previous_last_speech)
+        smoothed = np.arange(new_frames) - last_speech <= self._hangover_frames()
+        if np.isfinite(last_speech[-1]):
+            state.backend_state = int(last_speech[-1]) + first_frame
+
+        frame_seconds = frame_length / client.sampling_rate
+        segments = [
+            {"start": (first_frame + start) * frame_seconds, "end": (first_frame + end) * frame_seconds}
+            for start, end in self._runs(smoothed)
+        ]
+        scored_until = state.processed_samples / client.sampling_rate
+        state.processed_samples += new_frames * frame_length
+        return self.update_stream_state(state, segments, scored_until,
+                                        state.processed_samples / client.sampling_rate, min_silence_seconds)
+
+    def _frame_length(self, sampling_rate):
+        return max(1, int(sampling_rate * self.frame_ms / 1000))
+
+    def _hangover_frames(self):
+        return self.hangover_ms / self.frame_ms
+
+    def _speech_frames(self, audio, frame_length):
+        frame_count = len(audio) // frame_length
+        frames = audio[:frame_count * frame_length].reshape(frame_count, frame_length)
+        energy_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        signs = np.signbit(frames)
+        zero_crossing_rate = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / frame_length
+        return (energy_db > self.energy_threshold_db) & (zero_crossing_rate <= self.max_zero_crossing_rate)
+
+    @staticmethod
+    def _last_speech_frame(is_speech, previous):
+        """
+        For every frame, the index of the most recent speech frame at or before it
+        (relative to the first frame; `previous` is used before the first speech frame).
+        """
+        indices = np.where(is_speech, np.arange(len(is_speech), dtype=np.float64), previous)
+        return np.maximum.accumulate(indices) if len(indices) else indices
+
+    @staticmethod
+    def _runs(mask):
+        """
+        Returns (start, end) frame index pairs of the True runs in a boolean array.
+        """
+        edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+        return zip(np.flatnonzero(edges == 1).tolist(), np.flatnonzero(edges == -1).tolist())
+
+
+class PreGatedVAD(VADInterface):
+    """
+    Runs a cheap VAD first and only calls the heavy VAD when the cheap one hears speech.
+
+    Attributes:
+        gate (VADInterface): The cheap VAD, typically EnergyVAD.
+        vad (VADInterface): The accurate but expensive VAD, e.g. PyannoteVAD.
+        gated_chunks (int): Number of chunks rejected by the gate.
+        passed_chunks (int): Number of chunks forwarded to the heavy VAD.
+    """
+
+    def __init__(self, gate, vad):
+        self.gate = gate
+        self.vad = vad
+        self.gated_chunks = 0
+        self.passed_chunks = 0
+
+    @property
+    def executor(self):
+        return self.vad.executor
+
+    @executor.setter
+    def executor(self, executor):
+        self.vad.executor = executor
+
+    async def detect_activity(self, client):
+        if not await self.gate.detect_activity(client):
+            self.gated_chunks += 1
+            return []
+        self.passed_chunks += 1
+        return await self.vad.detect_activity(client)
+
+    async def detect_audio_activity(self, audio, sampling_rate=16000):
+        if not await self.gate.detect_audio_activity(audio, sampling_rate):
+            self.gated_chunks += 1
+            return []
+        self.passed_chunks += 1
+        return await self.vad.detect_audio_activity(audio, sampling_rate)
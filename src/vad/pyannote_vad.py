@@ -1,12 +1,13 @@
-from os import remove
 import os
 
+import torch
 from pyannote.core import Segment
 from pyannote.audio import Model
 from pyannote.audio.pipelines import VoiceActivityDetection
 
 from .vad_interface import VADInterface
-from src.audio_utils import save_audio_to_file
+from src.audio_utils import save_audio_to_file, pcm16_to_float32
+from src.inference_executor import run_inference
 
 
 class PyannoteVAD(VADInterface):
@@ -21,6 +22,8 @@ class PyannoteVAD(VADInterface):
         Args:
             model_name (str): The model name for Pyannote.
             auth_token (str, optional): Authentication token for Hugging Face.
+            save_audio_files (bool, optional): Debug/recording mode, writes each chunk to a WAV file
+                and runs the pipeline on the file instead of on the in-memory waveform.
         """
         
         model_name = kwargs.get('model_name', "pyannote/segmentation")
@@ -32,15 +35,30 @@ class PyannoteVAD(VADInterface):
         if auth_token is None:
             raise ValueError("Missing required env var in PYANNOTE_AUTH_TOKEN or argument in --vad-args: 'auth_token'")
         
+        self.save_audio_files = kwargs.get('save_audio_files', False)
+
         pyannote_args = kwargs.get('pyannote_args', {"onset": 0.5, "offset": 0.5, "min_duration_on": 0.3, "min_duration_off": 0.3})
         self.model = Model.from_pretrained(model_name, use_auth_token=auth_token)
         self.vad_pipeline = VoiceActivityDetection(segmentation=self.model)
         self.vad_pipeline.instantiate(pyannote_args)
 
     async def detect_activity(self, client):
-        audio_file_path = await save_audio_to_file(client.scratch_buffer, client.get_file_name())
-        vad_results = self.vad_pipeline(audio_file_path)
-        remove(audio_file_path)
+        if self.save_audio_files:
+            audio_file_path = await save_audio_to_file(client.scratch_buffer, client.get_file_name(), sampling_rate=client.sampling_rate, samples_width=client.samples_width)
+            return await run_inference(self.executor, "vad", self._detect, audio_file_path)
+
+        return await self.detect_audio_activity(pcm16_to_float32(client.scratch_buffer), client.sampling_rate)
+
+    async def detect_audio_activity(self, audio, sampling_rate=16000):
+        waveform = torch.from_numpy(audio).unsqueeze(0)
+        return await run_inference(self.executor, "vad", self._detect, {"waveform": waveform, "sample_rate": sampling_rate})
+
+    def _detect(self, audio):
+        """
+        Runs the pyannote pipeline on either a file path or an in-memory
+        {"waveform": (channel, time) tensor, "sample_rate": int} mapping.
+        """
+        vad_results = self.vad_pipeline(audio)
         vad_segments = []
         if len(vad_results) > 0:
             vad_segments = [
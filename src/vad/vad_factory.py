@@ -1,4 +1,4 @@
-from .pyannote_vad import PyannoteVAD
+from .energy_vad import EnergyVAD, PreGatedVAD
 
 class VADFactory:
     """
@@ -11,13 +11,27 @@ class VADFactory:
         Creates a VAD pipeline based on the specified type.
 
         Args:
-            type (str): The type of VAD pipeline to create (e.g., 'pyannote').
-            kwargs: Additional arguments for the VAD pipeline creation.
+            type (str): The type of VAD pipeline to create (e.g., 'pyannote', 'energy').
+            kwargs: Additional arguments for the VAD pipeline creation. A 'pre_gate' entry with
+                EnergyVAD arguments puts an energy VAD in front of the pipeline, so that
+                silent chunks never reach it.
 
         Returns:
             VADInterface: An instance of a class that implements VADInterface.
         """
+        pre_gate_args = kwargs.pop('pre_gate', None)
+        vad_pipeline = VADFactory._create_backend(type, **kwargs)
+        if pre_gate_args is not None:
+            return PreGatedVAD(EnergyVAD(**pre_gate_args), vad_pipeline)
+        return vad_pipeline
+
+    @staticmethod
+    def _create_backend(type, **kwargs):
         if type == "pyannote":
+            # Imported lazily so that the energy VAD works without torch/pyannote installed
+            from .pyannote_vad import PyannoteVAD
             return PyannoteVAD(**kwargs)
+        if type == "energy":
+            return EnergyVAD(**kwargs)
         else:
             raise ValueError(f"Unknown VAD pipeline type: {type}")
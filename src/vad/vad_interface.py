@@ -1,8 +1,16 @@
+from src.audio_utils import pcm16_to_float32
+
 class VADInterface:
     """
     Interface for voice activity detection (VAD) systems.
     """
 
+    # InferenceExecutor the blocking model calls run on, None means the event loop's default pool
+    executor = None
+
+    # Seconds of already scored audio re-analysed in front of new frames in incremental mode
+    incremental_context_seconds = 2.0
+
     async def detect_activity(self, client):
         """
         Detects voice activity in the given audio data.
@@ -14,3 +22,79 @@ class VADInterface:
             List: VAD result, a list of objects containing "start", "end", "confidence"
         """
         raise NotImplementedError("This method should be implemented by subclasses.")
+
+    async def detect_audio_activity(self, audio, sampling_rate=16000):
+        """
+        Detects voice activity in an in-memory waveform.
+
+        Args:
+            audio (numpy.ndarray): Mono float32 samples in [-1.0, 1.0).
+            sampling_rate (int): The sampling rate of the audio in Hz.
+
+        Returns:
+            List: VAD result, a list of objects containing "start", "end", "confidence"
+        """
+        raise NotImplementedError("This method should be implemented by subclasses.")
+
+    async def detect_activity_incremental(self, client, min_silence_seconds):
+        """
+        Scores only the audio that arrived in the client's scratch buffer since the last call.
+
+        The per-stream state lives in `client.vad_state`. This default implementation runs
+        `detect_audio_activity` over the new frames plus `incremental_context_seconds` of
+        already scored audio, so the cost per call no longer grows with the utterance length.
+
+        Args:
+            client (src.Client): The client to detect on
+            min_silence_seconds (float): Silence needed after speech before a speech end is emitted.
+
+        Returns:
+            List: Events, objects containing "type" ("speech_start" or "speech_end") and "time"
+        """
+        state = client.vad_state
+        total_samples = len(client.scratch_buffer) // client.samples_width
+        if total_samples <= state.processed_samples:
+            return []
+
+        window_start = max(0, state.processed_samples - int(self.incremental_context_seconds * client.sampling_rate))
+        audio = pcm16_to_float32(client.scratch_buffer[window_start * client.samples_width:total_samples * client.samples_width])
+        segments = await self.detect_audio_activity(audio, client.sampling_rate)
+
+        offset = window_start / client.sampling_rate
+        segments = [{"start": s["start"] + offset, "end": s["end"] + offset} for s in segments]
+        events = self.update_stream_state(state, segments, state.processed_samples / client.sampling_rate,
+                                          total_samples / client.sampling_rate, min_silence_seconds)
+        state.processed_samples = total_samples
+        return events
+
+    @staticmethod
+    def update_stream_state(state, segments, scored_until, buffer_end, min_silence_seconds):
+        """
+        Folds newly detected speech segments into the stream state and returns the resulting events.
+
+        Args:
+            state (VADStreamState): The per-client state to update.
+            segments (list): Speech segments with "start" and "end" on the scratch buffer timeline.
+            scored_until (float): Time up to which audio had already been scored; segments ending before it are ignored.
+            buffer_end (float): Time of the last sample scored by this call.
+            min_silence_seconds (float): Silence needed after speech before a speech end is emitted.
+        """
+        events = []
+        for segment in segments:
+            if segment["end"] <= scored_until:
+                continue
+            if state.in_speech and segment["start"] - state.last_speech_end >= min_silence_seconds:
+                events.append({"type": "speech_end", "time": state.last_speech_end})
+                state.in_speech = False
+            if not state.in_speech:
+                start = segment["start"] if state.last_speech_end is None else max(segment["start"], state.last_speech_end)
+                events.append({"type": "speech_start", "time": start})
+                state.in_speech = True
+                if state.speech_start is None:
+                    state.speech_start = start
+            state.last_speech_end = segment["end"] if state.last_speech_end is None else max(state.last_speech_end, segment["end"])
+
+        if state.in_speech and buffer_end - state.last_speech_end >= min_silence_seconds:
+            events.append({"type": "speech_end", "time": state.last_speech_end})
+            state.in_speech = False
+        return events
@@ -0,0 +1,37 @@
+class VADStreamState:
+    """
+    Per-client state of an incremental (streaming) VAD.
+
+    Times are in seconds on the timeline of the client's scratch buffer, and the
+    state is reset whenever the scratch buffer is cleared.
+
+    Attributes:
+        processed_samples (int): Number of scratch buffer samples already scored.
+        in_speech (bool): Whether the stream is currently inside a speech region.
+        speech_start (float): Start of the first speech region since the last reset, None if no speech yet.
+        last_speech_end (float): End of the most recent speech seen so far.
+        backend_state: Opaque state a VAD implementation may keep between calls.
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.processed_samples = 0
+        self.in_speech = False
+        self.speech_start = None
+        self.last_speech_end = None
+        self.backend_state = None
+
+    def shift(self, samples, sampling_rate):
+        """
+        Moves the timeline back after the given number of samples were dropped from the
+        head of the scratch buffer. The backend state is discarded since its meaning is
+        up to the VAD implementation.
+        """
+        seconds = samples / sampling_rate
+        self.processed_samples = max(0, self.processed_samples - samples)
+        if self.speech_start is not None:
+            self.speech_start = max(0.0, self.speech_start - seconds)
+        if self.last_speech_end is not None:
+            self.last_speech_end -= seconds
+        self.backend_state = None
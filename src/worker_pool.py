@@ -0,0 +1,385 @@
+import asyncio
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from .asr.asr_interface import ASRInterface
+from .vad.vad_interface import VADInterface
+
+def _attach_shared_memory(name):
+    """
+    Attaches to a shared memory block created by the front end without letting this
+    process' resource tracker take ownership of (and later unlink) it.
+    """
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 has no track argument
+        shm = SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+def _worker_main(index, requests, results, vad_type, vad_args, asr_type, asr_args, sampling_rate, samples_width, max_buffer_seconds, warmup_seconds):
+    """
+    Entry point of a worker process: loads its own models, then serves jobs until it receives None.
+
+    Clients are pinned to a worker, so the worker keeps one Client object per stream and any
+    per-stream state the pipelines store on it stays in this process. Shared memory blocks the
+    front end reuses stay attached between jobs.
+    """
+    # Imported in the worker so that the front end does not load model dependencies
+    from src.client import Client
+    from src.model_registry import model_registry
+
+    loop = asyncio.new_event_loop()
+    try:
+        vad_pipeline = model_registry.get_vad_pipeline(vad_type, **vad_args)
+        asr_pipeline = model_registry.get_asr_pipeline(asr_type, **asr_args)
+        if warmup_seconds > 0:
+            loop.run_until_complete(model_registry.warm_up(warmup_seconds, sampling_rate))
+    except Exception as e:
+        results.put((None, False, {"worker": index, "error": f"{type(e).__name__}: {e}"}))
+        return
+    results.put((None, True, {"worker": index, "timings": model_registry.timings}))
+
+    clients = {}
+    attached = {}
+    while True:
+        message = requests.get()
+        if message is None:
+            break
+
+        job_id, op, client_id, shm_name, length, config, reused = message
+        if op == "release":
+            clients.pop(client_id, None)
+            continue
+
+        shm = None
+        try:
+            shm = attached.get(shm_name)
+            if shm is None:
+                shm = _attach_shared_memory(shm_name)
+                if reused:
+                    attached[shm_name] = shm
+            data = shm.buf[:length]
+            if op == "vad_audio":
+                audio = np.frombuffer(data, dtype=np.float32).copy()
+                result = loop.run_until_complete(vad_pipeline.detect_audio_activity(audio, sampling_rate))
+            else:
+                client = clients.get(client_id)
+                if client is None:
+                    client = clients[client_id] = Client(client_id, sampling_rate, samples_width, max_buffer_seconds)
+                client.config['language'] = config['language']
+                client.prompt = config['prompt']
+                client.scratch_buffer = data
+                if op == "vad":
+                    result = loop.run_until_complete(vad_pipeline.detect_activity(client))
+                else:
+                    result = loop.run_until_complete(asr_pipeline.transcribe(client))
+            del data
+            results.put((job_id, True, result))
+        except Exception as e:
+            results.put((job_id, False, f"{type(e).__name__}: {e}"))
+        finally:
+            if shm is not None and shm_name not in attached:
+                shm.close()
+    for shm in attached.values():
+        shm.close()
+
+class WorkerPool:
+    """
+    Shards clients across worker processes, each holding its own VAD and ASR models.
+
+    The websocket front end stays in the main process. Every VAD/ASR job copies its audio
+    into a shared memory block and sends only the block's name to the worker, so audio is
+    never pickled through a pipe. Blocks of `max_buffer_seconds` of audio are reused across
+    jobs once the worker answered, only larger inputs get a block of their own. A client is
+    pinned to one worker, the least loaded one when it first shows up, for as long as it is
+    connected. If a worker process dies, its pending jobs fail and its clients are pinned to
+    the remaining workers.
+
+    The CPU cores are split between the workers: unless `cpu_threads` is set in the
+    faster_whisper arguments, each worker's model gets its share of the cores.
+
+    Like InferenceExecutor, the pool reports its pending jobs per stage and is saturated once
+    `max_queue_size` jobs wait for a worker's answer.
+
+    Attributes:
+        num_workers (int): Number of worker processes.
+        max_queue_size (int): Number of pending jobs at which the pool is saturated.
+        assignments (dict): Client ID -> index of the worker it is pinned to.
+        dead_workers (set): Indices of the worker processes that exited unexpectedly.
+    """
+
+    # Seconds between two checks that the worker processes are still alive
+    liveness_interval_seconds = 0.5
+
+    def __init__(self, num_workers, vad_type, vad_args, asr_type, asr_args, sampling_rate=16000, samples_width=2, max_buffer_seconds=30, warmup_seconds=1.0, max_queue_size=64):
+        self.num_workers = num_workers
+        self.max_queue_size = max_queue_size
+        self.sampling_rate = sampling_rate
+        if asr_type == "faster_whisper" and not asr_args.get('cpu_threads'):
+            threads = (os.cpu_count() or 1) // (num_workers * int(asr_args.get('num_workers', 1)))
+            asr_args = {**asr_args, "cpu_threads": max(1, threads)}
+        context = multiprocessing.get_context("spawn")
+        self.requests = [context.Queue() for _ in range(num_workers)]
+        self.results = context.Queue()
+        self.processes = [
+            context.Process(target=_worker_main, daemon=True, name=f"voicestreamai-worker-{i}",
+                            args=(i, self.requests[i], self.results, vad_type, vad_args, asr_type, asr_args,
+                                  sampling_rate, samples_width, max_buffer_seconds, warmup_seconds))
+            for i in range(num_workers)
+        ]
+        self.assignments = {}
+        self.dead_workers = set()
+        self._clients_per_worker = [0] * num_workers
+        self._pending_per_worker = [0] * num_workers
+        self._jobs = {}
+        self._jobs_lock = threading.Lock()
+        self._job_ids = itertools.count()
+        self._reader = None
+        self._closing = False
+        self.segment_size = int(max_buffer_seconds * sampling_rate) * samples_width
+        self._free_segments = []
+
+    def start(self):
+        """
+        Starts the worker processes and blocks until every one has loaded its models.
+        """
+        start = time.time()
+        for process in self.processes:
+            process.start()
+        for _ in self.processes:
+            _, ok, info = self.results.get()
+            if not ok:
+                self.shutdown()
+                raise RuntimeError(f"Worker {info['worker']} failed to load its models: {info['error']}")
+            details = ", ".join(f"{name} load {t.get('load_seconds', 0):.2f}s" for name, t in info["timings"].items())
+            print(f"Worker {info['worker']} ready: {details}")
+        print(f"{self.num_workers} workers ready in {time.time() - start:.2f}s")
+
+        self._reader = threading.Thread(target=self._read_results, name="worker-pool-results", daemon=True)
+        self._reader.start()
+
+    def _read_results(self):
+        checked_at = time.monotonic()
+        while True:
+            try:
+                message = self.results.get(timeout=self.liveness_interval_seconds)
+            except queue.Empty:
+                message = ()
+            if message is None:
+                break
+            if message:
+                job_id, ok, payload = message
+                with self._jobs_lock:
+                    job = self._jobs.pop(job_id, None)
+                if job is not None:
+                    job["loop"].call_soon_threadsafe(self._finish_job, job, ok, payload)
+            if time.monotonic() - checked_at >= self.liveness_interval_seconds:
+                checked_at = time.monotonic()
+                self._check_workers()
+
+    def _check_workers(self):
+        if self._closing:
+            return
+        for index, process in enumerate(self.processes):
+            if index not in self.dead_workers and not process.is_alive():
+                self._worker_died(index, process.exitcode)
+
+    def _worker_died(self, index, exitcode=None):
+        """
+        Fails the pending jobs of a worker process that exited. Its shared memory blocks are
+        freed, since nothing reads them anymore.
+        """
+        print(f"Worker {index} exited unexpectedly (exit code {exitcode}), failing its pending jobs")
+        self.dead_workers.add(index)
+        with self._jobs_lock:
+            jobs = [job for job in self._jobs.values() if job["worker"] == index]
+            for job_id in [job_id for job_id, job in self._jobs.items() if job["worker"] == index]:
+                del self._jobs[job_id]
+        for job in jobs:
+            job["loop"].call_soon_threadsafe(self._finish_job, job, False, f"worker {index} exited")
+
+    def _finish_job(self, job, ok, payload):
+        # The worker is done with the block, whether or not anybody still waits for the result
+        self._release_segment(job["shm"], job["reused"])
+        future = job["future"]
+        if future.done():
+            return
+        if ok:
+            future.set_result(payload)
+        else:
+            future.set_exception(RuntimeError(f"Worker job failed: {payload}"))
+
+    def _acquire_segment(self, size):
+        """
+        Returns a shared memory block of at least `size` bytes and whether it is one of the reused ones.
+        """
+        if size > self.segment_size:
+            return SharedMemory(create=True, size=max(1, size)), False
+        if self._free_segments:
+            return self._free_segments.pop(), True
+        return SharedMemory(create=True, size=max(1, self.segment_size)), True
+
+    def _release_segment(self, shm, reused):
+        if reused and not self._closing:
+            self._free_segments.append(shm)
+            return
+        shm.close()
+        shm.unlink()
+
+    def worker_for(self, client_id):
+        """
+        Returns the index of the worker the client is pinned to, pinning it to the least loaded
+        live one if needed, or if its worker died.
+        """
+        index = self.assignments.get(client_id)
+        if index is not None and index in self.dead_workers:
+            self._clients_per_worker[index] -= 1
+            index = None
+        if index is None:
+            alive = [i for i in range(self.num_workers) if i not in self.dead_workers]
+            if not alive:
+                raise RuntimeError("No worker process is alive")
+            index = min(alive, key=lambda i: self._clients_per_worker[i])
+            self.assignments[client_id] = index
+            self._clients_per_worker[index] += 1
+        return index
+
+    def release(self, client_id):
+        """
+        Unpins a disconnected client and lets its worker drop the per-stream state.
+        """
+        index = self.assignments.pop(client_id, None)
+        if index is not None:
+            self._clients_per_worker[index] -= 1
+            if index not in self.dead_workers:
+                self.requests[index].put((None, "release", client_id, None, 0, None, False))
+
+    async def submit(self, client, op, data):
+        """
+        Runs a job on the client's worker and returns its result.
+
+        Args:
+            client (Client): The client the job belongs to, None for stateless jobs which go to
+                the worker with the fewest pending jobs.
+            op (str): 'vad', 'vad_audio' or 'asr'.
+            data (bytes-like): PCM audio for 'vad'/'asr', float32 samples for 'vad_audio'.
+        """
+        data = memoryview(data).cast('B')
+        if client is None:
+            alive = [i for i in range(self.num_workers) if i not in self.dead_workers]
+            if not alive:
+                raise RuntimeError("No worker process is alive")
+            index = min(alive, key=lambda i: self._pending_per_worker[i])
+            client_id, config = None, None
+        else:
+            index = self.worker_for(client.client_id)
+            client_id, config = client.client_id, {"language": client.config.get('language'), "prompt": client.prompt}
+
+        shm, reused = self._acquire_segment(len(data))
+        shm.buf[:len(data)] = data
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        job_id = next(self._job_ids)
+        # The block is released when the worker answers, not when the caller stops waiting
+        with self._jobs_lock:
+            self._jobs[job_id] = {"future": future, "loop": loop, "worker": index, "op": op, "shm": shm, "reused": reused}
+        self._pending_per_worker[index] += 1
+        try:
+            self.requests[index].put((job_id, op, client_id, shm.name, len(data), config, reused))
+            return await future
+        finally:
+            self._pending_per_worker[index] -= 1
+
+    def pending(self):
+        """
+        Returns the number of jobs the workers have not answered yet, including jobs whose caller stopped waiting.
+        """
+        with self._jobs_lock:
+            return len(self._jobs)
+
+    def is_saturated(self):
+        """
+        Returns True when `max_queue_size` jobs are pending.
+        """
+        return self.pending() >= self.max_queue_size
+
+    def get_metrics(self):
+        """
+        Returns a snapshot of the pending jobs per stage, in the format of InferenceExecutor.get_metrics.
+
+        A worker runs its jobs in order, so its oldest pending job is the running one.
+        """
+        stages = {stage: {"queued": 0, "running": 0} for stage in ("vad", "asr")}
+        busy = set()
+        with self._jobs_lock:
+            for job_id in sorted(self._jobs):
+                job = self._jobs[job_id]
+                metrics = stages["asr" if job["op"] == "asr" else "vad"]
+                if job["worker"] in busy:
+                    metrics["queued"] += 1
+                else:
+                    busy.add(job["worker"])
+                    metrics["running"] += 1
+        return {
+            "kind": "workers",
+            "max_workers": self.num_workers,
+            "max_queue_size": self.max_queue_size,
+            "pending": sum(m["queued"] + m["running"] for m in stages.values()),
+            "stages": stages,
+        }
+
+    def shutdown(self):
+        self._closing = True
+        for requests in self.requests:
+            requests.put(None)
+        for process in self.processes:
+            if process.pid is not None:
+                process.join(timeout=5)
+        self.results.put(None)
+        with self._jobs_lock:
+            segments = self._free_segments + [job["shm"] for job in self._jobs.values()]
+        for shm in segments:
+            shm.close()
+            shm.unlink()
+        self._free_segments = []
+
+class WorkerVADProxy(VADInterface):
+    """
+    VADInterface running detection in the client's worker process.
+
+    The incremental VAD state stays on the front end's Client; only the windows to score are sent.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def detect_activity(self, client):
+        return await self.pool.submit(client, "vad", client.scratch_buffer)
+
+    async def detect_audio_activity(self, audio, sampling_rate=16000):
+        return await self.pool.submit(None, "vad_audio", np.ascontiguousarray(audio, dtype=np.float32))
+
+class WorkerASRProxy(ASRInterface):
+    """
+    ASRInterface transcribing in the client's worker process.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def transcribe(self, client):
+        return await self.pool.submit(client, "asr", client.scratch_buffer)
+
+    async def transcribe_batch(self, clients):
+        # Clients are spread over the workers, so they are transcribed in parallel
+        return await asyncio.gather(*[self.transcribe(client) for client in clients])
@@ -5,7 +5,7 @@ import asyncio
 from sentence_transformers import SentenceTransformer, util
 from pydub import AudioSegment
 import argparse
-from src.asr.asr_factory import ASRFactory
+from src.model_registry import model_registry
 from src.client import Client
 
 class TestWhisperASR(unittest.TestCase):
@@ -15,7 +15,7 @@ class TestWhisperASR(unittest.TestCase):
         cls.asr_type = os.getenv('ASR_TYPE', 'whisper')
 
     def setUp(self):
-        self.asr = ASRFactory.create_asr_pipeline(self.asr_type)
+        self.asr = model_registry.get_asr_pipeline(self.asr_type)
         self.annotations_path = os.path.join(os.path.dirname(__file__), "../audio_files/annotations.json")
         self.client = Client("test_client", 16000, 2)  # Example client
         self.similarity_model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
@@ -53,7 +53,7 @@ class TestWhisperASR(unittest.TestCase):
                 print(f"Actual: {transcription}")
                 print(f"Similarity: {similarity}")
 
-                self.client.scratch_buffer.clear()
+                self.client.clear_scratch_buffer()
 
             # Calculate average similarity for the file
             avg_similarity = sum(similarities) / len(similarities)
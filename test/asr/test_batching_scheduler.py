@@ -0,0 +1,78 @@
+import unittest
+import asyncio
+
+from src.asr.asr_interface import ASRInterface
+from src.asr.batching_scheduler import BatchingScheduler
+
+class FakeClient:
+    def __init__(self, client_id):
+        self.client_id = client_id
+
+class FakeBatchASR(ASRInterface):
+    """
+    ASR backend that records the size of every batch it is asked to transcribe.
+    """
+    def __init__(self, service_time=0.0):
+        self.service_time = service_time
+        self.batch_sizes = []
+
+    async def transcribe_batch(self, clients):
+        self.batch_sizes.append(len(clients))
+        await asyncio.sleep(self.service_time)
+        return [{"text": client.client_id} for client in clients]
+
+class TestBatchingScheduler(unittest.TestCase):
+    def test_requests_within_window_are_batched_and_routed_back(self):
+        backend = FakeBatchASR()
+        scheduler = BatchingScheduler(backend, max_batch_size=8, max_wait_ms=50)
+        clients = [FakeClient(f"client_{i}") for i in range(5)]
+
+        async def run():
+            return await asyncio.gather(*[scheduler.transcribe(c) for c in clients])
+
+        results = asyncio.run(run())
+
+        self.assertEqual(backend.batch_sizes, [5])
+        self.assertEqual([r["text"] for r in results], [c.client_id for c in clients])
+
+    def test_max_batch_size_splits_batches(self):
+        backend = FakeBatchASR()
+        scheduler = BatchingScheduler(backend, max_batch_size=4, max_wait_ms=50)
+
+        async def run():
+            return await asyncio.gather(*[scheduler.transcribe(FakeClient(str(i))) for i in range(10)])
+
+        asyncio.run(run())
+
+        self.assertEqual(backend.batch_sizes, [4, 4, 2])
+        self.assertEqual(scheduler.get_metrics()["requests"], 10)
+
+    def test_late_request_goes_into_next_batch(self):
+        backend = FakeBatchASR()
+        scheduler = BatchingScheduler(backend, max_batch_size=8, max_wait_ms=10)
+
+        async def run():
+            first = asyncio.create_task(scheduler.transcribe(FakeClient("a")))
+            await asyncio.sleep(0.05)
+            second = asyncio.create_task(scheduler.transcribe(FakeClient("b")))
+            await asyncio.gather(first, second)
+
+        asyncio.run(run())
+
+        self.assertEqual(backend.batch_sizes, [1, 1])
+
+    def test_backend_errors_reach_every_caller(self):
+        class FailingASR(ASRInterface):
+            async def transcribe_batch(self, clients):
+                raise RuntimeError("model crashed")
+
+        scheduler = BatchingScheduler(FailingASR(), max_batch_size=2, max_wait_ms=10)
+
+        async def run():
+            return await asyncio.gather(scheduler.transcribe(FakeClient("a")), scheduler.transcribe(FakeClient("b")), return_exceptions=True)
+
+        results = asyncio.run(run())
+        self.assertTrue(all(isinstance(r, RuntimeError) for r in results))
+
+if __name__ == '__main__':
+    unittest.main()
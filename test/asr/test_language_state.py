@@ -0,0 +1,26 @@
+import unittest
+import time
+
+from src.asr.language_state import LanguageState
+
+class TestLanguageState(unittest.TestCase):
+    def test_only_confident_detections_stick(self):
+        state = LanguageState()
+        state.update("it", 0.5, min_probability=0.8)
+        self.assertIsNone(state.current())
+
+        state.update("it", 0.95, min_probability=0.8)
+        self.assertEqual(state.current(), "it")
+
+    def test_detection_expires(self):
+        state = LanguageState()
+        state.update("en", 0.99, min_probability=0.8)
+        self.assertEqual(state.current(max_age_seconds=10), "en")
+
+        time.sleep(0.02)
+        self.assertIsNone(state.current(max_age_seconds=0.01))
+        # Expiry forgets the language for good, not only for that call
+        self.assertIsNone(state.current())
+
+if __name__ == '__main__':
+    unittest.main()
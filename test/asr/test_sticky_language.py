@@ -0,0 +1,96 @@
+import unittest
+import asyncio
+import importlib.util
+import time
+from types import SimpleNamespace
+
+from src.client import Client
+
+class StubWhisperModel:
+    """
+    Stands in for faster-whisper's WhisperModel, recording the language of every call.
+    """
+    def __init__(self, language="it", language_probability=0.95, word_probability=0.9):
+        self.language = language
+        self.language_probability = language_probability
+        self.word_probability = word_probability
+        self.languages = []
+
+    def transcribe(self, audio, word_timestamps, language, initial_prompt):
+        self.languages.append(language)
+        word = SimpleNamespace(word=" ciao", start=0.0, end=0.5, probability=self.word_probability)
+        info = SimpleNamespace(language=language or self.language, language_probability=1.0 if language else self.language_probability)
+        return iter([SimpleNamespace(text=" ciao", words=[word])]), info
+
+@unittest.skipUnless(importlib.util.find_spec("faster_whisper"), "faster-whisper is not installed")
+class TestStickyLanguage(unittest.TestCase):
+    def create_asr(self, model, **kwargs):
+        from src.asr.faster_whisper_asr import FasterWhisperASR
+        # Built without loading a model, only the language settings and the pipeline are needed
+        asr = FasterWhisperASR.__new__(FasterWhisperASR)
+        asr.save_audio_files = False
+        asr.sticky_language = True
+        asr.language_min_probability = kwargs.get('language_min_probability', 0.8)
+        asr.language_redetect_seconds = kwargs.get('language_redetect_seconds', 300)
+        asr.language_min_word_probability = kwargs.get('language_min_word_probability', 0.4)
+        asr.asr_pipeline = model
+        return asr
+
+    def transcribe(self, asr, client, times):
+        client.scratch_buffer = bytes(3200)
+
+        async def run():
+            for _ in range(times):
+                await asr.transcribe(client)
+
+        asyncio.run(run())
+
+    def test_confident_detection_becomes_sticky(self):
+        model = StubWhisperModel(language_probability=0.95)
+        asr, client = self.create_asr(model), Client("test_client", 16000, 2)
+        self.transcribe(asr, client, 2)
+
+        self.assertEqual(model.languages, [None, "it"])
+        self.assertEqual(asr.effective_language(client), "it")
+
+        model = StubWhisperModel(language_probability=0.5)
+        asr, client = self.create_asr(model), Client("test_client", 16000, 2)
+        self.transcribe(asr, client, 2)
+        self.assertEqual(model.languages, [None, None])
+
+    def test_low_word_probability_resets_the_sticky_language(self):
+        model = StubWhisperModel()
+        asr, client = self.create_asr(model), Client("test_client", 16000, 2)
+        self.transcribe(asr, client, 1)
+        self.assertEqual(asr.effective_language(client), "it")
+
+        model.word_probability = 0.1
+        self.transcribe(asr, client, 2)
+        # The poorly recognized chunk was decoded in Italian, the next one detects again
+        self.assertEqual(model.languages, [None, "it", None])
+
+    def test_configured_language_bypasses_stickiness(self):
+        model = StubWhisperModel()
+        asr, client = self.create_asr(model), Client("test_client", 16000, 2)
+        client.config['language'] = "English"
+        self.transcribe(asr, client, 2)
+
+        self.assertEqual(model.languages, ["en", "en"])
+        self.assertIsNone(client.language_state.language)
+
+        client.config['language'] = None
+        self.assertIsNone(asr.effective_language(client))
+
+    def test_sticky_language_expires(self):
+        model = StubWhisperModel()
+        asr, client = self.create_asr(model, language_redetect_seconds=0.01), Client("test_client", 16000, 2)
+        self.transcribe(asr, client, 1)
+        self.assertEqual(asr.effective_language(client), "it")
+
+        time.sleep(0.02)
+        self.assertIsNone(asr.effective_language(client))
+        self.transcribe(asr, client, 1)
+        self.assertEqual(model.languages, [None, None])
+
+if __name__ == '__main__':
+    unittest.main()
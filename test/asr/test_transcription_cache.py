@@ -0,0 +1,119 @@
+import unittest
+import asyncio
+import time
+
+from src.asr.asr_interface import ASRInterface
+from src.asr.transcription_cache import TranscriptionCache
+from src.client import Client
+
+class CountingASR(ASRInterface):
+    """
+    ASR backend that counts its transcriptions and returns the buffer length as text.
+    """
+    model_name = "counting"
+
+    def __init__(self, service_time=0.0):
+        self.service_time = service_time
+        self.calls = 0
+
+    async def transcribe(self, client):
+        self.calls += 1
+        await asyncio.sleep(self.service_time)
+        return {"text": str(len(client.scratch_buffer)), "language": client.config['language']}
+
+class StickyLanguageASR(CountingASR):
+    """
+    Transcribes clients without a configured language in their detected language, like faster-whisper.
+    """
+    def effective_language(self, client):
+        return client.config['language'] or client.language_state.current()
+
+def make_client(audio, language=None):
+    client = Client("test_client", 16000, 2)
+    client.config['language'] = language
+    client.scratch_buffer = audio
+    return client
+
+class TestTranscriptionCache(unittest.TestCase):
+    def test_repeated_audio_is_answered_from_the_cache(self):
+        backend = CountingASR()
+        cache = TranscriptionCache(backend)
+
+        async def run():
+            first = await cache.transcribe(make_client(b"\x01\x00" * 800))
+            first['processing_time'] = 1.0
+            second = await cache.transcribe(make_client(b"\x01\x00" * 800))
+            await cache.transcribe(make_client(b"\x01\x00" * 800, language="italian"))
+            await cache.transcribe(make_client(b"\x02\x00" * 800))
+            return second
+
+        second = asyncio.run(run())
+        self.assertEqual(backend.calls, 3)
+        self.assertEqual(cache.get_metrics()["hits"], 1)
+        self.assertEqual(cache.get_metrics()["misses"], 3)
+        # Callers annotating their result do not change the cached one
+        self.assertNotIn('processing_time', second)
+
+    def test_concurrent_identical_requests_decode_once(self):
+        backend = CountingASR(service_time=0.05)
+        cache = TranscriptionCache(backend)
+
+        async def run():
+            return await asyncio.gather(*[cache.transcribe(make_client(bytes(3200))) for _ in range(4)])
+
+        results = asyncio.run(run())
+        self.assertEqual(backend.calls, 1)
+        self.assertEqual([r["text"] for r in results], ["3200"] * 4)
+
+    def test_cancelled_decoding_is_taken_over_by_a_waiting_caller(self):
+        backend = CountingASR(service_time=0.05)
+        cache = TranscriptionCache(backend)
+
+        async def run():
+            leader = asyncio.create_task(cache.transcribe(make_client(bytes(3200))))
+            await asyncio.sleep(0.01)
+            follower = asyncio.create_task(cache.transcribe(make_client(bytes(3200))))
+            await asyncio.sleep(0.01)
+            # The leader's client disconnected
+            leader.cancel()
+            return await follower
+
+        result = asyncio.run(run())
+        self.assertEqual(result["text"], "3200")
+        self.assertEqual(backend.calls, 2)
+
+    def test_entries_are_evicted_and_expire(self):
+        backend = CountingASR()
+        cache = TranscriptionCache(backend, max_entries=2, ttl_seconds=0.05)
+
+        async def run():
+            for value in (1, 2, 3, 1):
+                await cache.transcribe(make_client(bytes([value, 0]) * 100))
+            self.assertEqual(backend.calls, 4)
+            await cache.transcribe(make_client(bytes([3, 0]) * 100))
+            self.assertEqual(backend.calls, 4)
+            time.sleep(0.06)
+            await cache.transcribe(make_client(bytes([3, 0]) * 100))
+            self.assertEqual(backend.calls, 5)
+
+        asyncio.run(run())
+        self.assertLessEqual(cache.get_metrics()["entries"], 2)
+        self.assertEqual(cache.size_bytes, sum(size for _, size, _ in cache._entries.values()))
+
+    def test_key_uses_the_detected_language(self):
+        backend = StickyLanguageASR()
+        cache = TranscriptionCache(backend)
+        german, french = make_client(b"\x01\x00" * 800), make_client(b"\x01\x00" * 800)
+        german.language_state.update("de", 0.9, 0.8)
+        french.language_state.update("fr", 0.9, 0.8)
+
+        async def run():
+            await cache.transcribe(german)
+            await cache.transcribe(french)
+            await cache.transcribe(make_client(b"\x01\x00" * 800, language="de"))
+
+        asyncio.run(run())
+        self.assertEqual(backend.calls, 2)
+
+if __name__ == '__main__':
+    unittest.main()
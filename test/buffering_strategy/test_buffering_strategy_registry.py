@@ -0,0 +1,100 @@
+import unittest
+import asyncio
+
+import numpy as np
+
+from src.client import Client
+from src.buffering_strategy.buffering_strategies import FixedInterval
+from src.buffering_strategy.buffering_strategy_factory import BufferingStrategyFactory
+from src.buffering_strategy.buffering_strategy_interface import BufferingStrategyInterface
+from src.buffering_strategy.buffering_strategy_registry import register_buffering_strategy, registered_strategies
+from src.vad.energy_vad import EnergyVAD
+from .test_partial_transcription import FakeWordASR, stream_tone
+from .test_silence_at_end_of_chunk import FakeWebSocket, SlowSilentVAD
+
+class TestBufferingStrategyRegistry(unittest.TestCase):
+    def test_registered_strategy_can_be_created(self):
+        @register_buffering_strategy("test_strategy")
+        class TestStrategy(BufferingStrategyInterface):
+            def __init__(self, client, **kwargs):
+                self.client = client
+                self.kwargs = kwargs
+                self.tasks = set()
+
+        try:
+            client = Client("test_client", 16000, 2)
+            strategy = BufferingStrategyFactory.create_buffering_strategy("test_strategy", client, option=1)
+            self.assertIsInstance(strategy, TestStrategy)
+            self.assertEqual(strategy.kwargs, {"option": 1})
+        finally:
+            del registered_strategies["test_strategy"]
+
+    def test_unknown_strategy_lists_the_available_ones(self):
+        with self.assertRaisesRegex(ValueError, "silence_at_end_of_chunk"):
+            BufferingStrategyFactory.create_buffering_strategy("unknown", Client("test_client", 16000, 2))
+
+class TestStrategySwap(unittest.TestCase):
+    def test_same_config_keeps_the_strategy(self):
+        client = Client("test_client", 16000, 2)
+        strategy = client.buffering_strategy
+        client.update_config({"language": "english", "processing_args": dict(client.config["processing_args"])})
+
+        self.assertIs(client.buffering_strategy, strategy)
+
+    def test_swap_keeps_audio_and_waits_for_the_chunk_in_flight(self):
+        client = Client("test_client", 16000, 2)
+        client.update_config({"processing_args": {"chunk_length_seconds": 0.5, "chunk_offset_seconds": 0.1}})
+        websocket, vad = FakeWebSocket(), SlowSilentVAD()
+
+        async def run():
+            client.append_audio_data(bytes(19200))
+            client.process_audio(websocket, vad, None)
+            client.append_audio_data(bytes(6400))
+            client.update_config({"processing_strategy": "fixed_interval", "processing_args": {"interval_seconds": 0.1}})
+            self.assertIsInstance(client.buffering_strategy, FixedInterval)
+            # The previous strategy is still analysing its chunk, the new one must not start yet
+            client.process_audio(websocket, vad, None)
+            self.assertFalse(client.buffering_strategy.tasks)
+            self.assertEqual(len(client.buffer), 6400)
+            await asyncio.sleep(0.15)
+            client.process_audio(websocket, vad, None)
+            self.assertTrue(client.buffering_strategy.tasks)
+            await asyncio.gather(*client.buffering_strategy.tasks)
+
+        asyncio.run(run())
+        self.assertIsInstance(client.buffering_strategy, FixedInterval)
+
+    def test_swap_clears_the_prompt_of_the_previous_strategy(self):
+        asr = FakeWordASR()
+        client, _ = stream_tone("partial_transcription", {"partial_interval_seconds": 0.5, "chunk_offset_seconds": 0.5, "max_window_seconds": 4}, asr)
+        self.assertIsNotNone(client.prompt)
+        client.update_config({"processing_strategy": "fixed_interval", "processing_args": {"interval_seconds": 0.1}})
+        self.assertIsNone(client.prompt)
+        calls = len(asr.prompts)
+
+        t = np.arange(3200) / 16000
+        tone = (0.1 * np.sin(2 * np.pi * 220 * t) * 32767).astype(np.int16).tobytes()
+
+        async def run():
+            client.append_audio_data(tone)
+            client.process_audio(FakeWebSocket(), EnergyVAD(), asr)
+            await asyncio.gather(*client.buffering_strategy.tasks)
+
+        asyncio.run(run())
+        self.assertGreater(len(asr.prompts), calls)
+        self.assertEqual(asr.prompts[calls:], [None] * (len(asr.prompts) - calls))
+
+class TestFixedInterval(unittest.TestCase):
+    def test_overlapping_windows_send_every_word_once(self):
+        asr = FakeWordASR()
+        _, messages = stream_tone("fixed_interval", {"interval_seconds": 1.0, "window_seconds": 3.0}, asr)
+
+        self.assertEqual(" ".join(m["text"] for m in messages), " ".join(f"w{k}" for k in range(28)))
+        self.assertLessEqual(asr.max_seconds, 3.0)
+
+    def test_text_overlap_is_removed_without_word_timestamps(self):
+        self.assertEqual(FixedInterval._deduplicate("the quick brown fox", "brown fox jumps"), "jumps")
+        self.assertEqual(FixedInterval._deduplicate("", "brown fox"), "brown fox")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import asyncio
+import json
+
+import numpy as np
+
+from src.client import Client
+from src.vad.energy_vad import EnergyVAD
+from .test_silence_at_end_of_chunk import FakeWebSocket
+
+class FakeWordASR:
+    """
+    ASR returning one word per half second of stream time, named after its absolute position,
+    so repeated and skipped audio show up in the committed text.
+    """
+    def __init__(self):
+        self.prompts = []
+        self.max_seconds = 0
+
+    async def transcribe(self, client):
+        bytes_per_second = client.sampling_rate * client.samples_width
+        offset = client.audio.start / bytes_per_second
+        duration = len(client.scratch_buffer) / bytes_per_second
+        self.prompts.append(client.prompt)
+        self.max_seconds = max(self.max_seconds, duration)
+        words = [{"word": f" w{k}", "start": k * 0.5 - offset, "end": k * 0.5 + 0.4 - offset, "probability": 1.0}
+                 for k in range(int(np.ceil(offset / 0.5 - 1e-9)), 28) if k * 0.5 + 0.4 <= offset + duration]
+        return {"language": "en", "language_probability": 1.0, "text": "".join(w["word"] for w in words).strip(), "words": words}
+
+def stream_tone(processing_strategy, processing_args, asr):
+    """
+    Streams 14 seconds of a tone followed by a second of silence in 100 ms frames, letting every
+    scheduled task finish before the next frame arrives. Returns the client and the sent messages.
+    """
+    client = Client("test_client", 16000, 2)
+    client.update_config({"processing_strategy": processing_strategy, "processing_args": processing_args})
+    websocket = FakeWebSocket()
+    vad = EnergyVAD()
+
+    t = np.arange(14 * 16000) / 16000
+    audio = np.concatenate([0.1 * np.sin(2 * np.pi * 220 * t), np.zeros(16000)])
+    pcm = (audio * 32767).astype(np.int16).tobytes()
+
+    async def run():
+        for i in range(0, len(pcm), 3200):
+            client.append_audio_data(pcm[i:i + 3200])
+            client.process_audio(websocket, vad, asr)
+            await asyncio.gather(*client.buffering_strategy.tasks)
+
+    asyncio.run(run())
+    return client, [json.loads(m) for m in websocket.sent]
+
+class TestPartialTranscription(unittest.TestCase):
+    def test_partials_then_committed_finals_without_repetition(self):
+        asr = FakeWordASR()
+        client, messages = stream_tone("partial_transcription", {"partial_interval_seconds": 0.5, "chunk_offset_seconds": 0.5, "max_window_seconds": 4}, asr)
+        finals = [m["text"] for m in messages if m["type"] == "final"]
+
+        self.assertIn("partial", [m["type"] for m in messages])
+        self.assertGreater(len(finals), 1)
+        self.assertEqual(" ".join(finals), " ".join(f"w{k}" for k in range(28)))
+        self.assertLessEqual(asr.max_seconds, 4.5)
+        # The final decode of the tail is conditioned on everything committed before it
+        self.assertEqual(asr.prompts[0], None)
+        self.assertEqual(asr.prompts[-1], " ".join(finals[:-1]))
+        self.assertEqual(client.buffering_strategy.committed_text, " ".join(finals))
+
+class TestLocalAgreement(unittest.TestCase):
+    def test_agreed_words_are_committed_and_not_decoded_again(self):
+        asr = FakeWordASR()
+        _, messages = stream_tone("local_agreement", {"partial_interval_seconds": 0.5, "chunk_offset_seconds": 0.5}, asr)
+        finals = [m["text"] for m in messages if m["type"] == "final"]
+
+        self.assertEqual(" ".join(finals), " ".join(f"w{k}" for k in range(28)))
+        # Only the unconfirmed tail is decoded, never the whole 14 second utterance
+        self.assertLessEqual(asr.max_seconds, 2)
+
+    def test_disagreeing_hypotheses_fall_back_to_the_bounded_window(self):
+        asr = FakeWordASR()
+        original = asr.transcribe
+
+        async def unstable(client):
+            transcription = await original(client)
+            # Every word changes between hypotheses, so nothing can be agreed on
+            transcription["words"] = [dict(w, word=f"{w['word']}x{len(asr.prompts)}") for w in transcription["words"]]
+            return transcription
+
+        asr.transcribe = unstable
+        _, messages = stream_tone("local_agreement", {"partial_interval_seconds": 0.5, "chunk_offset_seconds": 0.5, "max_window_seconds": 4}, asr)
+
+        self.assertGreater(len([m for m in messages if m["type"] == "final"]), 1)
+        self.assertLessEqual(asr.max_seconds, 4.5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,245 @@
+import unittest
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from src.client import Client
+from src.vad.energy_vad import EnergyVAD
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+        self.close_code = None
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    async def close(self, code=1000, reason=""):
+        self.close_code = code
+
+class SlowSilentVAD:
+    """
+    VAD that takes a while and never finds speech.
+    """
+    async def detect_activity(self, client):
+        await asyncio.sleep(0.1)
+        return []
+
+class TestOverloadPolicies(unittest.TestCase):
+    def run_overloaded_client(self, **processing_args):
+        client = Client("test_client", 16000, 2)
+        client.update_config({"processing_args": {"chunk_length_seconds": 0.5, "chunk_offset_seconds": 0.1, **processing_args}})
+        websocket = FakeWebSocket()
+
+        async def run():
+            for _ in range(10):
+                client.append_audio_data(bytes(6400))
+                client.process_audio(websocket, SlowSilentVAD(), None)
+                await asyncio.sleep(0.005)
+            await asyncio.sleep(0.2)
+
+        asyncio.run(run())
+        return client, websocket
+
+    def test_coalesce_keeps_audio_for_the_next_chunk(self):
+        client, websocket = self.run_overloaded_client(overload_policy="coalesce")
+
+        self.assertEqual(len(client.buffer), 7 * 6400)
+        self.assertEqual(websocket.sent, [])
+
+    def test_drop_oldest_keeps_one_chunk(self):
+        client, _ = self.run_overloaded_client(overload_policy="drop_oldest")
+
+        self.assertEqual(len(client.buffer), 16000)
+
+    def test_backpressure_message_is_sent_once(self):
+        _, websocket = self.run_overloaded_client(overload_policy="backpressure")
+
+        self.assertEqual([json.loads(m)["type"] for m in websocket.sent], ["backpressure"])
+
+    def test_error_if_not_realtime_closes_only_this_client(self):
+        _, websocket = self.run_overloaded_client(error_if_not_realtime=True)
+
+        self.assertEqual([json.loads(m)["type"] for m in websocket.sent], ["error"])
+        self.assertEqual(websocket.close_code, 1013)
+
+class SlowEnergyVAD(EnergyVAD):
+    """
+    EnergyVAD taking 100 ms per call, recording when each call finished.
+    """
+    def __init__(self):
+        super().__init__()
+        self.finished = []
+
+    async def detect_activity(self, client):
+        await asyncio.sleep(0.1)
+        self.finished.append(time.monotonic())
+        return await super().detect_activity(client)
+
+class StillSpeakingVAD(SlowEnergyVAD):
+    """
+    VAD finding speech up to the end of the buffer.
+    """
+    async def detect_activity(self, client):
+        await super().detect_activity(client)
+        return [{"start": 0.0, "end": len(client.scratch_buffer) / 32000, "confidence": 1.0}]
+
+class SlowASR:
+    """
+    ASR taking 100 ms per transcription, recording when each one started and which were cancelled.
+    """
+    def __init__(self):
+        self.started = []
+        self.cancelled = 0
+
+    async def transcribe(self, client):
+        self.started.append(time.monotonic())
+        try:
+            await asyncio.sleep(0.1)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return {"text": "hello", "language": "en", "language_probability": 1.0, "words": []}
+
+def tone(seconds):
+    t = np.arange(int(seconds * 16000)) / 16000
+    return (0.3 * np.sin(2 * np.pi * 220 * t) * 32767).astype(np.int16).tobytes()
+
+class TestPipelinedASR(unittest.TestCase):
+    def run_chunk(self, audio, vad, asr, **processing_args):
+        client = Client("test_client", 16000, 2)
+        client.update_config({"processing_args": {"chunk_length_seconds": 1.5, "chunk_offset_seconds": 0.5, **processing_args}})
+        websocket = FakeWebSocket()
+
+        async def run():
+            client.append_audio_data(audio)
+            client.process_audio(websocket, vad, asr)
+            await asyncio.wait(client.pending_tasks())
+
+        asyncio.run(run())
+        return client, websocket
+
+    def test_speculative_transcription_is_committed_when_speech_ended(self):
+        vad, asr = SlowEnergyVAD(), SlowASR()
+        client, websocket = self.run_chunk(tone(1) + bytes(32000), vad, asr, pipelined_asr=True)
+
+        self.assertEqual(len(asr.started), 1)
+        # Decoding overlapped with the VAD instead of following it
+        self.assertLess(asr.started[0], vad.finished[0])
+        self.assertEqual([json.loads(m)["text"] for m in websocket.sent], ["hello"])
+        self.assertEqual(len(client.scratch_buffer), 0)
+
+    def test_no_speculation_while_the_chunk_ends_loud(self):
+        vad, asr = SlowEnergyVAD(), SlowASR()
+        client, websocket = self.run_chunk(tone(2), vad, asr, pipelined_asr=True)
+
+        self.assertEqual(asr.started, [])
+        self.assertEqual(websocket.sent, [])
+        self.assertEqual(len(client.scratch_buffer), 64000)
+
+    def test_speculative_transcription_is_discarded_when_speech_goes_on(self):
+        vad, asr = StillSpeakingVAD(), SlowASR()
+        client, websocket = self.run_chunk(tone(1) + bytes(32000), vad, asr, pipelined_asr=True)
+
+        self.assertEqual(len(asr.started), 1)
+        self.assertEqual(asr.cancelled, 1)
+        self.assertEqual(websocket.sent, [])
+        self.assertEqual(len(client.scratch_buffer), 64000)
+
+    def test_sequential_without_pipelining(self):
+        vad, asr = SlowEnergyVAD(), SlowASR()
+        _, websocket = self.run_chunk(tone(1) + bytes(32000), vad, asr)
+
+        self.assertGreaterEqual(asr.started[0], vad.finished[0])
+        self.assertEqual([json.loads(m)["text"] for m in websocket.sent], ["hello"])
+
+class FlakyVAD(EnergyVAD):
+    """
+    EnergyVAD failing on its first call.
+    """
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    async def detect_activity(self, client):
+        self.calls += 1
+        if self.calls == 1:
+            raise RuntimeError("transient VAD error")
+        return await super().detect_activity(client)
+
+class TestProcessingErrors(unittest.TestCase):
+    def test_chunk_after_a_failed_one_is_processed(self):
+        client = Client("test_client", 16000, 2)
+        client.update_config({"processing_args": {"chunk_length_seconds": 1.5, "chunk_offset_seconds": 0.5}})
+        websocket, vad, asr = FakeWebSocket(), FlakyVAD(), SlowASR()
+
+        async def run():
+            client.append_audio_data(tone(1) + bytes(32000))
+            client.process_audio(websocket, vad, asr)
+            await asyncio.wait(client.pending_tasks())
+            client.append_audio_data(bytes(64000))
+            client.process_audio(websocket, vad, asr)
+            await asyncio.wait(client.pending_tasks())
+
+        asyncio.run(run())
+        self.assertEqual(vad.calls, 2)
+        self.assertEqual([json.loads(m)["text"] for m in websocket.sent], ["hello"])
+        self.assertEqual(len(client.scratch_buffer), 0)
+
+class RecordingASR:
+    """
+    ASR recording the seconds of audio it was given, returning one word per half second of tone
+    at the times the tones would be at if the audio were packed with 0.2 s of padding.
+    """
+    def __init__(self):
+        self.audio_seconds = []
+
+    async def transcribe(self, client):
+        self.audio_seconds.append(len(client.scratch_buffer) / (client.sampling_rate * client.samples_width))
+        return {"text": "one two", "language": "en", "language_probability": 1.0,
+                "words": [{"word": "one", "start": 0.2, "end": 0.7, "probability": 1.0},
+                          {"word": "two", "start": 1.1, "end": 1.6, "probability": 1.0}]}
+
+class TestPackSpeech(unittest.TestCase):
+    # 1 s of silence, "one", 2 s of silence, "two", 1 s of silence
+    audio = bytes(32000) + tone(0.5) + bytes(64000) + tone(0.5) + bytes(32000)
+
+    def run_chunk(self, **processing_args):
+        client = Client("test_client", 16000, 2)
+        client.update_config({"processing_args": {"chunk_length_seconds": 1.5, "chunk_offset_seconds": 0.5, **processing_args}})
+        websocket = FakeWebSocket()
+        asr = RecordingASR()
+
+        async def run():
+            client.append_audio_data(self.audio)
+            client.process_audio(websocket, EnergyVAD(hangover_ms=0), asr)
+            await asyncio.wait(client.pending_tasks())
+
+        asyncio.run(run())
+        return asr, [json.loads(m) for m in websocket.sent]
+
+    def test_only_speech_regions_are_transcribed(self):
+        asr, messages = self.run_chunk(pack_speech=True, speech_padding_seconds=0.2)
+
+        self.assertAlmostEqual(asr.audio_seconds[0], 1.8, delta=0.1)
+        words = messages[0]["words"]
+        self.assertAlmostEqual(words[0]["start"], 1.0, delta=0.1)
+        self.assertAlmostEqual(words[0]["end"], 1.5, delta=0.1)
+        self.assertAlmostEqual(words[1]["start"], 3.5, delta=0.1)
+        self.assertAlmostEqual(words[1]["end"], 4.0, delta=0.1)
+
+    def test_incremental_vad_trims_the_silence_around_the_speech(self):
+        asr, _ = self.run_chunk(pack_speech=True, speech_padding_seconds=0.2, vad_mode="incremental")
+
+        self.assertAlmostEqual(asr.audio_seconds[0], 3.4, delta=0.1)
+
+    def test_whole_scratch_buffer_without_packing(self):
+        asr, messages = self.run_chunk()
+
+        self.assertEqual(asr.audio_seconds, [5.0])
+        self.assertEqual(messages[0]["words"][0]["start"], 0.2)
+
+if __name__ == '__main__':
+    unittest.main()
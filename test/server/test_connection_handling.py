@@ -0,0 +1,141 @@
+import unittest
+import asyncio
+import json
+
+import numpy as np
+import websockets
+
+from src.asr.asr_interface import ASRInterface
+from src.inference_executor import InferenceExecutor
+from src.server import Server
+from src.vad.energy_vad import EnergyVAD
+from src.worker_pool import WorkerPool, WorkerVADProxy, WorkerASRProxy
+
+class SlowASR(ASRInterface):
+    """
+    ASR taking `service_time` seconds per transcription, recording started and cancelled ones.
+    """
+    def __init__(self, service_time):
+        self.service_time = service_time
+        self.started = asyncio.Event()
+        self.calls = 0
+        self.cancelled = 0
+
+    async def transcribe(self, client):
+        self.calls += 1
+        self.started.set()
+        try:
+            await asyncio.sleep(self.service_time)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        seconds = len(client.scratch_buffer) / (client.sampling_rate * client.samples_width)
+        return {"language": "en", "language_probability": 1.0, "text": f"{seconds:.1f} seconds", "words": []}
+
+def tone(seconds):
+    t = np.arange(int(seconds * 16000)) / 16000
+    return (0.3 * np.sin(2 * np.pi * 220 * t) * 32767).astype(np.int16).tobytes()
+
+CONFIG = {"type": "config", "data": {"processing_strategy": "silence_at_end_of_chunk",
+                                     "processing_args": {"chunk_length_seconds": 1, "chunk_offset_seconds": 0.5}}}
+
+class TestConnectionHandling(unittest.TestCase):
+    def run_server(self, asr, scenario, vad=None, **kwargs):
+        async def run():
+            server = Server(vad or EnergyVAD(), asr, host='127.0.0.1', port=0, **kwargs)
+            websocket_server = await server.start()
+            port = websocket_server.sockets[0].getsockname()[1]
+            try:
+                return await scenario(server, f"ws://127.0.0.1:{port}")
+            finally:
+                await server.shutdown(drain_timeout=1)
+
+        return asyncio.run(run())
+
+    def test_disconnect_cancels_processing_in_flight(self):
+        asr = SlowASR(service_time=5)
+
+        async def scenario(server, uri):
+            async with websockets.connect(uri) as websocket:
+                await websocket.send(json.dumps(CONFIG))
+                await websocket.send(tone(1) + bytes(32000))
+                await asyncio.wait_for(asr.started.wait(), timeout=2)
+            for _ in range(100):
+                if not server.connected_clients:
+                    break
+                await asyncio.sleep(0.01)
+            return server
+
+        server = self.run_server(asr, scenario)
+        self.assertEqual(asr.calls, 1)
+        self.assertEqual(asr.cancelled, 1)
+        self.assertEqual(server.connected_clients, {})
+        self.assertEqual(server.connections, {})
+
+    def test_shutdown_transcribes_held_audio_before_closing(self):
+        asr = SlowASR(service_time=0.05)
+
+        async def scenario(server, uri):
+            async with websockets.connect(uri) as websocket:
+                await websocket.send(json.dumps(CONFIG))
+                # Still speaking: nothing is transcribed until the server shuts down
+                await websocket.send(tone(0.5))
+                await asyncio.sleep(0.1)
+                self.assertEqual(asr.calls, 0)
+
+                shutdown = asyncio.create_task(server.shutdown(drain_timeout=2))
+                messages = [json.loads(message) async for message in websocket]
+                await shutdown
+                return messages, websocket.close_code
+
+        messages, close_code = self.run_server(asr, scenario)
+        self.assertEqual([m["text"] for m in messages], ["0.5 seconds"])
+        self.assertEqual(close_code, 1001)
+
+    def test_utterance_longer_than_the_ring_is_transcribed_whole(self):
+        asr = SlowASR(service_time=0.01)
+
+        async def scenario(server, uri):
+            async with websockets.connect(uri) as websocket:
+                await websocket.send(json.dumps(CONFIG))
+                for _ in range(80):
+                    await websocket.send(tone(0.5))
+                    await asyncio.sleep(0.005)
+                await websocket.send(bytes(32000))
+                messages = []
+                while sum(messages) < 40:
+                    message = json.loads(await asyncio.wait_for(websocket.recv(), timeout=5))
+                    messages.append(float(message["text"].split()[0]))
+                return messages
+
+        messages = self.run_server(asr, scenario)
+        # The 30 s ring was flushed before its oldest audio got overwritten
+        self.assertGreaterEqual(len(messages), 2)
+        self.assertAlmostEqual(sum(messages), 41, delta=1)
+
+    def test_connections_are_refused_while_the_worker_pool_is_saturated(self):
+        # Processes are only created, not started, so the job below is never answered
+        pool = WorkerPool(1, "energy", {}, "faster_whisper", {}, max_queue_size=1)
+
+        async def scenario(server, uri):
+            job = asyncio.create_task(pool.submit(None, "vad_audio", bytes(320)))
+            await asyncio.sleep(0)
+            async with websockets.connect(uri) as websocket:
+                with self.assertRaises(websockets.ConnectionClosed):
+                    await asyncio.wait_for(websocket.recv(), timeout=2)
+                close_code = websocket.close_code
+            stats = server.get_stats()
+            job.cancel()
+            return close_code, stats
+
+        try:
+            close_code, stats = self.run_server(WorkerASRProxy(pool), scenario, vad=WorkerVADProxy(pool), executor=InferenceExecutor(),
+                                                refuse_when_saturated=True, worker_pool=pool)
+        finally:
+            pool.shutdown()
+        self.assertEqual(close_code, 1013)
+        self.assertEqual(stats["executor"]["pending"], 1)
+        self.assertEqual(stats["executor"]["stages"]["vad"], {"queued": 0, "running": 1})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,8 +9,7 @@ from pydub import AudioSegment
 from sentence_transformers import SentenceTransformer, util
 
 from src.server import Server
-from src.vad.vad_factory import VADFactory
-from src.asr.asr_factory import ASRFactory
+from src.model_registry import model_registry
 
 class TestServer(unittest.TestCase):
     """
@@ -40,8 +39,8 @@ class TestServer(unittest.TestCase):
         Initializes the VAD and ASR pipelines, the server, the path to the annotations,
         a list to store received transcriptions, and the sentence similarity model.
         """
-        self.vad_pipeline = VADFactory.create_vad_pipeline(self.vad_type)
-        self.asr_pipeline = ASRFactory.create_asr_pipeline(self.asr_type)
+        self.vad_pipeline = model_registry.get_vad_pipeline(self.vad_type)
+        self.asr_pipeline = model_registry.get_asr_pipeline(self.asr_type)
         self.server = Server(self.vad_pipeline, self.asr_pipeline, host='127.0.0.1', port=8767)
         self.annotations_path = os.path.join(os.path.dirname(__file__), "../audio_files/annotations.json")
         self.received_transcriptions = []
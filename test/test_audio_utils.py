@@ -0,0 +1,95 @@
+import unittest
+
+import numpy as np
+
+from src.audio_utils import pcm16_to_float32, downmix, PolyphaseResampler, InputConverter, pack_speech_regions, unpack_word_times
+from src.client import Client
+
+class TestPcm16ToFloat32(unittest.TestCase):
+    def test_normalizes_int16_range(self):
+        pcm = np.array([0, 16384, -16384, 32767, -32768], dtype=np.int16)
+        audio = pcm16_to_float32(bytearray(pcm.tobytes()))
+
+        self.assertEqual(audio.dtype, np.float32)
+        np.testing.assert_allclose(audio, [0.0, 0.5, -0.5, 32767 / 32768, -1.0])
+
+    def test_accepts_memoryview_and_ignores_trailing_odd_byte(self):
+        data = bytearray(np.arange(4, dtype=np.int16).tobytes()) + b'\x01'
+        audio = pcm16_to_float32(memoryview(data))
+
+        self.assertEqual(len(audio), 4)
+
+def tone(frequency, sampling_rate, seconds=1.0):
+    t = np.arange(int(seconds * sampling_rate)) / sampling_rate
+    return (0.5 * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+class TestPackSpeechRegions(unittest.TestCase):
+    def test_padded_regions_are_packed_and_merged(self):
+        pcm = np.arange(100, dtype=np.int16)
+        # At 10 Hz: the first two regions overlap once padded, the last one reaches past the end
+        packed, offsets = pack_speech_regions(memoryview(pcm.tobytes()), [(1.0, 2.0), (2.5, 3.0), (8.0, 12.0)], 0.3, sampling_rate=10)
+
+        np.testing.assert_array_equal(np.frombuffer(packed, dtype=np.int16), np.r_[7:33, 77:100])
+        self.assertEqual(offsets, [(0.0, 0.7, 2.6), (2.6, 7.7, 2.3)])
+
+    def test_word_times_are_mapped_back(self):
+        offsets = [(0.0, 0.7, 2.6), (2.6, 7.7, 2.3)]
+        words = [{"word": "a", "start": 0.5, "end": 2.6}, {"word": "b", "start": 2.6, "end": 3.0}, {"word": "c", "start": 4.8, "end": 5.5}]
+
+        unpacked = unpack_word_times(words, offsets)
+
+        self.assertEqual([w["word"] for w in unpacked], ["a", "b", "c"])
+        np.testing.assert_allclose([(w["start"], w["end"]) for w in unpacked], [(1.2, 3.3), (7.7, 8.1), (9.9, 10.0)])
+        self.assertEqual(words[0]["start"], 0.5)
+
+class TestPolyphaseResampler(unittest.TestCase):
+    def test_resamples_common_rates_accurately(self):
+        for input_rate in (8000, 22050, 44100, 48000):
+            output = PolyphaseResampler(input_rate, 16000).process(tone(1000, input_rate))
+            expected = tone(1000, 16000)[:len(output)]
+
+            self.assertGreater(len(output), 15900)
+            np.testing.assert_allclose(output[200:-200], expected[200:-200], atol=1e-4)
+
+    def test_removes_frequencies_above_the_output_nyquist(self):
+        output = PolyphaseResampler(48000, 16000).process(tone(12000, 48000))
+
+        self.assertLess(np.abs(output[200:-200]).max(), 1e-3)
+
+    def test_streaming_matches_one_shot(self):
+        audio = tone(440, 44100)
+        whole = PolyphaseResampler(44100, 16000).process(audio)
+        resampler = PolyphaseResampler(44100, 16000)
+        boundaries = [0, 1, 1000, 1007, 20000, len(audio)]
+        pieces = np.concatenate([resampler.process(audio[a:b]) for a, b in zip(boundaries, boundaries[1:])])
+
+        np.testing.assert_array_equal(whole, pieces)
+
+class TestInputConverter(unittest.TestCase):
+    def test_downmix_averages_channels(self):
+        np.testing.assert_allclose(downmix(np.array([1.0, 0.0, 0.5, 0.5], dtype=np.float32), 2), [0.5, 0.5])
+
+    def test_float32_stereo_48k_is_converted_across_split_frames(self):
+        stereo = np.repeat(tone(1000, 48000), 2).tobytes()
+        converter = InputConverter(48000, 'float32', 2, 16000)
+        # Split in the middle of a sample to exercise the carried remainder
+        pcm = converter.convert(stereo[:10001]) + converter.convert(stereo[10001:])
+
+        audio = pcm16_to_float32(pcm)
+        np.testing.assert_allclose(audio[200:-200], tone(1000, 16000)[200:len(audio) - 200], atol=1e-3)
+
+    def test_client_declares_its_input_format(self):
+        client = Client("test_client", 16000, 2)
+        client.update_config({"channels": 1})
+        self.assertIsNone(client.input_converter)
+
+        client.update_config({"sample_rate": 48000, "sample_format": "float32"})
+        client.receive_audio(tone(1000, 48000).tobytes())
+        self.assertAlmostEqual(len(client.buffer) / 2, 16000, delta=50)
+
+        with self.assertRaises(ValueError):
+            client.update_config({"sample_format": "int24"})
+        self.assertEqual(client.input_converter.sample_format, "float32")
+
+if __name__ == '__main__':
+    unittest.main()
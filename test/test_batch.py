@@ -0,0 +1,175 @@
+import unittest
+import asyncio
+import io
+import json
+import os
+import sys
+import tempfile
+import wave
+from unittest import mock
+
+import numpy as np
+
+from src.asr.asr_interface import ASRInterface
+from src.audio_utils import load_wav_mmap
+from src import batch
+from src.batch import BatchTranscriber, pack_segments
+from src.vad.energy_vad import EnergyVAD
+from src.worker_pool import WorkerPool
+from test.test_worker_pool import _stub_worker_main
+
+class StubWorkerPool(WorkerPool):
+    """
+    WorkerPool whose workers transcribe with ScratchLengthASR, answering with the segment's size in bytes.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for process in self.processes:
+            process._target = _stub_worker_main
+
+class LengthASR(ASRInterface):
+    """
+    ASR answering with the length of each segment, recording the size of every batch.
+    """
+    def __init__(self):
+        self.batch_sizes = []
+
+    async def transcribe(self, client):
+        seconds = len(client.scratch_buffer) / (client.sampling_rate * client.samples_width)
+        return {"text": f"{seconds:.1f}", "language": "en", "words": [{"word": "x", "start": 0.0, "end": seconds, "probability": 1.0}]}
+
+    async def transcribe_batch(self, clients):
+        self.batch_sizes.append(len(clients))
+        return [await self.transcribe(client) for client in clients]
+
+class FailingResultASR(LengthASR):
+    """
+    ASR whose results for one file cannot be used, like a backend returning a malformed result.
+    """
+    async def transcribe(self, client):
+        if client.client_id.startswith("bad.wav"):
+            return None
+        return await super().transcribe(client)
+
+def write_wav(path, samples, sampling_rate, channels=1):
+    if samples.dtype == np.float32:
+        # The wave module only writes integer PCM, patch the format tag to IEEE float
+        with wave.open(path, 'wb') as wav_file:
+            wav_file.setnchannels(channels)
+            wav_file.setsampwidth(4)
+            wav_file.setframerate(sampling_rate)
+            wav_file.writeframes(samples.tobytes())
+        with open(path, 'r+b') as f:
+            f.seek(20)
+            f.write((3).to_bytes(2, 'little'))
+        return
+    with wave.open(path, 'wb') as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sampling_rate)
+        wav_file.writeframes(samples.tobytes())
+
+def speech_like(sampling_rate, pattern):
+    """
+    Alternates tone (speech) and silence for the given (seconds, is_speech) pattern.
+    """
+    parts = []
+    for seconds, is_speech in pattern:
+        t = np.arange(int(seconds * sampling_rate)) / sampling_rate
+        parts.append(0.3 * np.sin(2 * np.pi * 220 * t) if is_speech else np.zeros(len(t)))
+    return np.concatenate(parts)
+
+class TestBatch(unittest.TestCase):
+    def test_pack_segments_merges_short_pauses_and_splits_long_speech(self):
+        segments = [{"start": 0.0, "end": 1.0}, {"start": 1.2, "end": 2.0}, {"start": 5.0, "end": 17.0}]
+
+        self.assertEqual(pack_segments(segments, max_segment_seconds=5, merge_gap_seconds=0.5),
+                         [(0.0, 2.0), (5.0, 10.0), (10.0, 15.0), (15.0, 17.0)])
+
+    def test_load_wav_mmap_reads_float_stereo(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "stereo.wav")
+            write_wav(path, np.arange(8, dtype=np.float32), 48000, channels=2)
+
+            samples, sampling_rate, channels, sample_format = load_wav_mmap(path)
+            self.assertEqual((sampling_rate, channels, sample_format), (48000, 2, 'float32'))
+            np.testing.assert_array_equal(samples, np.arange(8))
+
+    def test_directory_is_transcribed_to_jsonl(self):
+        with tempfile.TemporaryDirectory() as directory:
+            audio = speech_like(16000, [(0.5, False), (2, True), (1, False), (1, True), (0.5, False)])
+            write_wav(os.path.join(directory, "a.wav"), (audio * 32767).astype(np.int16), 16000)
+            os.makedirs(os.path.join(directory, "sub"))
+            stereo = np.repeat(speech_like(48000, [(1, True), (1, False)]).astype(np.float32), 2)
+            write_wav(os.path.join(directory, "sub", "b.wav"), stereo, 48000, channels=2)
+            write_wav(os.path.join(directory, "silent.wav"), np.zeros(16000, dtype=np.int16), 16000)
+            paths = sorted(os.path.join(root, f) for root, _, files in os.walk(directory) for f in files)
+
+            output, asr = io.StringIO(), LengthASR()
+            transcriber = BatchTranscriber(EnergyVAD(), asr, output, batch_size=8, concurrency=2)
+            summary = asyncio.run(transcriber.run(paths, directory))
+
+        results = {r["file"]: r for r in map(json.loads, output.getvalue().splitlines())}
+        self.assertEqual(set(results), {"a.wav", os.path.join("sub", "b.wav"), "silent.wav"})
+        self.assertEqual(len(results["a.wav"]["segments"]), 2)
+        second = results["a.wav"]["segments"][1]
+        # Word times are on the file's timeline
+        self.assertAlmostEqual(second["words"][0]["start"], second["start"])
+        self.assertAlmostEqual(second["start"], 3.5, delta=0.1)
+        self.assertAlmostEqual(results[os.path.join("sub", "b.wav")]["duration"], 2.0)
+        self.assertEqual(results["silent.wav"]["segments"], [])
+        self.assertEqual(summary["files"], 3)
+        self.assertAlmostEqual(summary["audio_seconds"], 8.0, delta=0.01)
+        self.assertEqual(sum(asr.batch_sizes), 3)
+
+    def transcribe_directory(self, files, asr, **kwargs):
+        with tempfile.TemporaryDirectory() as directory:
+            for name, audio in files.items():
+                write_wav(os.path.join(directory, name), (audio * 32767).astype(np.int16), 16000)
+            paths = sorted(os.path.join(directory, name) for name in files)
+            output = io.StringIO()
+            transcriber = BatchTranscriber(EnergyVAD(), asr, output, **kwargs)
+            summary = asyncio.run(asyncio.wait_for(transcriber.run(paths, directory), timeout=10))
+        return {r["file"]: r for r in map(json.loads, output.getvalue().splitlines())}, summary
+
+    def test_vad_runs_in_windows(self):
+        audio = speech_like(16000, [(0.5, False), (2, True), (1, False), (1, True), (0.5, False)])
+        results, _ = self.transcribe_directory({"a.wav": audio}, LengthASR(), vad_window_seconds=1)
+
+        segments = results["a.wav"]["segments"]
+        # Speech cut at the window boundaries is transcribed as one segment
+        self.assertEqual(len(segments), 2)
+        self.assertAlmostEqual(segments[0]["start"], 0.5, delta=0.1)
+        self.assertAlmostEqual(segments[1]["start"], 3.5, delta=0.1)
+
+    def test_failed_batch_only_fails_its_files(self):
+        speech = speech_like(16000, [(0.5, False), (1, True), (0.5, False)])
+        files = {"bad.wav": speech, "good.wav": speech, "silent.wav": np.zeros(16000)}
+        results, summary = self.transcribe_directory(files, FailingResultASR(), batch_size=1, concurrency=1)
+
+        self.assertIn("error", results["bad.wav"])
+        self.assertNotIn("error", results["good.wav"])
+        self.assertEqual(len(results["good.wav"]["segments"]), 1)
+        self.assertEqual(summary["files"], 3)
+        self.assertEqual(summary["failed_files"], 1)
+
+    def test_segments_longer_than_30_seconds_reach_the_workers_whole(self):
+        with tempfile.TemporaryDirectory() as directory:
+            audio = speech_like(16000, [(0.5, False), (45, True), (0.5, False)])
+            write_wav(os.path.join(directory, "long.wav"), (audio * 32767).astype(np.int16), 16000)
+            output = os.path.join(directory, "out.jsonl")
+            argv = ["batch", directory, "--output", output, "--workers", "1", "--vad-type", "energy", "--vad-args", "{}",
+                    "--asr-type", "stub", "--asr-args", "{}", "--max-segment-seconds", "60"]
+            with mock.patch.object(sys, "argv", argv), mock.patch.object(batch, "WorkerPool", StubWorkerPool), \
+                    mock.patch("builtins.print"):
+                batch.main()
+            with open(output) as f:
+                result = json.loads(f.read())
+
+        self.assertEqual(len(result["segments"]), 1)
+        segment = result["segments"][0]
+        self.assertGreater(segment["end"] - segment["start"], 44)
+        self.assertAlmostEqual(int(segment["text"]) / 32000, segment["end"] - segment["start"], delta=0.01)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import asyncio
+import threading
+import time
+
+from src.inference_executor import InferenceExecutor
+
+class TestInferenceExecutor(unittest.TestCase):
+    def test_runs_off_the_event_loop_thread(self):
+        executor = InferenceExecutor(max_workers=1)
+
+        async def run():
+            return await executor.run("asr", threading.get_ident)
+
+        self.assertNotEqual(asyncio.run(run()), threading.get_ident())
+        self.assertEqual(executor.get_metrics()["stages"]["asr"]["completed"], 1)
+        executor.shutdown()
+
+    def test_bounded_queue_reports_depth(self):
+        executor = InferenceExecutor(max_workers=1, max_queue_size=1)
+
+        async def run():
+            tasks = [asyncio.create_task(executor.run("vad", time.sleep, 0.05)) for _ in range(3)]
+            await asyncio.sleep(0.01)
+            depth = executor.get_metrics()["stages"]["vad"]
+            await asyncio.gather(*tasks)
+            return depth
+
+        depth = asyncio.run(run())
+        self.assertEqual(depth["running"], 1)
+        self.assertEqual(depth["queued"], 2)
+        self.assertEqual(executor.pending(), 0)
+        executor.shutdown()
+
+    def test_cancelled_running_job_keeps_its_slot_until_it_returns(self):
+        executor = InferenceExecutor(max_workers=2, max_queue_size=1)
+
+        async def run():
+            first = asyncio.create_task(executor.run("asr", time.sleep, 0.2))
+            await asyncio.sleep(0.05)
+            first.cancel()
+            await asyncio.sleep(0.01)
+            self.assertTrue(executor.is_saturated())
+            started = time.monotonic()
+            await executor.run("asr", time.sleep, 0)
+            return time.monotonic() - started
+
+        waited = asyncio.run(run())
+        self.assertGreater(waited, 0.1)
+        self.assertEqual(executor.pending(), 0)
+        executor.shutdown()
+
+    def test_job_cancelled_while_queued_is_withdrawn(self):
+        executor = InferenceExecutor(max_workers=1, max_queue_size=1)
+        calls = []
+
+        async def run():
+            first = asyncio.create_task(executor.run("vad", time.sleep, 0.05))
+            second = asyncio.create_task(executor.run("vad", calls.append, 1))
+            await asyncio.sleep(0.01)
+            second.cancel()
+            await first
+            await asyncio.sleep(0.01)
+
+        asyncio.run(run())
+        self.assertEqual(calls, [])
+        self.assertEqual(executor.pending(), 0)
+        self.assertEqual(executor.get_metrics()["stages"]["vad"]["completed"], 1)
+        executor.shutdown()
+
+if __name__ == '__main__':
+    unittest.main()
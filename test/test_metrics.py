@@ -0,0 +1,31 @@
+import unittest
+
+from src.metrics import MetricsRegistry
+
+class TestMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_renders_prometheus_text(self):
+        counter = self.registry.counter("chunks_total", "Chunks")
+        histogram = self.registry.histogram("latency_seconds", "Latency", ["model"], buckets=(0.1, 1.0))
+        counter.inc()
+        counter.inc(2)
+        histogram.observe(0.05, model="tiny")
+        histogram.observe(0.5, model="tiny")
+
+        text = self.registry.render()
+
+        self.assertIn("# TYPE chunks_total counter\nchunks_total 3\n", text)
+        self.assertIn('latency_seconds_bucket{model="tiny",le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{model="tiny",le="1.0"} 2', text)
+        self.assertIn('latency_seconds_bucket{model="tiny",le="+Inf"} 2', text)
+        self.assertIn('latency_seconds_count{model="tiny"} 2', text)
+
+    def test_rejects_wrong_labels(self):
+        gauge = self.registry.gauge("depth", "Depth", ["stage"])
+        with self.assertRaises(ValueError):
+            gauge.set(1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,27 @@
+import unittest
+import asyncio
+
+from src.model_registry import ModelRegistry
+
+class TestModelRegistry(unittest.TestCase):
+    def test_same_configuration_is_loaded_once(self):
+        registry = ModelRegistry()
+
+        first = registry.get_vad_pipeline("energy", energy_threshold_db=-40)
+        second = registry.get_vad_pipeline("energy", energy_threshold_db=-40)
+        other = registry.get_vad_pipeline("energy", energy_threshold_db=-30)
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+
+    def test_warm_up_records_timings(self):
+        registry = ModelRegistry()
+        registry.get_vad_pipeline("energy")
+
+        asyncio.run(registry.warm_up(0.5))
+
+        self.assertIn("warm_up_seconds", registry.timings["vad:energy"])
+        self.assertIn("load_seconds", registry.timings["vad:energy"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import json
+import importlib.util
+
+from src.client import Client
+from src.protocol import StreamingAudioDecoder, encode_message
+
+class TestProtocol(unittest.TestCase):
+    def test_defaults_to_raw_pcm_and_json(self):
+        client = Client("test_client", 16000, 2)
+        client.receive_audio(bytes(320))
+
+        self.assertEqual(len(client.buffer), 320)
+        self.assertEqual(json.loads(client.encode_message({"text": "hi"})), {"text": "hi"})
+
+    def test_unsupported_protocol_leaves_the_client_unchanged(self):
+        client = Client("test_client", 16000, 2)
+        with self.assertRaises(ValueError):
+            client.update_config({"audio_format": "pcm", "result_format": "xml"})
+        with self.assertRaises(ValueError):
+            client.update_config({"audio_format": "mp3"})
+
+        self.assertIsNone(client.audio_decoder)
+        self.assertEqual(client.result_format, "json")
+        self.assertNotIn("audio_format", client.config)
+
+    @unittest.skipUnless(importlib.util.find_spec("msgpack"), "msgpack is not installed")
+    def test_msgpack_results_pack_words_as_arrays(self):
+        import msgpack
+        message = {"text": "hi", "words": [{"word": " hi", "start": 0.0, "end": 0.5, "probability": 0.9}]}
+
+        decoded = msgpack.unpackb(encode_message(message, "msgpack"))
+        self.assertEqual(decoded["words"], [[" hi", 0.0, 0.5, 0.9]])
+
+    def test_flac_stream_header_is_skipped_across_messages(self):
+        # Only the header parsing is exercised, which does not need PyAV
+        decoder = StreamingAudioDecoder.__new__(StreamingAudioDecoder)
+        decoder._header = bytearray()
+        streaminfo = bytes([0x00, 0x00, 0x00, 0x22]) + bytes(0x22)
+        comment = bytes([0x84, 0x00, 0x00, 0x02]) + b"ab"
+        stream = b"fLaC" + streaminfo + comment + b"\xff\xf8frame"
+
+        output = b"".join(decoder._skip_flac_header(stream[i:i + 7]) for i in range(0, len(stream), 7))
+        self.assertEqual(output, b"\xff\xf8frame")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import unittest
+
+import numpy as np
+
+from src.ring_buffer import RingBuffer
+from src.client import Client
+
+class TestRingBuffer(unittest.TestCase):
+    def test_wrapping_range_is_contiguous(self):
+        ring = RingBuffer(8)
+        ring.write(b'abcdef')
+        ring.discard_until(4)
+        ring.write(b'ghij')
+
+        self.assertEqual(ring.view().tobytes(), b'efghij')
+        self.assertEqual(ring.view(5, 9).tobytes(), b'fghi')
+
+    def test_drops_oldest_when_full(self):
+        ring = RingBuffer(4)
+        self.assertEqual(ring.write(b'abc'), 0)
+        self.assertEqual(ring.write(b'def'), 2)
+        self.assertEqual(ring.view().tobytes(), b'cdef')
+
+        ring.write(b'0123456789')
+        self.assertEqual(ring.view().tobytes(), b'6789')
+        self.assertEqual(ring.dropped_bytes, 12)
+
+    def test_array_is_a_view(self):
+        ring = RingBuffer(16)
+        ring.write(np.arange(4, dtype=np.int16).tobytes())
+        samples = ring.array()
+
+        np.testing.assert_array_equal(samples, [0, 1, 2, 3])
+        self.assertFalse(samples.flags.owndata)
+
+    def test_storage_grows_up_to_the_capacity(self):
+        ring = RingBuffer(64, initial_size=4)
+        self.assertEqual(ring.allocated_bytes, 8)
+        ring.write(b'abc')
+        ring.discard_until(2)
+        ring.write(b'defgh')
+        first = ring.view()
+
+        self.assertEqual(ring.size, 8)
+        self.assertEqual(first.tobytes(), b'cdefgh')
+        ring.write(bytes(range(100)))
+        self.assertEqual(ring.size, 64)
+        self.assertEqual(ring.view().tobytes(), bytes(range(36, 100)))
+        # Views taken before the storage grew still hold their bytes
+        self.assertEqual(first.tobytes(), b'cdefgh')
+
+class TestClientBuffers(unittest.TestCase):
+    def test_buffer_moves_to_scratch_and_clears(self):
+        client = Client("test_client", 16000, 2, max_buffer_seconds=1)
+        client.append_audio_data(b'\x01\x00' * 10)
+        client.move_buffer_to_scratch()
+        client.append_audio_data(b'\x02\x00' * 5)
+
+        self.assertEqual(len(client.scratch_buffer), 20)
+        self.assertEqual(len(client.buffer), 10)
+
+        client.clear_scratch_buffer()
+        self.assertEqual(len(client.scratch_buffer), 0)
+        self.assertEqual(client.buffer.tobytes(), b'\x02\x00' * 5)
+
+    def test_memory_is_bounded(self):
+        client = Client("test_client", 16000, 2, max_buffer_seconds=1)
+        for _ in range(100):
+            client.append_audio_data(bytes(8192))
+
+        self.assertEqual(len(client.buffer), 32000)
+        self.assertEqual(client.get_memory_usage()["dropped_bytes"], 100 * 8192 - 32000)
+
+    def test_memory_accounting_and_limits(self):
+        client = Client("test_client", 16000, 2, memory_limits={"max_unprocessed_seconds": 1, "action": "drop"})
+        client.append_audio_data(bytes(20001))
+        client.move_buffer_to_scratch()
+
+        usage = client.get_memory_usage()
+        self.assertEqual(client.total_samples, 10000)
+        self.assertEqual(usage["scratch_bytes"], 20001)
+        self.assertEqual(usage["peak_bytes"], 20001)
+        self.assertIsNone(client.check_memory_limits())
+
+        client.append_audio_data(bytes(20000))
+        self.assertEqual(client.check_memory_limits(), "drop")
+
+        client.clear_scratch_buffer()
+        client.clear_buffer()
+        self.assertEqual(client.oldest_unprocessed_age(), 0.0)
+        self.assertEqual(client.get_memory_usage()["peak_bytes"], 40001)
+
+    def test_idle_client_does_not_allocate_the_whole_ring(self):
+        client = Client("test_client", 16000, 2, max_buffer_seconds=30)
+
+        self.assertLess(client.get_memory_usage()["allocated_bytes"], 2 * 960000)
+
+    def test_flush_before_the_ring_is_full(self):
+        client = Client("test_client", 16000, 2, max_buffer_seconds=1)
+        client.append_audio_data(bytes(25000))
+        self.assertIsNone(client.check_memory_limits())
+
+        client.append_audio_data(bytes(1000))
+        self.assertEqual(client.check_memory_limits(), "flush")
+
+    def test_arrival_times_are_only_kept_for_held_audio(self):
+        client = Client("test_client", 16000, 2)
+        for _ in range(1000):
+            client.append_audio_data(bytes(320))
+            client.move_buffer_to_scratch()
+            client.clear_scratch_buffer()
+        client.append_audio_data(bytes(320))
+
+        self.assertEqual(len(client._arrivals), 1)
+
+    def test_dropping_the_buffer_head_keeps_the_arrival_times_of_the_newer_frames(self):
+        client = Client("test_client", 16000, 2)
+        client.append_audio_data(bytes(320))
+        client.move_buffer_to_scratch()
+        for i in range(5):
+            client.append_audio_data(bytes(320))
+            client._arrivals[-1] = (client._arrivals[-1][0], float(i))
+
+        self.assertEqual(client.drop_buffer_head(960), 640)
+        # The scratch frame and the 3 newest frames are left, at their new end offsets
+        self.assertEqual([offset for offset, _ in client._arrivals], [320, 640, 960, 1280])
+        self.assertEqual([arrived for _, arrived in client._arrivals][1:], [2.0, 3.0, 4.0])
+        client.move_buffer_to_scratch()
+        self.assertEqual(client.scratch_updated_at, 4.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from src.metrics import EVENT_LOOP_LAG
+from src.tracing import Tracer, LoopLagMonitor
+
+class TestTracer(unittest.TestCase):
+    def test_disabled_tracer_records_nothing(self):
+        tracer = Tracer()
+        with tracer.span("vad", mode="full"):
+            pass
+        tracer.counter("event_loop_lag", milliseconds=1.0)
+
+        self.assertIs(tracer.span("asr"), tracer.span("send"))
+        self.assertEqual(len(tracer.events), 0)
+
+    def test_spans_are_drawn_on_the_tracks_of_their_client(self):
+        tracer = Tracer()
+        tracer.enable()
+
+        async def connection(client_id):
+            tracer.set_client(client_id)
+            with tracer.span("receive_audio", bytes=320):
+                pass
+
+            async def process():
+                with tracer.span("process_audio_async", track="processing"):
+                    with tracer.span("asr"):
+                        await asyncio.sleep(0.01)
+
+            # Like a buffering strategy's task, it inherits the client of the connection
+            await asyncio.create_task(process())
+            with tracer.span("process_audio"):
+                pass
+
+        async def main():
+            await asyncio.gather(connection("client-a"), connection("client-b"))
+
+        asyncio.run(main())
+
+        events = {(e["name"], e["tid"]) for e in tracer.events}
+        tids = {e["tid"] for e in tracer.events}
+        self.assertEqual(len(tids), 4)
+        by_name = {}
+        for event in tracer.events:
+            by_name.setdefault(event["name"], []).append(event)
+        for asr, outer in zip(by_name["asr"], by_name["process_audio_async"]):
+            self.assertEqual(asr["tid"], outer["tid"])
+            self.assertGreaterEqual(asr["dur"], 10000)
+        # The receive loop is back on its own track once the processing span ended
+        self.assertEqual({e["tid"] for e in by_name["receive_audio"]}, {e["tid"] for e in by_name["process_audio"]})
+        self.assertEqual(len(events), 8)
+        self.assertEqual(by_name["receive_audio"][0]["args"], {"bytes": 320})
+
+    def test_failed_span_records_the_error(self):
+        tracer = Tracer()
+        tracer.enable()
+        with self.assertRaises(ValueError):
+            with tracer.span("update_config"):
+                raise ValueError("bad config")
+
+        self.assertEqual(tracer.events[0]["args"], {"error": "ValueError"})
+
+    def test_export_writes_a_chrome_trace(self):
+        tracer = Tracer()
+        tracer.enable()
+
+        async def connection():
+            tracer.set_client("0123456789abcdef")
+            with tracer.span("vad", track="processing"):
+                pass
+
+        asyncio.run(connection())
+        tracer.counter("event_loop_lag", milliseconds=2.5)
+        tracer.disable()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "trace.json")
+            self.assertEqual(tracer.export(path), 2)
+            with open(path) as f:
+                trace = json.load(f)
+
+        names = [e["args"]["name"] for e in trace["traceEvents"] if e["ph"] == "M"]
+        self.assertIn("client 01234567 processing", names)
+        phases = sorted(e["ph"] for e in trace["traceEvents"] if e["ph"] != "M")
+        self.assertEqual(phases, ["C", "X"])
+
+    def test_bounded_number_of_events(self):
+        tracer = Tracer(max_events=3)
+        tracer.enable()
+        for i in range(5):
+            with tracer.span(f"span-{i}"):
+                pass
+
+        self.assertEqual([e["name"] for e in tracer.events], ["span-2", "span-3", "span-4"])
+
+class TestLoopLagMonitor(unittest.TestCase):
+    def test_blocked_loop_is_measured(self):
+        tracer = Tracer()
+        tracer.enable()
+        observations = EVENT_LOOP_LAG.snapshot().get("", {"count": 0})["count"]
+
+        async def main():
+            monitor = LoopLagMonitor(0.01, tracer)
+            monitor.start()
+            await asyncio.sleep(0.02)
+            # Blocks the event loop like inference running on it would
+            time.sleep(0.1)
+            await asyncio.sleep(0.02)
+            monitor.stop()
+
+        asyncio.run(main())
+
+        lags = [e["args"]["milliseconds"] for e in tracer.events if e["name"] == "event_loop_lag"]
+        self.assertGreaterEqual(max(lags), 50)
+        self.assertGreater(EVENT_LOOP_LAG.snapshot()[""]["count"], observations)
+
+if __name__ == '__main__':
+    unittest.main()
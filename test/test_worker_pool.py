@@ -0,0 +1,154 @@
+import unittest
+import asyncio
+import os
+
+import numpy as np
+
+from src.asr.asr_factory import ASRFactory
+from src.asr.asr_interface import ASRInterface
+from src.worker_pool import WorkerPool, _worker_main
+
+class ScratchLengthASR(ASRInterface):
+    """
+    ASR answering with the length of the client's scratch buffer and the settings it was sent with.
+    """
+    async def transcribe(self, client):
+        return {"text": str(len(client.scratch_buffer)), "language": client.config['language'], "prompt": client.prompt}
+
+def _stub_worker_main(*args):
+    # Runs in the spawned worker, where the stub has to be registered again
+    ASRFactory._create_backend = staticmethod(lambda type, **kwargs: ScratchLengthASR())
+    _worker_main(*args)
+
+def start_stub_pool(num_workers, **kwargs):
+    """
+    Starts a pool whose workers run the energy VAD and ScratchLengthASR.
+    """
+    pool = WorkerPool(num_workers, "energy", {}, "stub", {}, warmup_seconds=0, **kwargs)
+    for process in pool.processes:
+        process._target = _stub_worker_main
+    pool.start()
+    return pool
+
+class TestWorkerPool(unittest.TestCase):
+    def test_clients_are_pinned_to_the_least_loaded_worker(self):
+        # Processes are only created, not started, so no models are loaded
+        pool = WorkerPool(2, "energy", {}, "faster_whisper", {})
+
+        self.assertEqual([pool.worker_for(f"c{i}") for i in range(3)], [0, 1, 0])
+        self.assertEqual(pool.worker_for("c1"), 1)
+
+        pool.release("c0")
+        pool.release("c2")
+        self.assertEqual(pool.worker_for("c3"), 0)
+        self.assertEqual(pool._clients_per_worker, [1, 1])
+
+        pool.release("unknown")
+        self.assertEqual(pool.requests[0].get(timeout=1)[1:3], ("release", "c0"))
+
+    def test_shared_memory_blocks_are_reused_once_the_worker_answered(self):
+        pool = WorkerPool(1, "energy", {}, "faster_whisper", {}, max_buffer_seconds=1)
+
+        async def run():
+            job = asyncio.create_task(pool.submit(None, "vad_audio", bytes(1000)))
+            await asyncio.sleep(0)
+            message = pool.requests[0].get(timeout=1)
+            job_id, name, reused = message[0], message[3], message[6]
+            self.assertTrue(reused)
+            # Answered the way the result reader does
+            pool._finish_job(pool._jobs.pop(job_id), True, [])
+            self.assertEqual(await job, [])
+
+            job = asyncio.create_task(pool.submit(None, "vad_audio", bytes(2000)))
+            await asyncio.sleep(0)
+            message = pool.requests[0].get(timeout=1)
+            self.assertEqual(message[3], name)
+            job.cancel()
+            # The worker may still be reading, the block is not reused before it answers
+            self.assertEqual(pool._free_segments, [])
+            pool._finish_job(pool._jobs.pop(message[0]), True, [])
+            self.assertEqual(len(pool._free_segments), 1)
+
+            # Larger than the reused blocks
+            job = asyncio.create_task(pool.submit(None, "vad_audio", bytes(64001)))
+            await asyncio.sleep(0)
+            self.assertFalse(pool.requests[0].get(timeout=1)[6])
+            job.cancel()
+
+        asyncio.run(run())
+        pool.shutdown()
+
+    def test_jobs_of_a_dead_worker_fail_and_its_clients_move(self):
+        pool = WorkerPool(2, "energy", {}, "faster_whisper", {})
+        client = type("FakeClient", (), {"client_id": "c0", "config": {}, "prompt": None})()
+
+        async def run():
+            job = asyncio.create_task(pool.submit(client, "asr", bytes(320)))
+            await asyncio.sleep(0)
+            self.assertEqual(pool.assignments["c0"], 0)
+            pool._worker_died(0, -9)
+            with self.assertRaises(RuntimeError):
+                await job
+
+        asyncio.run(run())
+        self.assertEqual(pool.worker_for("c0"), 1)
+        self.assertEqual(pool._clients_per_worker, [0, 1])
+        self.assertEqual(pool._jobs, {})
+        pool.shutdown()
+
+    def test_cores_are_split_between_workers(self):
+        pool = WorkerPool(2, "energy", {}, "faster_whisper", {})
+        asr_args = pool.processes[0]._args[6]
+
+        self.assertEqual(asr_args["cpu_threads"], max(1, (os.cpu_count() or 1) // 2))
+        pool = WorkerPool(2, "energy", {}, "faster_whisper", {"cpu_threads": 3})
+        self.assertEqual(pool.processes[0]._args[6]["cpu_threads"], 3)
+
+    def test_jobs_round_trip_through_a_worker_process(self):
+        pool = start_stub_pool(1)
+        client = type("FakeClient", (), {"client_id": "c0", "config": {"language": "de"}, "prompt": "Hallo"})()
+        t = np.arange(16000) / 16000
+        speech = np.concatenate([np.zeros(8000), 0.3 * np.sin(2 * np.pi * 220 * t)]).astype(np.float32)
+
+        async def run():
+            segments = await pool.submit(None, "vad_audio", speech)
+            transcription = await pool.submit(client, "asr", bytes(3200))
+            return segments, transcription
+
+        try:
+            segments, transcription = asyncio.run(run())
+        finally:
+            pool.shutdown()
+        self.assertEqual(len(segments), 1)
+        self.assertAlmostEqual(segments[0]['start'], 0.5, delta=0.05)
+        self.assertEqual(transcription, {"text": "3200", "language": "de", "prompt": "Hallo"})
+        self.assertEqual(pool.dead_workers, set())
+
+    def test_pending_jobs_saturate_the_pool(self):
+        pool = WorkerPool(2, "energy", {}, "faster_whisper", {}, max_queue_size=3)
+        client = type("FakeClient", (), {"client_id": "c0", "config": {}, "prompt": None})()
+
+        async def run():
+            jobs = [asyncio.create_task(pool.submit(client, "asr", bytes(320))) for _ in range(2)]
+            jobs.append(asyncio.create_task(pool.submit(None, "vad_audio", bytes(320))))
+            await asyncio.sleep(0)
+            self.assertTrue(pool.is_saturated())
+            metrics = pool.get_metrics()
+            self.assertEqual(metrics["pending"], 3)
+            self.assertEqual(metrics["stages"], {"asr": {"queued": 1, "running": 1}, "vad": {"queued": 0, "running": 1}})
+
+            # A job whose caller stopped waiting still occupies its worker
+            jobs[0].cancel()
+            await asyncio.sleep(0)
+            self.assertTrue(pool.is_saturated())
+            job_id = min(pool._jobs)
+            pool._finish_job(pool._jobs.pop(job_id), True, {})
+            self.assertFalse(pool.is_saturated())
+            for job in jobs:
+                job.cancel()
+
+        asyncio.run(run())
+        pool.shutdown()
+
+if __name__ == '__main__':
+    unittest.main()
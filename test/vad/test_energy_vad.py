@@ -0,0 +1,68 @@
+import unittest
+import asyncio
+
+import numpy as np
+
+from src.vad.energy_vad import EnergyVAD, PreGatedVAD
+from src.vad.vad_interface import VADInterface
+from src.client import Client
+
+def tone(seconds, amplitude=0.3, sampling_rate=16000):
+    t = np.arange(int(seconds * sampling_rate)) / sampling_rate
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+def silence(seconds, sampling_rate=16000):
+    return np.zeros(int(seconds * sampling_rate), dtype=np.float32)
+
+def to_pcm(audio):
+    return (audio * 32767).astype(np.int16).tobytes()
+
+class CountingVAD(VADInterface):
+    def __init__(self):
+        self.calls = 0
+
+    async def detect_audio_activity(self, audio, sampling_rate=16000):
+        self.calls += 1
+        return [{"start": 0.0, "end": len(audio) / sampling_rate, "confidence": 1.0}]
+
+class TestEnergyVAD(unittest.TestCase):
+    def setUp(self):
+        self.vad = EnergyVAD(hangover_ms=150)
+
+    def test_detects_tone_between_silences(self):
+        audio = np.concatenate([silence(1.0), tone(1.0), silence(1.0)])
+        segments = asyncio.run(self.vad.detect_audio_activity(audio))
+
+        self.assertEqual(len(segments), 1)
+        self.assertAlmostEqual(segments[0]["start"], 1.0, delta=0.05)
+        self.assertAlmostEqual(segments[0]["end"], 2.15, delta=0.05)
+
+    def test_rejects_silence_and_white_noise(self):
+        noise = (np.random.default_rng(0).uniform(-0.3, 0.3, 16000)).astype(np.float32)
+        self.assertEqual(asyncio.run(self.vad.detect_audio_activity(silence(2.0))), [])
+        self.assertEqual(asyncio.run(self.vad.detect_audio_activity(noise)), [])
+
+    def test_incremental_matches_speech_boundaries(self):
+        client = Client("test_client", 16000, 2)
+        audio = to_pcm(np.concatenate([silence(0.5), tone(1.0), silence(1.0)]))
+        events = []
+        for i in range(0, len(audio), 8000):
+            client.append_audio_data(audio[i:i + 8000])
+            client.move_buffer_to_scratch()
+            events += asyncio.run(self.vad.detect_activity_incremental(client, 0.5))
+
+        self.assertEqual([e["type"] for e in events], ["speech_start", "speech_end"])
+        self.assertAlmostEqual(events[0]["time"], 0.5, delta=0.05)
+        self.assertAlmostEqual(events[1]["time"], 1.65, delta=0.05)
+
+    def test_pre_gate_skips_heavy_vad_on_silence(self):
+        heavy = CountingVAD()
+        gated = PreGatedVAD(self.vad, heavy)
+
+        self.assertEqual(asyncio.run(gated.detect_audio_activity(silence(1.0))), [])
+        self.assertEqual(len(asyncio.run(gated.detect_audio_activity(tone(1.0)))), 1)
+        self.assertEqual(heavy.calls, 1)
+        self.assertEqual(gated.gated_chunks, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+import asyncio
+
+import numpy as np
+
+from src.vad.vad_interface import VADInterface
+from src.client import Client
+
+class ThresholdVAD(VADInterface):
+    """
+    Fake VAD marking every 100 ms frame with a loud sample as speech, recording how much audio it scores.
+    """
+    def __init__(self):
+        self.scored_seconds = []
+
+    async def detect_audio_activity(self, audio, sampling_rate=16000):
+        self.scored_seconds.append(len(audio) / sampling_rate)
+        frame = sampling_rate // 10
+        loud = [np.abs(audio[i:i + frame]).max() > 0.1 for i in range(0, len(audio) - frame + 1, frame)]
+        segments = []
+        for i, is_loud in enumerate(loud):
+            if is_loud and segments and segments[-1]["end"] == i / 10:
+                segments[-1]["end"] = (i + 1) / 10
+            elif is_loud:
+                segments.append({"start": i / 10, "end": (i + 1) / 10, "confidence": 1.0})
+        return segments
+
+def pcm(seconds, loud):
+    return (np.full(int(seconds * 16000), 16000 if loud else 0, dtype=np.int16)).tobytes()
+
+class TestIncrementalVAD(unittest.TestCase):
+    def setUp(self):
+        self.vad = ThresholdVAD()
+        self.client = Client("test_client", 16000, 2)
+
+    def feed(self, data):
+        self.client.append_audio_data(data)
+        self.client.move_buffer_to_scratch()
+        return asyncio.run(self.vad.detect_activity_incremental(self.client, 0.5))
+
+    def test_only_new_frames_and_context_are_scored(self):
+        for _ in range(10):
+            self.feed(pcm(1.0, loud=True))
+
+        self.assertTrue(all(seconds <= 1.0 + self.vad.incremental_context_seconds for seconds in self.vad.scored_seconds))
+        self.assertTrue(self.client.vad_state.in_speech)
+
+    def test_emits_speech_start_and_end_events(self):
+        events = self.feed(pcm(0.5, loud=False) + pcm(1.0, loud=True))
+        self.assertEqual(events, [{"type": "speech_start", "time": 0.5}])
+
+        events = self.feed(pcm(0.3, loud=False))
+        self.assertEqual(events, [])
+
+        events = self.feed(pcm(0.5, loud=False))
+        self.assertEqual(events, [{"type": "speech_end", "time": 1.5}])
+        self.assertFalse(self.client.vad_state.in_speech)
+
+if __name__ == '__main__':
+    unittest.main()
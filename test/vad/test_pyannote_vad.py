@@ -5,12 +5,12 @@ import os
 import json
 import asyncio
 from pydub import AudioSegment
-from src.vad.pyannote_vad import PyannoteVAD
+from src.model_registry import model_registry
 from src.client import Client
 
 class TestPyannoteVAD(unittest.TestCase):
     def setUp(self):
-        self.vad = PyannoteVAD()
+        self.vad = model_registry.get_vad_pipeline("pyannote")
         self.annotations_path = os.path.join(os.path.dirname(__file__), "../audio_files/annotations.json")
         self.client = Client("test_client", 16000, 2)  # Example client
 